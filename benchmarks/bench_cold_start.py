@@ -0,0 +1,118 @@
+"""Measures the cold start of a command line validation and guards it against regressions.
+
+Runs main.py in a fresh interpreter on a tiny synthetic file, once with python -X importtime for the
+import times of the modules and --repeat times for the wall time of the whole validation.
+Modules only needed by other modes (worker processes, archives, schema validation, server, result store) must not be
+imported by a plain validation. Exits with 1 if such a module is imported or a time exceeds its bound,
+so it can be run as regression test, e.g. in CI.
+
+Usage: python benchmarks/bench_cold_start.py [--repeat N] [--max-startup-ms MS] [--max-import-ms MS] [--top N]
+"""
+from pathlib import Path
+from typing import Dict, List
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+FRAMEWORK_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(FRAMEWORK_DIR))
+
+from generators import generate_xodr
+
+SYNTHETIC_CHECKS_DIR = Path(__file__).parent / 'synthetic_checks'
+
+# imported lazily by the modes needing them
+FORBIDDEN_MODULES = ['multiprocessing', 'concurrent.futures.process', 'tarfile', 'zipfile', 'numpy', 'xmlschema', 'http.server', 'sqlite3', 'tracemalloc']
+
+
+def get_command(file: Path, output_directory: Path) -> List[str]:
+    return [sys.executable, str(FRAMEWORK_DIR / 'main.py'), str(file), '-f', 'xodr', '-a', str(SYNTHETIC_CHECKS_DIR),
+            '-o', str(output_directory), '--no-cache', '-l', 'ERROR', '--issue-log', 'off']
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Parses the output of python -X importtime.
+
+    Args:
+        stderr (str): The standard error of the interpreter.
+
+    Returns:
+        Dict[str, int]: Cumulative import time in microseconds of the top level imports by module name.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header
+        name = parts[2].rstrip()
+        # nested imports are indented, their time is included in the cumulative time of the top level import
+        if name.startswith('  '):
+            modules.setdefault(name.strip(), None)
+            continue
+        modules[name.strip()] = int(parts[1])
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the cold start of a command line validation.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs, the fastest is reported.')
+    parser.add_argument('--max-startup-ms', type=float, help='Fail if the fastest validation run takes longer.')
+    parser.add_argument('--max-import-ms', type=float, help='Fail if the imports take longer.')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest top level imports printed.')
+    args = parser.parse_args()
+
+    # no bytecode compilation in the measured runs
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', str(FRAMEWORK_DIR)], check=True)
+    environment = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+
+    violations = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        file = directory / 'tiny.xodr'
+        generate_xodr(file, 5)
+        command = get_command(file, directory / 'reports')
+
+        result = subprocess.run([command[0], '-X', 'importtime'] + command[1:], cwd=FRAMEWORK_DIR, env=environment,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr)
+            sys.exit(f'Validation failed with exit code {result.returncode}')
+        modules = parse_importtime(result.stderr)
+
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=FRAMEWORK_DIR, env=environment, capture_output=True, check=True)
+            times.append(time.perf_counter() - start)
+
+    top_level = {name: microseconds for name, microseconds in modules.items() if microseconds is not None}
+    import_ms = sum(top_level.values()) / 1000
+    startup_ms = min(times) * 1000
+    print(f'{"imports":28} {import_ms:10.2f} ms')
+    print(f'{"validation (min)":28} {startup_ms:10.2f} ms')
+    print('slowest top level imports:')
+    for name, microseconds in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'    {name:40} {microseconds / 1000:10.2f} ms')
+
+    for name in FORBIDDEN_MODULES:
+        if name in modules:
+            violations.append(f'{name} is imported by a plain validation')
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        violations.append(f'imports take {import_ms:.2f} ms, more than {args.max_import_ms} ms')
+    if args.max_startup_ms is not None and startup_ms > args.max_startup_ms:
+        violations.append(f'validation takes {startup_ms:.2f} ms, more than {args.max_startup_ms} ms')
+
+    for violation in violations:
+        print(f'REGRESSION {violation}')
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Measures the memory used per issue of a ResultReport.
+
+Usage: python benchmarks/bench_issue_memory.py [number of issues]
+"""
+from pathlib import Path
+from lxml import etree
+
+import gc
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from result_report import ResultReport, IssueLevel, create_location_for_road, create_location_from_element
+
+
+def gen_document(road_count: int) -> etree._Element:
+    root = etree.Element('OpenDRIVE')
+    for i in range(road_count):
+        road = etree.SubElement(root, 'road', id=str(i))
+        etree.SubElement(etree.SubElement(road, 'planView'), 'geometry', s='0')
+    return root
+
+
+def gen_issues(report: ResultReport, roads: list, issue_count: int):
+    bundle = report.gen_checker_bundle('bench bundle', 'Benchmark bundle', '1.0.0')
+    checker = bundle.gen_checker('bench_checker', 'Benchmark checker')
+    for i in range(issue_count):
+        road = roads[i % len(roads)]
+        if i % 2:
+            locations = create_location_for_road(road, road.get('id'), 0.5, 0.0)
+        else:
+            locations = create_location_from_element(road[0][0])
+        checker.gen_issue(IssueLevel.WARNING, 'Geometry is not continuous', locations)
+
+
+def main():
+    issue_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    root = gen_document(1000)
+    roads = list(root)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    report = ResultReport(Path('bench.xodr'))
+    gen_issues(report, roads, issue_count)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    used = current - before
+    print(f'{issue_count} issues')
+    print(f'report size: {used / 1024 / 1024:.1f} MiB (peak {(peak - before) / 1024 / 1024:.1f} MiB)')
+    print(f'bytes per issue: {used / issue_count:.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Compares the typed JSON serializer of ResultReport with the former reflective dumper.
+
+Usage: python benchmarks/bench_json_writer.py [number of issues]
+"""
+from pathlib import Path
+from enum import Enum
+
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from result_report import ResultReport, IssueLevel, Location, XmlLocation, create_location_for_road, create_location_from_xPath
+
+
+def reflective_dumper(obj):
+    """dumper() as used by write_as_json before the typed serializer, when the report classes had no toJSON()."""
+    try:
+        return obj.__json__()  # not provided by the report classes, raises like the former toJSON() lookup
+    except:
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        if isinstance(obj, Path):
+            return str(obj)
+        if isinstance(obj, Enum):
+            return str(obj)
+        return object_dict(obj)
+
+
+def object_dict(obj) -> dict:
+    """Returns the attributes of obj like __dict__ did before Issue and the locations used __slots__."""
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    attributes = {}
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            name = name.lstrip('_')
+            attributes[name] = getattr(obj, name)
+    if isinstance(obj, Location):
+        attributes['class_type'] = obj.class_type
+    return attributes
+
+
+class _Element:
+    sourceline = 1
+
+
+def gen_report(issue_count: int) -> ResultReport:
+    report = ResultReport(Path('bench.xodr'))
+    bundle = report.gen_checker_bundle('bench bundle', 'Benchmark bundle', '1.0.0')
+    checker = bundle.gen_checker('bench_checker', 'Benchmark checker')
+    for i in range(issue_count):
+        if i % 2:
+            locations = create_location_for_road(_Element(), str(i), i * 0.5, 0.0)
+            locations[0] = XmlLocation(f'/OpenDRIVE/road[{i}]')
+        else:
+            locations = create_location_from_xPath(f'/OpenDRIVE/road[{i}]/planView/geometry')
+        checker.gen_issue(IssueLevel.WARNING, f'Issue {i}', locations)
+    return report
+
+
+def measure(name: str, function, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    print(f'{name:<28} {best * 1000:10.1f} ms')
+    return best
+
+
+def main():
+    issue_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    report = gen_report(issue_count)
+    print(f'{issue_count} issues')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, 'legacy.json')
+        typed_file = os.path.join(tmp, 'typed.json')
+
+        def legacy():
+            with open(legacy_file, 'w') as f:
+                json.dump(report, f, default=reflective_dumper, sort_keys=True, indent=4)
+
+        legacy_time = measure('reflective dumper', legacy)
+        typed_time = measure('write_as_json', lambda: report.write_as_json(typed_file))
+        compact_time = measure('write_as_json compact', lambda: report.write_as_json(os.path.join(tmp, 'compact.json'), compact=True))
+        ndjson_time = measure('write_as_ndjson', lambda: report.write_as_ndjson(os.path.join(tmp, 'issues.ndjson')))
+
+        with open(legacy_file) as a, open(typed_file) as b:
+            print('output identical:', a.read() == b.read())
+        print(f'speedup: {legacy_time / typed_time:.1f}x, compact {legacy_time / compact_time:.1f}x, ndjson {legacy_time / ndjson_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
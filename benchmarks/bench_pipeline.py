@@ -0,0 +1,74 @@
+"""Compares the serial validation loop with the pipelined batch mode (prefetch and writer thread).
+
+Reading from network storage is simulated by a delay per opened file, so the overlap is visible
+also on a single core, where only the waiting for I/O can overlap with the checks.
+
+Usage: python benchmarks/bench_pipeline.py [number of files] [read delay in seconds]
+"""
+from pathlib import Path
+
+import logging
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from input_source import FileSource
+from pipeline import ValidationPipeline
+from result_report import set_issue_logging
+from validator import ValidationOptions, validate_file
+from generators import generate_xodr
+
+SYNTHETIC_CHECKS_DIR = Path(__file__).parent / 'synthetic_checks'
+
+
+class SlowFileSource(FileSource):
+    """File on slow storage: every read of the file waits for the delay first."""
+
+    delay = 0.0
+
+    def open(self):
+        time.sleep(self.delay)
+        return super().open()
+
+    def parse(self):
+        time.sleep(self.delay)
+        return super().parse()
+
+    def iterparse(self, **kwargs):
+        time.sleep(self.delay)
+        return super().iterparse(**kwargs)
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    SlowFileSource.delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    logging.basicConfig(level=logging.ERROR)
+    set_issue_logging('off')
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        file = directory / 'bench.xodr'
+        generate_xodr(file, 1000)
+        files = [SlowFileSource(file) for _ in range(file_count)]
+        options = ValidationOptions(additional_check_dirs=[str(SYNTHETIC_CHECKS_DIR)], format_extension='xodr', output_type='json')
+
+        start = time.perf_counter()
+        for source in files:
+            validate_file(source, directory, options)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ValidationPipeline(directory, options, prefetch=2) as pipeline:
+            for _ in pipeline.run(files):
+                pass
+        pipeline_time = time.perf_counter() - start
+
+    print(f'{file_count} files, {SlowFileSource.delay:.2f} s read delay per file')
+    print(f'serial:    {serial_time:8.2f} s')
+    print(f'pipelined: {pipeline_time:8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Compares sampling the reference lines with a loop over the lxml elements with the NumPy RoadNetwork,
+and finding overlapping geometries with all pairs with the grid index.
+
+Usage: python benchmarks/bench_road_network.py [number of roads]
+"""
+from pathlib import Path
+from lxml import etree
+
+import math
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from road_network import RoadNetwork
+from generators import generate_xodr
+
+
+def sample_with_lxml(root: etree._Element, step: float) -> int:
+    """Samples lines and arcs like a per-element geometry check (spirals and polynomials as lines)."""
+    sample_count = 0
+    for road in root.iterfind('road'):
+        for geometry in road.iterfind('planView/geometry'):
+            x0, y0, hdg = float(geometry.get('x')), float(geometry.get('y')), float(geometry.get('hdg'))
+            length = float(geometry.get('length'))
+            arc = geometry.find('arc')
+            curvature = float(arc.get('curvature')) if arc is not None else 0.0
+            ds = 0.0
+            while True:
+                if curvature:
+                    x = x0 + (math.sin(hdg + curvature * ds) - math.sin(hdg)) / curvature
+                    y = y0 - (math.cos(hdg + curvature * ds) - math.cos(hdg)) / curvature
+                else:
+                    x = x0 + ds * math.cos(hdg)
+                    y = y0 + ds * math.sin(hdg)
+                sample_count += 1
+                if ds >= length:
+                    break
+                ds = min(ds + step, length)
+    return sample_count
+
+
+def main():
+    road_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        file = Path(directory) / 'bench.xodr'
+        generate_xodr(file, road_count)
+        root = etree.parse(str(file)).getroot()
+
+    start = time.perf_counter()
+    sample_count = sample_with_lxml(root, 1.0)
+    lxml_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    network = RoadNetwork(root)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    samples = network.sample(1.0)
+    numpy_time = time.perf_counter() - start
+
+    print(f'{road_count} roads, {len(network.geometry_s)} geometries')
+    print(f'lxml loop:      {lxml_time * 1000:10.1f} ms ({sample_count} samples)')
+    print(f'RoadNetwork:    {build_time * 1000:10.1f} ms build + {numpy_time * 1000:.1f} ms sampling ({len(samples)} samples)')
+
+    boxes = network.get_geometry_boxes()
+    geometry_count = min(len(boxes), 2000)  # all pairs is quadratic
+    start = time.perf_counter()
+    pairs = 0
+    for i in range(geometry_count):
+        for j in range(i + 1, geometry_count):
+            if boxes[i, 0] <= boxes[j, 2] and boxes[i, 2] >= boxes[j, 0] and boxes[i, 1] <= boxes[j, 3] and boxes[i, 3] >= boxes[j, 1]:
+                pairs += 1
+    pair_time = time.perf_counter() - start
+    start = time.perf_counter()
+    index_pairs = network.get_spatial_index(50.0).get_overlapping_pairs()
+    index_time = time.perf_counter() - start
+    print(f'all pairs:      {pair_time * 1000:10.1f} ms ({pairs} overlaps of the first {geometry_count} geometries)')
+    print(f'grid index:     {index_time * 1000:10.1f} ms ({len(index_pairs)} overlaps of all geometries)')
+
+
+if __name__ == '__main__':
+    main()
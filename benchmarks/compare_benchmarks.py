@@ -0,0 +1,74 @@
+"""Compares two result files of run_benchmarks.py, e.g. of two commits.
+
+Prints the median time and peak memory of each stage and the change relative to the base.
+Exits with 1 if a stage got slower or needs more memory than the threshold. Changes below the minimal
+absolute differences are ignored, so the noise of very short stages is not reported.
+
+Usage: python benchmarks/compare_benchmarks.py base.json new.json [--threshold 0.1] [--min-time 0.001] [--min-memory 65536]
+"""
+import argparse
+import json
+import sys
+
+
+def compare(base: dict, new: dict, threshold: float, min_time: float = 0.001, min_memory: int = 65536) -> list:
+    """Returns the stages which are slower or need more memory than the threshold.
+
+    Args:
+        base (dict): Results of the base run.
+        new (dict): Results of the new run.
+        threshold (float): Allowed relative increase, e.g. 0.1 for 10%.
+        min_time (float, optional): Minimal absolute increase of the time in seconds. Defaults to 0.001.
+        min_memory (int, optional): Minimal absolute increase of the peak memory in bytes. Defaults to 65536.
+
+    Returns:
+        list: (stage, metric, base value, new value) of the regressions.
+    """
+    regressions = []
+    print(f'{"stage":28} {"base ms":>10} {"new ms":>10} {"change":>8}  {"base MB":>9} {"new MB":>9} {"change":>8}')
+    for stage in sorted(set(base) | set(new)):
+        if stage not in base or stage not in new:
+            print(f'{stage:28} only in {"base" if stage in base else "new"}')
+            continue
+        line = f'{stage:28}'
+        for metric, scale, min_difference in [('time_median', 1000, min_time), ('peak_memory', 1 / (1024 * 1024), min_memory)]:
+            base_value = base[stage][metric]
+            new_value = new[stage][metric]
+            change = (new_value - base_value) / base_value if base_value else 0.0
+            line += f' {base_value * scale:10.2f} {new_value * scale:10.2f} {change:+8.1%} '
+            if change > threshold and new_value - base_value > min_difference:
+                regressions.append((stage, metric, base_value, new_value))
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares two benchmark result files.')
+    parser.add_argument('base', type=str, help='Result file of the base.')
+    parser.add_argument('new', type=str, help='Result file to compare with the base.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed relative increase of time and memory (default 0.1).')
+    parser.add_argument('--min-time', type=float, default=0.001, help='Ignore time increases below this number of seconds (default 0.001).')
+    parser.add_argument('--min-memory', type=int, default=65536, help='Ignore memory increases below this number of bytes (default 65536).')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f'base: {base["meta"]["commit"]} {base["meta"]["date"]}')
+    print(f'new:  {new["meta"]["commit"]} {new["meta"]["date"]}')
+    # the input sizes have to match, the output path and number of runs do not matter
+    base_arguments = {key: value for key, value in base['meta']['arguments'].items() if key not in ('output', 'repeat')}
+    new_arguments = {key: value for key, value in new['meta']['arguments'].items() if key not in ('output', 'repeat')}
+    if base_arguments != new_arguments:
+        print(f'Warning: different inputs {base_arguments} and {new_arguments}')
+
+    regressions = compare(base['results'], new['results'], args.threshold, args.min_time, args.min_memory)
+    for stage, metric, base_value, new_value in regressions:
+        print(f'Regression: {stage} {metric} {base_value:.6g} -> {new_value:.6g}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Generates synthetic OpenDRIVE and OpenSCENARIO files of configurable size for the benchmarks.
+
+The files are structurally plausible (header, roads with links, plan view and lanes, junctions,
+scenario entities with init actions) but not meant to be semantically valid.
+The generation is deterministic for a seed.
+
+Usage: python benchmarks/generators.py xodr|xosc output_file [--roads N] [--lanes N] [--geometries N] [--entities N] [--seed N]
+"""
+from pathlib import Path
+from lxml import etree
+
+import argparse
+import random
+
+GEOMETRY_TYPES = ['line', 'arc', 'spiral', 'paramPoly3']
+
+
+def _write_geometry(xf: etree.xmlfile, rng: random.Random, s: float, x: float, y: float, hdg: float, length: float, geometry_type: str):
+    with xf.element('geometry', s=f'{s:.4f}', x=f'{x:.4f}', y=f'{y:.4f}', hdg=f'{hdg:.6f}', length=f'{length:.4f}'):
+        if geometry_type == 'line':
+            xf.write(etree.Element('line'))
+        elif geometry_type == 'arc':
+            xf.write(etree.Element('arc', curvature=f'{rng.uniform(-0.05, 0.05):.6f}'))
+        elif geometry_type == 'spiral':
+            xf.write(etree.Element('spiral', curvStart='0.0', curvEnd=f'{rng.uniform(-0.05, 0.05):.6f}'))
+        else:
+            xf.write(etree.Element('paramPoly3', aU='0.0', bU=f'{length:.4f}', cU='0.0', dU='0.0',
+                                   aV='0.0', bV='0.0', cV=f'{rng.uniform(-0.01, 0.01):.6f}', dV='0.0', pRange='normalized'))
+
+
+def _write_lanes(xf: etree.xmlfile, lanes: int):
+    def write_lane(lane_id: int):
+        with xf.element('lane', id=str(lane_id), type='driving' if lane_id else 'none', level='false'):
+            with xf.element('link'):
+                xf.write(etree.Element('predecessor', id=str(lane_id)))
+                xf.write(etree.Element('successor', id=str(lane_id)))
+            if lane_id:
+                xf.write(etree.Element('width', sOffset='0.0', a='3.5', b='0.0', c='0.0', d='0.0'))
+            xf.write(etree.Element('roadMark', sOffset='0.0', type='solid' if abs(lane_id) == lanes else 'broken', weight='standard', color='standard', width='0.12'))
+
+    with xf.element('lanes'):
+        xf.write(etree.Element('laneOffset', s='0.0', a='0.0', b='0.0', c='0.0', d='0.0'))
+        with xf.element('laneSection', s='0.0'):
+            with xf.element('left'):
+                for lane_id in range(lanes, 0, -1):
+                    write_lane(lane_id)
+            with xf.element('center'):
+                write_lane(0)
+            with xf.element('right'):
+                for lane_id in range(-1, -lanes - 1, -1):
+                    write_lane(lane_id)
+
+
+def generate_xodr(file: Path, roads: int = 100, lanes: int = 2, geometries: int = 3, junction_every: int = 10, seed: int = 0):
+    """Writes a synthetic OpenDRIVE 1.7 file.
+
+    Args:
+        file (Path): The output file.
+        roads (int, optional): Number of roads. Defaults to 100.
+        lanes (int, optional): Number of lanes per side and road. Defaults to 2.
+        geometries (int, optional): Number of plan view geometries per road. Defaults to 3.
+        junction_every (int, optional): Every n-th road ends in a junction, 0 for none. Defaults to 10.
+        seed (int, optional): Seed of the random values. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    with etree.xmlfile(str(file), encoding='UTF-8') as xf:
+        xf.write_declaration()
+        with xf.element('OpenDRIVE'):
+            xf.write(etree.Element('header', revMajor='1', revMinor='7', name='synthetic', version='1.0', date='2024-01-01T00:00:00'))
+            junctions = []
+            x = y = 0.0
+            for road_id in range(roads):
+                length = 0.0
+                geometry_lengths = [rng.uniform(5.0, 50.0) for _ in range(geometries)]
+                road_length = sum(geometry_lengths)
+                junction_id = road_id + 100000 if junction_every and road_id % junction_every == junction_every - 1 else None
+                with xf.element('road', name=f'Road {road_id}', length=f'{road_length:.4f}', id=str(road_id), junction='-1'):
+                    with xf.element('link'):
+                        if road_id > 0:
+                            xf.write(etree.Element('predecessor', elementType='road', elementId=str(road_id - 1), contactPoint='end'))
+                        if junction_id is not None:
+                            xf.write(etree.Element('successor', elementType='junction', elementId=str(junction_id)))
+                            junctions.append((junction_id, road_id))
+                        elif road_id < roads - 1:
+                            xf.write(etree.Element('successor', elementType='road', elementId=str(road_id + 1), contactPoint='start'))
+                    with xf.element('type', s='0.0', type='town'):
+                        xf.write(etree.Element('speed', max='50', unit='km/h'))
+                    with xf.element('planView'):
+                        hdg = rng.uniform(-3.14, 3.14)
+                        for index, geometry_length in enumerate(geometry_lengths):
+                            _write_geometry(xf, rng, length, x, y, hdg, geometry_length, GEOMETRY_TYPES[(road_id + index) % len(GEOMETRY_TYPES)])
+                            length += geometry_length
+                            x += geometry_length
+                    with xf.element('elevationProfile'):
+                        xf.write(etree.Element('elevation', s='0.0', a='0.0', b=f'{rng.uniform(-0.02, 0.02):.6f}', c='0.0', d='0.0'))
+                    _write_lanes(xf, lanes)
+                y += 10.0
+            for junction_id, road_id in junctions:
+                with xf.element('junction', id=str(junction_id), name=f'Junction {junction_id}'):
+                    if road_id < roads - 1:
+                        with xf.element('connection', id='0', incomingRoad=str(road_id), connectingRoad=str(road_id + 1), contactPoint='start'):
+                            xf.write(etree.Element('laneLink', **{'from': '-1', 'to': '-1'}))
+
+
+def generate_xosc(file: Path, entities: int = 10, road_network: str = 'synthetic.xodr', seed: int = 0):
+    """Writes a synthetic OpenSCENARIO 1.2 file with one teleport and one speed action per entity.
+
+    Args:
+        file (Path): The output file.
+        entities (int, optional): Number of scenario objects. Defaults to 10.
+        road_network (str, optional): File name of the referenced road network. Defaults to 'synthetic.xodr'.
+        seed (int, optional): Seed of the random values. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    with etree.xmlfile(str(file), encoding='UTF-8') as xf:
+        xf.write_declaration()
+        with xf.element('OpenSCENARIO'):
+            xf.write(etree.Element('FileHeader', revMajor='1', revMinor='2', date='2024-01-01T00:00:00', description='synthetic', author='benchmarks'))
+            xf.write(etree.Element('ParameterDeclarations'))
+            xf.write(etree.Element('CatalogLocations'))
+            with xf.element('RoadNetwork'):
+                xf.write(etree.Element('LogicFile', filepath=road_network))
+            with xf.element('Entities'):
+                for index in range(entities):
+                    with xf.element('ScenarioObject', name=f'Entity{index}'):
+                        with xf.element('Vehicle', name=f'Vehicle{index}', vehicleCategory='car'):
+                            xf.write(etree.Element('ParameterDeclarations'))
+                            xf.write(etree.Element('Performance', maxSpeed='69', maxAcceleration='10', maxDeceleration='10'))
+                            with xf.element('BoundingBox'):
+                                xf.write(etree.Element('Center', x='1.5', y='0.0', z='0.9'))
+                                xf.write(etree.Element('Dimensions', width='2.1', length='4.5', height='1.8'))
+                            with xf.element('Axles'):
+                                xf.write(etree.Element('FrontAxle', maxSteering='0.5', wheelDiameter='0.6', trackWidth='1.8', positionX='3.1', positionZ='0.3'))
+                                xf.write(etree.Element('RearAxle', maxSteering='0.0', wheelDiameter='0.6', trackWidth='1.8', positionX='0.0', positionZ='0.3'))
+                            xf.write(etree.Element('Properties'))
+            with xf.element('Storyboard'):
+                with xf.element('Init'):
+                    with xf.element('Actions'):
+                        for index in range(entities):
+                            with xf.element('Private', entityRef=f'Entity{index}'):
+                                with xf.element('PrivateAction'):
+                                    with xf.element('TeleportAction'):
+                                        with xf.element('Position'):
+                                            xf.write(etree.Element('WorldPosition', x=f'{rng.uniform(0, 1000):.3f}', y=f'{rng.uniform(0, 1000):.3f}', z='0.0', h=f'{rng.uniform(-3.14, 3.14):.4f}'))
+                                with xf.element('PrivateAction'):
+                                    with xf.element('LongitudinalAction'):
+                                        with xf.element('SpeedAction'):
+                                            xf.write(etree.Element('SpeedActionDynamics', dynamicsShape='step', value='0', dynamicsDimension='time'))
+                                            with xf.element('SpeedActionTarget'):
+                                                xf.write(etree.Element('AbsoluteTargetSpeed', value=f'{rng.uniform(5, 30):.2f}'))
+                with xf.element('Story', name='Story'):
+                    with xf.element('Act', name='Act'):
+                        with xf.element('ManeuverGroup', name='ManeuverGroup', maximumExecutionCount='1'):
+                            with xf.element('Actors', selectTriggeringEntities='false'):
+                                for index in range(entities):
+                                    xf.write(etree.Element('EntityRef', entityRef=f'Entity{index}'))
+                xf.write(etree.Element('StopTrigger'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates synthetic OpenDRIVE and OpenSCENARIO files.')
+    parser.add_argument('format', choices=['xodr', 'xosc'], help='Format of the generated file.')
+    parser.add_argument('output', type=str, help='Path of the generated file.')
+    parser.add_argument('--roads', type=int, default=100, help='Number of roads (xodr).')
+    parser.add_argument('--lanes', type=int, default=2, help='Number of lanes per side and road (xodr).')
+    parser.add_argument('--geometries', type=int, default=3, help='Number of geometries per road (xodr).')
+    parser.add_argument('--entities', type=int, default=10, help='Number of entities (xosc).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random values.')
+    args = parser.parse_args()
+
+    if args.format == 'xodr':
+        generate_xodr(Path(args.output), args.roads, args.lanes, args.geometries, seed=args.seed)
+    else:
+        generate_xosc(Path(args.output), args.entities, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
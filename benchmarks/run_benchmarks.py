@@ -0,0 +1,190 @@
+"""Measures time and peak memory of the validation stages on synthetic inputs and writes the results as JSON.
+
+Stages per input format (xodr, xosc):
+- discovery: finding and importing the checker bundles (CheckPlan)
+- validate: parsing the file and running the synthetic checks (run_checks)
+- issue_generation: generating issue_count issues with element locations
+- write_as_xqar, write_as_json, write_as_ndjson, write_as_txt: writing the validated report
+
+Each stage runs --repeat times for the timing, then once more with tracemalloc for the peak memory.
+The first run of discovery includes the imports and is reported as time_first.
+Compare two result files with compare_benchmarks.py.
+
+Usage: python benchmarks/run_benchmarks.py [-o results.json] [--roads N] [--lanes N] [--geometries N] [--entities N] [--issues N] [--repeat N]
+"""
+from pathlib import Path
+from typing import Callable
+
+import argparse
+import datetime
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+FRAMEWORK_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(FRAMEWORK_DIR))
+
+from lxml import etree
+from check_plan import CheckPlan
+from result_report import ResultReport, IssueLevel, create_location_from_element, set_issue_logging
+from validator import run_checks
+from generators import generate_xodr, generate_xosc
+
+SYNTHETIC_CHECKS_DIR = Path(__file__).parent / 'synthetic_checks'
+
+FORMAT_SETTINGS = {
+    'xodr': {'name': 'OpenDRIVE', 'extension': 'xodr', 'shortcut': 'ODR'},
+    'xosc': {'name': 'OpenSCENARIO', 'extension': 'xosc', 'shortcut': 'OSC'}
+}
+
+
+def measure(stage: Callable[[], any], repeat: int) -> dict:
+    """Runs a stage repeat times for the timing and once with tracemalloc for the peak memory.
+
+    Args:
+        stage (Callable[[], any]): The stage, called without arguments.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: time_first, time_min, time_median and time_max in seconds and peak_memory in bytes.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'time_first': times[0],
+        'time_min': min(times),
+        'time_median': statistics.median(times),
+        'time_max': max(times),
+        'peak_memory': peak_memory
+    }
+
+
+def get_synthetic_plan(format_settings: dict) -> CheckPlan:
+    # bypass the plan cache of get_check_plan, discovery is measured
+    plan = CheckPlan(format_settings, [str(SYNTHETIC_CHECKS_DIR)])
+    # checks of a local format folder are not part of the benchmark
+    plan.bundles = [bundle for bundle in plan.bundles if 'synthetic_checks' in bundle.module_name]
+    return plan
+
+
+def gen_issues(root: etree._Element, issue_count: int) -> ResultReport:
+    report = ResultReport()
+    checker = report.gen_checker_bundle('bench bundle', 'Benchmark bundle', '1.0.0').gen_checker('bench_issues', 'Benchmark issues')
+    elements = list(root.iter())
+    for i in range(issue_count):
+        checker.gen_issue(IssueLevel.WARNING, f'Synthetic issue {i}', create_location_from_element(elements[i % len(elements)]))
+    return report
+
+
+def run_format(format_extension: str, file: Path, output_directory: Path, issue_count: int, repeat: int) -> dict:
+    format_settings = FORMAT_SETTINGS[format_extension]
+    config = {'synthetic checks': {'synthetic_issues': {'issue_count': issue_count}}}
+    results = {}
+
+    logging.info(f'{format_extension}: discovery')
+    results['discovery'] = measure(lambda: get_synthetic_plan(format_settings), repeat)
+    plan = get_synthetic_plan(format_settings)
+
+    def validate() -> ResultReport:
+        report = ResultReport()
+        report.checked_file = file
+        if not run_checks(file, report, [str(SYNTHETIC_CHECKS_DIR)], config, format_settings, plan):
+            raise RuntimeError(f'Validation of {file} was cancelled')
+        return report
+
+    logging.info(f'{format_extension}: validate')
+    results['validate'] = measure(validate, repeat)
+
+    logging.info(f'{format_extension}: issue_generation')
+    root = etree.parse(str(file)).getroot()
+    results['issue_generation'] = measure(lambda: gen_issues(root, issue_count), repeat)
+
+    report = validate()
+    results['validate']['issue_count'] = report.get_issues_count()
+    writers = {
+        'write_as_xqar': lambda: report.write_as_xqar(output_directory / f'{file.name}.xqar'),
+        'write_as_json': lambda: report.write_as_json(output_directory / f'{file.name}.json'),
+        'write_as_ndjson': lambda: report.write_as_ndjson(output_directory / f'{file.name}.ndjson'),
+        'write_as_txt': lambda: report.write_as_txt(output_directory / f'{file.name}.txt')
+    }
+    for stage, writer in writers.items():
+        logging.info(f'{format_extension}: {stage}')
+        results[stage] = measure(writer, repeat)
+        results[stage]['output_size'] = (output_directory / f'{file.name}.{stage[len("write_as_"):]}').stat().st_size
+    return results
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=FRAMEWORK_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the validation stages on synthetic inputs.')
+    parser.add_argument('-o', '--output', type=str, default='benchmark_results.json', help='Path of the JSON result file.')
+    parser.add_argument('--roads', type=int, default=2000, help='Number of roads of the OpenDRIVE input.')
+    parser.add_argument('--lanes', type=int, default=2, help='Number of lanes per side and road.')
+    parser.add_argument('--geometries', type=int, default=3, help='Number of geometries per road.')
+    parser.add_argument('--entities', type=int, default=500, help='Number of entities of the OpenSCENARIO input.')
+    parser.add_argument('--issues', type=int, default=20000, help='Number of issues emitted by the synthetic issue check.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per stage.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    set_issue_logging('off')
+
+    results = {}
+    inputs = {}
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        xodr_file = directory / 'synthetic.xodr'
+        generate_xodr(xodr_file, args.roads, args.lanes, args.geometries)
+        xosc_file = directory / 'synthetic.xosc'
+        generate_xosc(xosc_file, args.entities)
+
+        for format_extension, file in [('xodr', xodr_file), ('xosc', xosc_file)]:
+            inputs[format_extension] = {'size': file.stat().st_size}
+            for stage, result in run_format(format_extension, file, directory, args.issues, args.repeat).items():
+                results[f'{format_extension}/{stage}'] = result
+
+    output = {
+        'meta': {
+            'commit': get_commit(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'lxml': '.'.join(str(part) for part in etree.LXML_VERSION),
+            'platform': platform.platform(),
+            'arguments': vars(args),
+            'inputs': inputs
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=4)
+
+    for name, result in results.items():
+        print(f'{name:28} {result["time_median"] * 1000:10.2f} ms {result["peak_memory"] / (1024 * 1024):10.2f} MB')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
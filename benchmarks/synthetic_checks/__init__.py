@@ -0,0 +1,2 @@
+# Synthetic checks of the benchmarks, used as additional check directory (-a benchmarks/synthetic_checks)
+ORDER = ['synthetic_bundle']
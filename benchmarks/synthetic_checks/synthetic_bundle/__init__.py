@@ -0,0 +1,4 @@
+CHECKER_BUNDLE_NAME = 'synthetic checks'
+CHECKER_BUNDLE_DESCRIPTION = 'Synthetic checks measuring the framework overhead'
+CHECKER_BUNDLE_VERSION = '1.0.0'
+ORDER = ['check_traverse', 'check_issues', 'check_stream']
@@ -0,0 +1,24 @@
+from result_report import IssueLevel, create_location_for_road, create_location_from_element
+
+READ_ONLY = True
+
+
+def get_checker_id():
+    return 'synthetic_issues'
+
+
+def get_description():
+    return 'emit issue_count issues (config) on the elements of the tree'
+
+
+def check(checker_data) -> bool:
+    issue_count = checker_data.config.get('issue_count', 1000) if checker_data.config else 1000
+    elements = [el for el in checker_data.root.iter() if isinstance(el.tag, str)]
+    for i in range(issue_count):
+        el = elements[i % len(elements)]
+        if i % 2:
+            locations = create_location_for_road(el, el.get('id', '0'), 0.5, 0.0)
+        else:
+            locations = create_location_from_element(el)
+        checker_data.checker.gen_issue(IssueLevel.WARNING, f'Synthetic issue {i} on {el.tag}', locations)
+    return True
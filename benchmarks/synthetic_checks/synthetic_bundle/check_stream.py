@@ -0,0 +1,22 @@
+from result_report import IssueLevel
+
+
+def get_checker_id():
+    return 'synthetic_stream'
+
+
+def get_description():
+    return 'count geometries and entities with a streaming pass'
+
+
+def count(checker_data, el):
+    checker_data.data[el.tag] = checker_data.data.get(el.tag, 0) + 1
+
+
+STREAM_HANDLERS = {'geometry': count, 'ScenarioObject': count}
+
+
+def check(checker_data) -> bool:
+    for tag, element_count in sorted(checker_data.data.items()):
+        checker_data.checker.gen_issue(IssueLevel.INFORMATION, f'{element_count} {tag} elements')
+    return True
@@ -0,0 +1,19 @@
+from result_report import IssueLevel
+
+READ_ONLY = True
+
+
+def get_checker_id():
+    return 'synthetic_traverse'
+
+
+def get_description():
+    return 'visit all elements and attributes of the tree'
+
+
+def check(checker_data) -> bool:
+    attribute_count = 0
+    for el in checker_data.root.iter():
+        attribute_count += len(el.attrib)
+    checker_data.checker.gen_issue(IssueLevel.INFORMATION, f'{attribute_count} attributes')
+    return True
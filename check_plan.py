@@ -0,0 +1,613 @@
+from result_report import IssueLevel
+from xml_stream import StreamHandler, get_stream_handlers
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+REQUIRED_FUNCTIONS = ['check', 'get_checker_id', 'get_description']
+
+# precompiled check plan of a check folder, see write_manifest
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 2
+
+# keys of the checker or bundle config limiting the reported issues, see Checker.set_issue_limits
+ISSUE_LIMIT_KEYS = ['max_issues', 'aggregate_issues', 'sample_locations']
+
+# keys of the checker or bundle config for the isolated execution, see CheckerWorkerPool
+ISOLATION_KEYS = ['isolate', 'time_limit', 'memory_limit']
+
+
+def get_module_name(path: Path) -> str:
+    """Returns the python module name of a check folder or file relative to the framework folder.
+
+    Args:
+        path (Path): Path of the bundle folder or checker file.
+
+    Returns:
+        str: The module name, e.g. xodr.checks.base_checks.
+    """
+    return os.path.relpath(str(path), Path(__file__).parent).replace('/', '.').replace('.py', '').replace('\\', '.')
+
+
+def get_parent_module() -> str:
+    """Returns the package prefix for checker modules if the framework is imported as a package."""
+    parent_module = __name__
+    if '.' in parent_module:
+        return parent_module[:parent_module.rfind('.') + 1]
+    return ''
+
+
+def sort_by_order(items: Dict[str, any], order: List[str], kind: str) -> List:
+    """Sorts items by the provided order, items not mentioned in the order are appended sorted by name.
+
+    Args:
+        items (Dict[str, any]): Items by name.
+        order (List[str]): Ordered names. Names may be given with or without .py suffix.
+        kind (str): Kind of the items for error messages, e.g. bundle.
+
+    Returns:
+        List: The sorted items.
+    """
+    sorted_items = []
+    assigned = set()
+    for item_order in order:
+        py_name = f'{item_order}.py'
+        if item_order in items:
+            sorted_items.append(items[item_order])
+            assigned.add(item_order)
+        elif py_name in items:
+            sorted_items.append(items[py_name])
+            assigned.add(py_name)
+        else:
+            logging.error(f'Provided {kind} {item_order} is defined in order but cannot be found.')
+    for name in sorted(set(items.keys()) - assigned):
+        sorted_items.append(items[name])
+    return sorted_items
+
+
+def get_bundle(sorted_bundles: List, path: Path):
+    module = __import__(get_module_name(path), fromlist=['ORDER'])
+    order = []
+    if hasattr(module, 'ORDER'):
+        for bundle in module.ORDER:
+            order.append(bundle)
+
+    bundles = [mod for mod in path.iterdir() if mod.is_dir() and mod.name != '__pycache__']
+
+    # sort
+    sorted_bundles.extend(sort_by_order({bundle.name: bundle for bundle in bundles}, order, 'bundle'))
+    return sorted_bundles
+
+
+def get_check_dirs(additional_check_dirs: List[str], format_setting: dict) -> List[Path]:
+    """Returns the check folders of a format: the checks folder of the format folder and the additional check directories."""
+    check_dirs = []
+    # first get bundles from default format folder
+    format_path = Path(__file__).parent / format_setting['extension'] / 'checks'
+    if format_path.is_dir():
+        check_dirs.append(format_path)
+    else:
+        logging.warning(f'Format {format_setting["extension"]} has no checks folder {format_path}')
+
+    # then get bundles from additional folder
+    if additional_check_dirs is not None:
+        for additional_dir in additional_check_dirs:
+            check_dirs.append(Path(additional_dir))
+    return check_dirs
+
+
+def get_sorted_checker_bundles(additional_check_dirs: List[str], format_setting: dict) -> List:
+    bundle_order = []
+    for check_dir in get_check_dirs(additional_check_dirs, format_setting):
+        bundle_order = get_bundle(bundle_order, check_dir)
+    return bundle_order
+
+
+def get_file_hash(path: Path) -> str:
+    """Returns the sha256 hex digest of a source file."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class PlannedChecker:
+    """A checker module of a check plan.
+
+    Checkers planned from a manifest are described by their manifest entry and imported on first use,
+    so checkers which do not run (e.g. for a cached result) are never imported.
+    """
+
+    module_name: str
+    source_file: str
+    checker_id: str
+    description: str
+    requires: List[str]
+    read_only: bool
+    streaming: bool
+    dependencies: List['PlannedChecker']
+
+    def __init__(self, module: any, module_name: str, declaration: dict = None, source_file: str = None) -> None:
+        """Constructs a PlannedChecker object.
+
+        Args:
+            module (any): The imported checker module or None to import it on first use.
+            module_name (str): Name of the checker module.
+            declaration (dict, optional): Manifest entry of the checker if module is None. Defaults to None.
+            source_file (str, optional): Path of the checker file if module is None. Defaults to None.
+        """
+        self.module_name = module_name
+        self.dependencies = []
+        self._module = module
+        if module is None:
+            self.source_file = source_file
+            self._source_hash = declaration['sha256']
+            self.checker_id = declaration['checker_id']
+            self.description = declaration['description']
+            self.requires = list(declaration['requires'])
+            self.read_only = declaration['read_only']
+            self.streaming = bool(declaration['stream_handlers'])
+            self._stream_handlers = None
+            return
+        self.source_file = getattr(module, '__file__', None)
+        self._source_hash = None
+        self.checker_id = module.get_checker_id()
+        self.description = module.get_description()
+        # optional declarations for the concurrent execution, see README
+        self.requires = list(getattr(module, 'REQUIRES', []))
+        self.read_only = bool(getattr(module, 'READ_ONLY', False))
+        # optional handlers for the single streaming pass over the file, see xml_stream
+        self._stream_handlers = get_stream_handlers(module)
+        self.streaming = bool(self._stream_handlers)
+
+    @property
+    def module(self) -> any:
+        """The checker module, imported on first use."""
+        if self._module is None:
+            logging.debug(f'Loading checker {{{self.module_name}}}')
+            self._module = __import__(self.module_name, fromlist=REQUIRED_FUNCTIONS)
+        return self._module
+
+    @property
+    def stream_handlers(self) -> Dict[str, StreamHandler]:
+        """Handlers of the streaming pass by tag or path, empty if the checker does not stream."""
+        if self._stream_handlers is None:
+            self._stream_handlers = get_stream_handlers(self.module)
+        return self._stream_handlers
+
+    def get_source_hash(self) -> str:
+        """Returns the sha256 hex digest of the checker file or None if the module has no file."""
+        if self._source_hash is None and self.source_file is not None:
+            self._source_hash = get_file_hash(self.source_file)
+        return self._source_hash
+
+    def get_declaration(self) -> dict:
+        """Returns the manifest entry of the checker, see write_manifest."""
+        return {
+            'checker_id': self.checker_id,
+            'description': self.description,
+            'read_only': self.read_only,
+            'requires': self.requires,
+            'sha256': self.get_source_hash(),
+            'stream_handlers': sorted(self.stream_handlers)
+        }
+
+    def get_short_name(self) -> str:
+        """Returns the name of the checker module without package, e.g. check_xml_valid."""
+        return self.module_name[self.module_name.rfind('.') + 1:]
+
+    def execute(self, checker_data, profiler=None, bundle_name: str = None) -> bool:
+        """Executes the check of this checker for the checker of checker_data.
+        An exception of the check is reported as error issue of the checker.
+
+        Args:
+            checker_data (CheckerData): The checker data with the checker of the result report.
+            profiler (CheckProfiler, optional): Profiler measuring the check. Defaults to None.
+            bundle_name (str, optional): Name of the bundle for the profiler. Defaults to None.
+
+        Returns:
+            bool: False if the check requests to cancel all further checks of the file.
+        """
+        measure = profiler.measure(bundle_name, checker_data.checker) if profiler is not None else nullcontext()
+        with measure:
+            try:
+                success = self.module.check(checker_data)
+                if success is False: # not exist or readable or critcal check issue
+                    logging.exception(f'Cancel checks for the file {self.checker_id}')
+                    return False
+            except:
+                logging.exception(f'Could not {self.checker_id}')
+                checker_data.checker.gen_issue(IssueLevel.ERROR, f'Could not {self.description}')
+        checker_data.checker.log_summary()
+        return True
+
+
+class PlannedBundle:
+    """A checker bundle of a check plan with its checkers in execution order."""
+
+    module_name: str
+    source_file: str
+    name: str
+    description: str
+    version: str
+    checkers: List[PlannedChecker]
+
+    def __init__(self, module: any, module_name: str, declaration: dict = None, source_file: str = None) -> None:
+        """Constructs a PlannedBundle object.
+
+        Args:
+            module (any): The imported bundle module or None if the bundle is planned from a manifest.
+            module_name (str): Name of the bundle module.
+            declaration (dict, optional): Manifest entry of the bundle if module is None. Defaults to None.
+            source_file (str, optional): Path of the __init__.py of the bundle if module is None. Defaults to None.
+        """
+        self.module_name = module_name
+        self.checkers = []
+        if module is None:
+            self.source_file = source_file
+            self._source_hash = declaration['sha256']
+            self.name = declaration['name']
+            self.description = declaration['description']
+            self.version = declaration['version']
+            return
+        self.source_file = getattr(module, '__file__', None)
+        self._source_hash = None
+        self.name = module.CHECKER_BUNDLE_NAME
+        self.description = module.CHECKER_BUNDLE_DESCRIPTION
+        self.version = module.CHECKER_BUNDLE_VERSION
+
+    def get_source_hash(self) -> str:
+        """Returns the sha256 hex digest of the __init__.py of the bundle or None if the module has no file."""
+        if self._source_hash is None and self.source_file is not None:
+            self._source_hash = get_file_hash(self.source_file)
+        return self._source_hash
+
+    def get_checker_config(self, config: dict, checker: PlannedChecker) -> dict:
+        """Returns the config of a checker of this bundle.
+
+        Args:
+            config (dict): The loaded config file.
+            checker (PlannedChecker): The checker.
+
+        Returns:
+            dict: The checker config or None if the config has no entry for the checker.
+        """
+        bundle_config = config.get(self.name)
+        if bundle_config is not None and checker.checker_id in bundle_config:
+            return bundle_config[checker.checker_id]
+        return None
+
+    def get_issue_limits(self, config: dict, checker: PlannedChecker) -> dict:
+        """Returns the issue limits of a checker of this bundle, see Checker.set_issue_limits.
+
+        The limits (ISSUE_LIMIT_KEYS) are read from the checker config and default to the limits of the bundle config.
+
+        Args:
+            config (dict): The loaded config file.
+            checker (PlannedChecker): The checker.
+
+        Returns:
+            dict: The limits as keyword arguments of Checker.set_issue_limits, empty if the checker is not limited.
+        """
+        return self._get_settings(config, checker, ISSUE_LIMIT_KEYS)
+
+    def get_isolation_settings(self, config: dict, checker: PlannedChecker) -> dict:
+        """Returns the settings of the isolated execution of a checker of this bundle (ISOLATION_KEYS), see CheckerWorkerPool.
+
+        Args:
+            config (dict): The loaded config file.
+            checker (PlannedChecker): The checker.
+
+        Returns:
+            dict: isolate, time_limit (s) and memory_limit (MB) if set in the checker or bundle config.
+        """
+        return self._get_settings(config, checker, ISOLATION_KEYS)
+
+    def _get_settings(self, config: dict, checker: PlannedChecker, keys: List[str]) -> dict:
+        # checker config first, then bundle config
+        bundle_config = config.get(self.name)
+        if not isinstance(bundle_config, dict):
+            return {}
+        checker_config = bundle_config.get(checker.checker_id)
+        if not isinstance(checker_config, dict):
+            checker_config = {}
+        settings = {}
+        for key in keys:
+            value = checker_config.get(key, bundle_config.get(key))
+            if value is not None:
+                settings[key] = value
+        return settings
+
+
+class CheckPlan:
+    """Discovered, sorted and imported checker bundles of a format.
+
+    A plan is built once per format and additional check directories and can be reused for all files of a batch.
+    """
+
+    format_settings: dict
+    additional_check_dirs: List[str]
+    bundles: List[PlannedBundle]
+
+    def __init__(self, format_settings: dict, additional_check_dirs: List[str] = None) -> None:
+        """Constructs a CheckPlan object by discovering and loading all checker modules.
+
+        Args:
+            format_settings (dict): Settings of the format (format.json).
+            additional_check_dirs (List[str], optional): Additional directories for validation checks. Defaults to None.
+        """
+        self.format_settings = format_settings
+        self.additional_check_dirs = additional_check_dirs
+        self.bundles = []
+        self._fingerprint = None
+
+        parent_module = get_parent_module()
+        for check_dir in get_check_dirs(additional_check_dirs, format_settings):
+            manifest = load_manifest(check_dir)
+            if manifest is not None:
+                # no discovery and no imports, the checkers are imported when they run
+                self.bundles.extend(get_manifest_bundles(manifest, check_dir, parent_module))
+                continue
+            check_bundles = get_bundle([], check_dir)
+            logging.debug(f'Found {len(check_bundles)} checker modules in {check_dir}')
+            for check_bundle in check_bundles:
+                try:
+                    bundle = load_bundle(check_bundle, parent_module)
+                except:
+                    logging.exception(f'Could not load checker bundle {check_bundle}')
+                    continue
+                self.bundles.append(bundle)
+        self._resolve_dependencies()
+
+    def get_checkers(self) -> List[Tuple[PlannedBundle, PlannedChecker]]:
+        """Returns all checkers with their bundles in execution order."""
+        return [(bundle, checker) for bundle in self.bundles for checker in bundle.checkers]
+
+    def _resolve_dependencies(self):
+        # REQUIRES may name the checker module (check_xml_valid) or the checker id
+        checkers = {}
+        for _, checker in self.get_checkers():
+            checkers.setdefault(checker.get_short_name(), checker)
+            checkers.setdefault(checker.checker_id, checker)
+        for _, checker in self.get_checkers():
+            for required in checker.requires:
+                dependency = checkers.get(required)
+                if dependency is None:
+                    logging.error(f'Required checker {required} of {checker.module_name} cannot be found.')
+                elif dependency is not checker:
+                    checker.dependencies.append(dependency)
+
+    def get_fingerprint(self) -> str:
+        """Returns a hash of the loaded bundle and checker modules (path, source and bundle version).
+        The fingerprint changes if a checker is added, removed or modified.
+
+        Returns:
+            str: The fingerprint as hex digest.
+        """
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            for bundle in self.bundles:
+                _update_module_hash(h, bundle)
+                h.update(f'{bundle.version}\n'.encode())
+                for checker in bundle.checkers:
+                    _update_module_hash(h, checker)
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+
+def load_bundle(check_bundle: Path, parent_module: str) -> PlannedBundle:
+    """Imports a checker bundle folder and its checker modules.
+
+    Args:
+        check_bundle (Path): The bundle folder.
+        parent_module (str): Package prefix of the modules, see get_parent_module.
+
+    Returns:
+        PlannedBundle: The bundle with the checkers in bundle order.
+    """
+    bundle_name = parent_module + get_module_name(check_bundle)
+    logging.debug(f'Loading checker bundle {{{bundle_name}}}')
+    bundle_module = __import__(bundle_name, fromlist=['CHECKER_BUNDLE_NAME', 'CHECKER_BUNDLE_DESCRIPTION', 'CHECKER_BUNDLE_VERSION', 'ORDER'])
+    bundle = PlannedBundle(bundle_module, bundle_name)
+
+    # get all checker python files and sort them according to bundle order
+    checkers = [checker for checker in check_bundle.iterdir() if checker.name.endswith('.py') and checker.name != '__init__.py' and checker.name.startswith('check_')]
+    checker_names = {checker.name: checker for checker in checkers}
+    if hasattr(bundle_module, 'ORDER'):
+        checkers = sort_by_order(checker_names, bundle_module.ORDER, 'checker')
+    else:
+        checkers = [checker_names[name] for name in sorted(checker_names)]
+
+    # load checks
+    for checker in checkers:
+        module_name = parent_module + get_module_name(checker)
+        logging.debug(f'Loading checker {{{module_name}}}')
+        try:
+            check_module = __import__(module_name, fromlist=REQUIRED_FUNCTIONS)
+        except:
+            logging.exception(f'Could not load checker bundle {module_name}')
+            continue
+
+        # check required functions
+        missing_function = [function for function in REQUIRED_FUNCTIONS if not hasattr(check_module, function)]
+        if missing_function:
+            logging.error(f'{module_name} has no requried function {missing_function[0]}')
+            continue
+
+        try:
+            bundle.checkers.append(PlannedChecker(check_module, module_name))
+        except:
+            logging.exception(f'Could not load checker {module_name}')
+    return bundle
+
+
+def _update_module_hash(h, planned: Union[PlannedBundle, PlannedChecker]):
+    h.update(f'{planned.module_name}:{planned.source_file}\n'.encode())
+    if planned.source_file is not None:
+        h.update(bytes.fromhex(planned.get_source_hash()))
+
+
+def _get_relative_file(check_dir: Path, file: str) -> str:
+    return Path(os.path.relpath(file, check_dir)).as_posix()
+
+
+def get_check_listing(check_dir: Path) -> Dict[str, List[str]]:
+    """Lists the bundle folders of a check folder and their checker files without importing them.
+
+    Args:
+        check_dir (Path): The check folder.
+
+    Returns:
+        Dict[str, List[str]]: The sorted checker file names (check_*.py) by bundle folder name.
+    """
+    listing = {}
+    for bundle_dir in check_dir.iterdir():
+        if bundle_dir.is_dir() and bundle_dir.name != '__pycache__':
+            listing[bundle_dir.name] = sorted(file.name for file in bundle_dir.iterdir()
+                                              if file.name.startswith('check_') and file.name.endswith('.py'))
+    return dict(sorted(listing.items()))
+
+
+def build_manifest(check_dir: Path) -> dict:
+    """Discovers and imports the bundles and checkers of a check folder and returns their manifest.
+
+    Args:
+        check_dir (Path): The check folder, e.g. xodr/checks or an additional check directory.
+
+    Returns:
+        dict: The manifest with the bundles in execution order, their checkers in bundle order and the source hashes.
+    """
+    parent_module = get_parent_module()
+    root_file = check_dir / '__init__.py'
+    manifest = {
+        'manifest_version': MANIFEST_VERSION,
+        'root': {'file': '__init__.py', 'sha256': get_file_hash(root_file)} if root_file.is_file() else None,
+        # compared with the folder, so added bundles and checkers are discovered
+        'listing': get_check_listing(check_dir),
+        'bundles': []
+    }
+    for check_bundle in get_bundle([], check_dir):
+        bundle = load_bundle(check_bundle, parent_module)
+        manifest['bundles'].append({
+            'module': bundle.module_name[len(parent_module):],
+            'file': _get_relative_file(check_dir, bundle.source_file),
+            'sha256': bundle.get_source_hash(),
+            'name': bundle.name,
+            'description': bundle.description,
+            'version': bundle.version,
+            'checkers': [dict(module=checker.module_name[len(parent_module):], file=_get_relative_file(check_dir, checker.source_file), **checker.get_declaration())
+                         for checker in bundle.checkers]
+        })
+    return manifest
+
+
+def write_manifest(check_dir: Path) -> Path:
+    """Writes the manifest of a check folder (MANIFEST_FILE in the folder), so the check plan is built without
+    discovering the bundles and without importing the checkers. Added, changed or removed checks are detected
+    (folder listing and source hashes) and discovered again until the manifest is written again.
+
+    Args:
+        check_dir (Path): The check folder.
+
+    Returns:
+        Path: The written manifest file.
+    """
+    manifest = build_manifest(check_dir)
+    manifest_file = check_dir / MANIFEST_FILE
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return manifest_file
+
+
+def load_manifest(check_dir: Path) -> dict:
+    """Returns the manifest of a check folder if it is up to date.
+
+    Args:
+        check_dir (Path): The check folder.
+
+    Returns:
+        dict: The manifest or None if the folder has no manifest, a listed file changed or was removed
+            or a bundle folder or checker file was added.
+    """
+    manifest_file = check_dir / MANIFEST_FILE
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f'Could not read manifest {manifest_file}: {e}')
+        return None
+    if manifest.get('manifest_version') != MANIFEST_VERSION:
+        logging.warning(f'Manifest {manifest_file} has another version, discovering the checks')
+        return None
+    try:
+        listing = get_check_listing(check_dir)
+    except OSError:
+        listing = None
+    if listing != manifest['listing']:
+        logging.warning(f'Manifest {manifest_file} is outdated (checks added or removed), discovering the checks')
+        return None
+    files = [manifest['root']] if manifest['root'] is not None else []
+    for bundle in manifest['bundles']:
+        files.append(bundle)
+        files.extend(bundle['checkers'])
+    for entry in files:
+        try:
+            outdated = get_file_hash(check_dir / entry['file']) != entry['sha256']
+        except OSError:
+            outdated = True
+        if outdated:
+            logging.warning(f'Manifest {manifest_file} is outdated ({entry["file"]}), discovering the checks')
+            return None
+    return manifest
+
+
+def get_manifest_bundles(manifest: dict, check_dir: Path, parent_module: str) -> List[PlannedBundle]:
+    """Returns the bundles of a manifest with checkers which are imported on first use.
+
+    Args:
+        manifest (dict): The manifest of load_manifest.
+        check_dir (Path): The check folder of the manifest.
+        parent_module (str): Package prefix of the modules, see get_parent_module.
+
+    Returns:
+        List[PlannedBundle]: The bundles in execution order.
+    """
+    bundles = []
+    for entry in manifest['bundles']:
+        bundle = PlannedBundle(None, parent_module + entry['module'], entry, os.path.abspath(check_dir / entry['file']))
+        for checker_entry in entry['checkers']:
+            bundle.checkers.append(PlannedChecker(None, parent_module + checker_entry['module'], checker_entry, os.path.abspath(check_dir / checker_entry['file'])))
+        bundles.append(bundle)
+    return bundles
+
+
+_check_plans: Dict[Tuple[str, Tuple[str, ...]], CheckPlan] = {}
+_check_plans_lock = threading.Lock()
+
+
+def get_check_plan(format_settings: dict, additional_check_dirs: List[str] = None) -> CheckPlan:
+    """Returns the check plan for a format and additional check directories.
+    The plan is built on first request and reused afterwards.
+
+    Args:
+        format_settings (dict): Settings of the format (format.json).
+        additional_check_dirs (List[str], optional): Additional directories for validation checks. Defaults to None.
+
+    Returns:
+        CheckPlan: The check plan.
+    """
+    key = (format_settings['extension'], tuple(additional_check_dirs or ()))
+    # the server threads and the pipeline request plans concurrently, a plan is built only once
+    with _check_plans_lock:
+        plan = _check_plans.get(key)
+        if plan is None:
+            plan = CheckPlan(format_settings, additional_check_dirs)
+            _check_plans[key] = plan
+        return plan
@@ -0,0 +1,158 @@
+from result_report import Checker
+from check_plan import PlannedBundle, PlannedChecker
+from checker_data import CheckerData
+from typing import List, Set
+
+import copy
+import logging
+
+
+class CheckTask:
+    """A checker of the check plan scheduled for one file."""
+
+    index: int
+    bundle: PlannedBundle
+    checker: PlannedChecker
+    report_checker: Checker
+    config: dict
+    dependencies: Set[int]
+    isolation: dict
+
+    def __init__(self, index: int, bundle: PlannedBundle, checker: PlannedChecker, report_checker: Checker, config: dict) -> None:
+        """Constructs a CheckTask object.
+
+        Args:
+            index (int): Position of the checker in the check plan.
+            bundle (PlannedBundle): Bundle of the checker.
+            checker (PlannedChecker): The checker.
+            report_checker (Checker): Checker of the result report the issues are generated for.
+            config (dict): Config of the checker or None.
+        """
+        self.index = index
+        self.bundle = bundle
+        self.checker = checker
+        self.report_checker = report_checker
+        self.config = config
+        self.dependencies = set()
+        # settings of the execution in a worker process or None to run in the validating process, see CheckerWorkerPool
+        self.isolation = None
+
+
+def set_dependencies(tasks: List[CheckTask]):
+    """Sets the dependencies of the tasks to the indices of the tasks of the checkers in their REQUIRES.
+    Required checkers which are not part of the tasks are ignored.
+    """
+    by_checker = {id(task.checker): task for task in tasks}
+    for task in tasks:
+        task.dependencies = {by_checker[id(dependency)].index for dependency in task.checker.dependencies if id(dependency) in by_checker}
+
+
+def sort_by_dependencies(tasks: List[CheckTask]) -> List[CheckTask]:
+    """Returns the tasks in plan order for the sequential execution, except that a task runs after the tasks it requires.
+
+    Args:
+        tasks (List[CheckTask]): The checks in plan order.
+
+    Returns:
+        List[CheckTask]: The checks in execution order.
+    """
+    set_dependencies(tasks)
+    pending = list(tasks)
+    finished = set()
+    ordered = []
+    while pending:
+        position = next((position for position, task in enumerate(pending) if task.dependencies <= finished), None)
+        if position is None:
+            # a cycle, like in the concurrent execution the first checker runs without its dependencies
+            position = 0
+            logging.error(f'Dependencies of {pending[0].checker.module_name} cannot be fulfilled, running it without them.')
+        task = pending.pop(position)
+        finished.add(task.index)
+        ordered.append(task)
+    return ordered
+
+
+def _is_ready(task: CheckTask, position: int, pending: List[CheckTask], finished: Set[int], running_exclusive: bool, running_count: int) -> bool:
+    if not task.dependencies <= finished:
+        return False
+    if running_exclusive:
+        return False
+    # checkers that modify the checker data run alone and in plan order
+    if not task.checker.read_only:
+        return position == 0 and running_count == 0
+    return all(earlier.checker.read_only for earlier in pending[:position])
+
+
+def run_tasks_concurrently(checker_data: CheckerData, tasks: List[CheckTask], threads: int, profiler=None, worker_pool=None) -> bool:
+    """Executes the checks of a file on a thread pool.
+
+    Checkers declaring READ_ONLY = True run concurrently once the checkers in their REQUIRES are finished.
+    All other checkers run alone on the shared checker data in plan order, after all checkers before them finished,
+    like in the sequential execution. If a check returns False no further checks are started and False is returned.
+    Issues are collected per checker, so the report is independent of the execution order.
+
+    Args:
+        checker_data (CheckerData): Checker data shared by all checks of the file.
+        tasks (List[CheckTask]): The checks in plan order.
+        threads (int): Number of threads.
+        profiler (CheckProfiler, optional): Profiler measuring the checks, not in memory mode (see run_tasks). Defaults to None.
+        worker_pool (CheckerWorkerPool, optional): Pool executing the tasks with isolation settings. Defaults to None.
+
+    Returns:
+        bool: False if a check cancelled the validation of the file.
+    """
+    # only needed with checker threads, not imported at start
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    set_dependencies(tasks)
+
+    def execute(task: CheckTask) -> bool:
+        if task.checker.read_only:
+            # own view on the shared document, so concurrent checkers do not overwrite checker and config
+            data = copy.copy(checker_data)
+            data.config = task.config if task.config is not None else checker_data.config
+        else:
+            data = checker_data
+            if task.config is not None:
+                data.config = task.config
+        data.checker = task.report_checker
+        logging.debug(f'Running checker {{{task.checker.module_name}}}')
+        if task.isolation is not None:
+            return worker_pool.execute(task, data, profiler)
+        return task.checker.execute(data, profiler, task.bundle.name)
+
+    pending = list(tasks)
+    finished = set()
+    running = {}
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while pending or running:
+            if not cancelled:
+                running_exclusive = any(not task.checker.read_only for task in running.values())
+                position = 0
+                while position < len(pending):
+                    task = pending[position]
+                    if len(running) < threads and _is_ready(task, position, pending, finished, running_exclusive, len(running)):
+                        pending.pop(position)
+                        running[executor.submit(execute, task)] = task
+                        running_exclusive = running_exclusive or not task.checker.read_only
+                    else:
+                        position += 1
+
+                if not running and pending:
+                    # dependencies cannot be fulfilled (cycle or dependency on a later modifying checker)
+                    task = pending.pop(0)
+                    logging.error(f'Dependencies of {task.checker.module_name} cannot be fulfilled, running it without them.')
+                    running[executor.submit(execute, task)] = task
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                finished.add(task.index)
+                if future.result() is False:
+                    cancelled = True
+            if cancelled:
+                pending = []
+    return not cancelled
@@ -1,8 +1,13 @@
 from dataclasses import dataclass
 from result_report import Checker, ResultReport
+from xml_document import XmlDocument, XmlIndex
+from reference_index import ReferenceIndex
+from schema_registry import CompiledSchema, get_schema_registry
+from document_cache import DocumentCache, get_document_cache
+from input_source import InputSource, resolve_reference
 from pathlib import Path
 from lxml import etree
-from typing import Tuple
+from typing import Tuple, Union
 
 @dataclass
 class CheckerData:
@@ -12,22 +17,92 @@ class CheckerData:
     file: Path
     config: dict
     format_settings: dict
-    version: Tuple[int, int]
+    document: XmlDocument
+    document_cache: DocumentCache
+    referenced_documents: list
 
-    def __init__(self, 
+    def __init__(self,
                 file : Path,
-                reporter: ResultReport, 
-                config : dict, 
+                reporter: ResultReport,
+                config : dict,
                 format_settings : dict,
-                checker: Checker = None, 
-                data : any = None, 
-                version: Tuple[int, int] = None) -> None:
+                checker: Checker = None,
+                data : any = None,
+                version: Tuple[int, int] = None,
+                document: XmlDocument = None,
+                document_cache: DocumentCache = None) -> None:
 
         super().__init__()
         self.file = file
-        self.reporter = reporter        
+        self.reporter = reporter
         self.config = config
         self.format_settings = format_settings
         self.checker = checker
         self.data = data
-        self.version = version
+        self.document = document if document is not None else XmlDocument(file)
+        self.document_cache = document_cache
+        # references loaded by the checkers, shared by the copies of the checker data, see ResultCache
+        self.referenced_documents = []
+        self._version = version
+
+    @property
+    def tree(self) -> etree._ElementTree:
+        """The parsed input file, shared by all checkers. Raises the parse error if the file is not loadable."""
+        return self.document.tree
+
+    @property
+    def root(self) -> etree._Element:
+        """The root element of the parsed input file."""
+        return self.document.root
+
+    @property
+    def index(self) -> XmlIndex:
+        """Index of the elements of the input file by tag and id."""
+        return self.document.index
+
+    @property
+    def road_network(self) -> 'RoadNetwork':
+        """NumPy view of the roads of the input file (OpenDRIVE), built on first use and shared by all checkers."""
+        return self.document.road_network
+
+    @property
+    def references(self) -> ReferenceIndex:
+        """Index of the ids and references of the input file for its format, built on first use and shared by all checkers."""
+        return self.document.get_reference_index(self.format_settings['extension'])
+
+    @property
+    def schema(self) -> CompiledSchema:
+        """Compiled schema of the format and version of the input file, shared by all files of the process.
+        None if the format has no schema for the version. Raises the compile error if the schema cannot be compiled."""
+        return get_schema_registry().get(self.format_settings, self.version)
+
+    def get_referenced_document(self, reference: Union[str, Path, InputSource]) -> XmlDocument:
+        """Returns a document referenced by the input file, e.g. the road network (LogicFile) of a scenario.
+        The document is parsed once per batch and shared with the other files referencing it, see DocumentCache.
+
+        Args:
+            reference (Union[str, Path, InputSource]): Path relative to the folder of the input file (or its archive), an absolute path or a source.
+
+        Returns:
+            XmlDocument: The document, its tree, root, index, references and road_network can be used like the ones of the input file.
+                Accessing its tree raises the parse error if the file is not loadable.
+        """
+        self.referenced_documents.append(reference)
+        if not isinstance(reference, InputSource):
+            reference = resolve_reference(self.file, str(reference))
+        document_cache = self.document_cache if self.document_cache is not None else get_document_cache()
+        return document_cache.get(reference)
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        """The version of the input file. Detected from the header if not set by a checker."""
+        if self._version is None:
+            try:
+                self._version = self.document.version
+            except (etree.XMLSyntaxError, OSError):
+                return None
+        return self._version
+
+    @version.setter
+    def version(self, version: Tuple[int, int]):
+        self._version = version
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from input_source import InputSource, as_source
+from xml_document import XmlDocument
+from pathlib import Path
+from typing import Dict, Union
+from lxml import etree
+
+import logging
+import threading
+
+DEFAULT_DOCUMENT_CACHE_SIZE = 1024 * 1024 * 1024
+
+# memory of a parsed lxml tree relative to the size of the file, measured for OpenDRIVE and OpenSCENARIO files
+TREE_SIZE_FACTOR = 16
+
+
+class DocumentCache:
+    """Parsed documents referenced by the validated files, e.g. the road networks of scenarios.
+
+    A referenced document is parsed once and shared by all files of a batch (of a worker process) and all threads,
+    together with its derived indexes (index, references, road_network). Documents are identified by their path
+    and modification time, so a changed file is parsed again. If the estimated memory of the parsed documents
+    grows above the maximal size, the least recently used documents are dropped.
+    """
+
+    max_memory: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_memory: int = DEFAULT_DOCUMENT_CACHE_SIZE) -> None:
+        """Constructs a DocumentCache object.
+
+        Args:
+            max_memory (int, optional): Maximal estimated memory of the parsed documents in bytes. Defaults to DEFAULT_DOCUMENT_CACHE_SIZE.
+        """
+        self.max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, file: Union[Path, InputSource]) -> XmlDocument:
+        """Returns the parsed document of a file.
+
+        Args:
+            file (Union[Path, InputSource]): The file or archive member.
+
+        Returns:
+            XmlDocument: The document, parsed once. Accessing its tree raises the parse error if the file is not loadable.
+        """
+        source = as_source(file)
+        try:
+            key = source.get_key() + (source.get_stamp(),)
+            memory = source.get_size() * TREE_SIZE_FACTOR
+        except (OSError, NotImplementedError):
+            # not cacheable or not existing, the document raises the error on access
+            return XmlDocument(file)
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # only threads waiting for the same document are blocked while it is parsed
+        with load_lock:
+            with self._lock:
+                entry = self._documents.get(key)
+                if entry is not None:
+                    self._documents.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+
+            document = XmlDocument(file)
+            try:
+                document.tree
+            except (etree.XMLSyntaxError, OSError):
+                memory = 0  # the error is kept by the document and cached as well
+            logging.debug(f'Loaded referenced document {source}')
+
+            with self._lock:
+                self._documents[key] = (document, memory)
+                self._memory += memory
+                self._evict(key)
+                del self._load_locks[key]
+        return document
+
+    def _evict(self, keep: tuple):
+        # documents still used by a checker stay alive until it finishes, they are only dropped from the cache
+        while self._memory > self.max_memory and len(self._documents) > 1:
+            key, (document, memory) = next(iter(self._documents.items()))
+            if key == keep:
+                break
+            del self._documents[key]
+            self._memory -= memory
+            logging.debug(f'Evicted referenced document {document.file}')
+
+    def clear(self):
+        """Drops all cached documents."""
+        with self._lock:
+            self._documents.clear()
+            self._memory = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """Returns the number of cached documents, their estimated memory in bytes, hits and misses."""
+        with self._lock:
+            return {'documents': len(self._documents), 'memory': self._memory, 'hits': self.hits, 'misses': self.misses}
+
+
+_document_caches: Dict[int, DocumentCache] = {}
+_document_caches_lock = threading.Lock()
+
+
+def get_document_cache(max_memory: int = DEFAULT_DOCUMENT_CACHE_SIZE) -> DocumentCache:
+    """Returns the document cache of this process for a maximal size, shared by all files validated by the process.
+
+    Args:
+        max_memory (int, optional): Maximal estimated memory of the parsed documents in bytes. Defaults to DEFAULT_DOCUMENT_CACHE_SIZE.
+
+    Returns:
+        DocumentCache: The cache.
+    """
+    with _document_caches_lock:
+        cache = _document_caches.get(max_memory)
+        if cache is None:
+            cache = DocumentCache(max_memory)
+            _document_caches[max_memory] = cache
+        return cache
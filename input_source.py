@@ -0,0 +1,456 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator, List, Union
+from lxml import etree
+
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import threading
+
+ARCHIVE_SUFFIXES = ['.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz']
+
+# open archives per thread, so the members of an archive are read without opening it again
+MAX_OPEN_ARCHIVES = 4
+_open_archives = threading.local()
+
+# tar members up to this size are read into memory, larger members are spooled to a temporary file
+MAX_MEMORY_MEMBER_SIZE = 64 * 1024 * 1024
+
+
+class InputSource(ABC):
+    """Content of an input file: a plain file, a member of an archive or a buffer in memory.
+
+    Archive members and buffers are parsed directly from the stream returned by open() without a temporary file.
+    path is used for the format detection, the report name and the checked file in the report.
+    """
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        """Constructs a InputSource object.
+
+        Args:
+            path (Path): Path of the content, e.g. archive.zip/folder/file.xodr.
+        """
+        self.path = Path(path)
+
+    @property
+    def name(self) -> str:
+        """File name of the content."""
+        return self.path.name
+
+    @property
+    def suffix(self) -> str:
+        """File extension of the content including the dot."""
+        return self.path.suffix
+
+    @property
+    def report_name(self) -> Path:
+        """Path of the report relative to the output directory without the extension of the output type."""
+        return Path(self.name)
+
+    def get_key(self) -> tuple:
+        """Returns a key identifying the content for the duplicate detection of get_files."""
+        return (str(self.path),)
+
+    def get_stamp(self) -> tuple:
+        """Returns a stamp changing with the content (e.g. modification time) or None if it is unknown.
+
+        Raises:
+            OSError: If the content does not exist.
+        """
+        return None
+
+    @abstractmethod
+    def get_size(self) -> int:
+        """Returns the size of the content in bytes.
+
+        Raises:
+            OSError: If the content does not exist.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def open(self) -> BinaryIO:
+        """Returns a binary stream of the content, closed by the caller."""
+        raise NotImplementedError()
+
+    def parse(self) -> etree._ElementTree:
+        """Parses the content.
+
+        Raises:
+            etree.XMLSyntaxError, OSError: If the content cannot be read or parsed.
+        """
+        with self.open() as f:
+            return etree.parse(f, base_url=str(self.path))
+
+    def iterparse(self, **kwargs) -> Iterator:
+        """Parses the content incrementally, see etree.iterparse."""
+        with self.open() as f:
+            yield from etree.iterparse(f, **kwargs)
+
+    def get_digest(self) -> str:
+        """Returns the sha256 hex digest of the content."""
+        h = hashlib.sha256()
+        with self.open() as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({str(self.path)!r})'
+
+
+class FileSource(InputSource):
+    """Plain file on disk, parsed by libxml2 from its path."""
+
+    def open(self) -> BinaryIO:
+        return open(self.path, 'rb')
+
+    def parse(self) -> etree._ElementTree:
+        return etree.parse(str(self.path))
+
+    def iterparse(self, **kwargs) -> Iterator:
+        return etree.iterparse(str(self.path), **kwargs)
+
+    def get_key(self) -> tuple:
+        return (os.path.realpath(self.path),)
+
+    def get_stamp(self) -> tuple:
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get_size(self) -> int:
+        return os.stat(self.path).st_size
+
+
+class _BufferReader(io.RawIOBase):
+    """Reads a buffer without copying it as a whole."""
+
+    def __init__(self, view: memoryview) -> None:
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        count = min(len(b), len(self._view) - self._position)
+        b[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+
+class BufferSource(InputSource):
+    """Content in memory (bytes, bytearray, memoryview or mmap).
+
+    Only bytes can be passed to worker processes, the other buffers cannot be pickled.
+    """
+
+    data: Union[bytes, bytearray, memoryview]
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview], name: str) -> None:
+        """Constructs a BufferSource object.
+
+        Args:
+            data (Union[bytes, bytearray, memoryview]): The content or any object supporting the buffer protocol, e.g. mmap.
+            name (str): File name of the content, the extension is used for the format detection.
+        """
+        super().__init__(Path(name))
+        self.data = data
+
+    def open(self) -> BinaryIO:
+        return io.BufferedReader(_BufferReader(memoryview(self.data).cast('B')))
+
+    def get_digest(self) -> str:
+        return hashlib.sha256(memoryview(self.data).cast('B')).hexdigest()
+
+    def get_key(self) -> tuple:
+        # the id of the buffer can be reused for other content after it is freed and a buffer can be changed,
+        # so the content is hashed for each key
+        return (str(self.path), self.get_digest())
+
+    def get_size(self) -> int:
+        return memoryview(self.data).nbytes
+
+
+class ArchiveMemberSource(InputSource):
+    """Member of a zip or tar archive, decompressed while it is read.
+
+    Zip members are parsed from the decompressing stream. Tar members are read into memory once,
+    because compressed tars cannot seek backwards without decompressing them again from the start.
+    Tar members larger than MAX_MEMORY_MEMBER_SIZE are spooled to a temporary file for each read instead.
+    """
+
+    archive: Path
+    member: str
+
+    def __init__(self, archive: Path, member: str, offset: int = None, size: int = None) -> None:
+        """Constructs a ArchiveMemberSource object.
+
+        Args:
+            archive (Path): Path of the archive.
+            member (str): Path of the member in the archive.
+            offset (int, optional): Position of the data of a tar member in the (decompressed) archive. Defaults to None.
+            size (int, optional): Size of the data of a tar member. Defaults to None.
+        """
+        safe_member = get_safe_member_path(archive, member)
+        super().__init__(Path(archive) / safe_member)
+        self.archive = Path(archive)
+        self.member = member
+        self._safe_member = safe_member
+        self._offset = offset
+        self._size = size
+
+    @property
+    def report_name(self) -> Path:
+        # keeps the folders of the member, so members with the same name do not overwrite their reports
+        return Path(self.archive.name) / self._safe_member
+
+    def get_key(self) -> tuple:
+        return (os.path.realpath(self.archive), self.member)
+
+    def get_stamp(self) -> tuple:
+        stat = os.stat(self.archive)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get_size(self) -> int:
+        if self._size is not None:
+            return self._size
+        archive = _get_open_archive(self.archive)
+        try:
+            return archive.getinfo(self.member).file_size
+        except KeyError:
+            raise FileNotFoundError(f'No member {self.member} in {self.archive}')
+
+    def open(self) -> BinaryIO:
+        import tarfile
+        import zipfile
+        archive = _get_open_archive(self.archive)
+        if isinstance(archive, zipfile.ZipFile):
+            return archive.open(self.member)
+        key = self.get_key()
+        # compressed tars can only be read forward efficiently, the last read member is kept for the next read
+        # of the same member (cache key and parsing)
+        last_member = getattr(_open_archives, 'last_member', None)
+        if last_member is not None and last_member[0] == key:
+            return io.BytesIO(last_member[1])
+        # the data position is known from the listing, so the tar is not searched again for the member
+        info = tarfile.TarInfo(self.member)
+        info.type = tarfile.REGTYPE
+        info.offset_data = self._offset
+        info.size = self._size
+        if self._size > MAX_MEMORY_MEMBER_SIZE:
+            import shutil
+            import tempfile
+            spooled = tempfile.TemporaryFile()
+            try:
+                with archive.extractfile(info) as f:
+                    shutil.copyfileobj(f, spooled, 1024 * 1024)
+                spooled.seek(0)
+            except BaseException:
+                spooled.close()
+                raise
+            return spooled
+        with archive.extractfile(info) as f:
+            data = f.read()
+        _open_archives.last_member = (key, data)
+        return io.BytesIO(data)
+
+
+def get_safe_member_path(archive: Path, member: str) -> PurePosixPath:
+    """Returns the path of an archive member relative to the archive, used for its report path.
+
+    Member names are not trusted: absolute paths (leading / or drive) are made relative and .. components are dropped,
+    so the report of a member like ../../x.xodr cannot be written outside the output directory.
+
+    Args:
+        archive (Path): Path of the archive, for the warning.
+        member (str): Name of the member in the archive.
+
+    Returns:
+        PurePosixPath: The relative path without . and .. components.
+    """
+    path = PurePosixPath(member.replace('\\', '/'))
+    parts = [part for part in path.parts if part not in ('/', '..')]
+    if parts and len(parts[0]) == 2 and parts[0][1] == ':':
+        parts = parts[1:]  # drive of a windows path
+    safe_path = PurePosixPath(*parts) if parts else PurePosixPath('_')
+    if safe_path.parts != path.parts:
+        logging.warning(f'Unsafe path of member {member} in {archive}, its report is written as {safe_path}')
+    return safe_path
+
+
+def _get_open_archive(path: Path) -> Union['zipfile.ZipFile', 'tarfile.TarFile']:
+    # tarfile and zipfile are imported with the first archive, plain files do not need them
+    import tarfile
+    import zipfile
+    archives = getattr(_open_archives, 'archives', None)
+    if archives is None:
+        archives = OrderedDict()
+        _open_archives.archives = archives
+    key = os.path.realpath(path)
+    archive = archives.get(key)
+    if archive is None:
+        archive = zipfile.ZipFile(path) if is_zip(path) else tarfile.open(path, 'r:*')
+        archives[key] = archive
+        if len(archives) > MAX_OPEN_ARCHIVES:
+            archives.popitem(last=False)[1].close()
+    else:
+        archives.move_to_end(key)
+    return archive
+
+
+def close_archives():
+    """Closes the archives kept open by the current thread."""
+    archives = getattr(_open_archives, 'archives', None)
+    while archives:
+        archives.popitem()[1].close()
+    _open_archives.last_member = None
+
+
+def is_zip(path: Path) -> bool:
+    return str(path).lower().endswith('.zip')
+
+
+def is_archive(path: Path) -> bool:
+    """Returns if a path is a zip or tar archive by its extension."""
+    name = str(path).lower()
+    return any(name.endswith(suffix) for suffix in ARCHIVE_SUFFIXES)
+
+
+def get_archive_members(archive: Path) -> Iterator[ArchiveMemberSource]:
+    """Lists the files of a zip or tar archive in archive order without extracting them.
+
+    Args:
+        archive (Path): Path of the archive.
+
+    Yields:
+        ArchiveMemberSource: The members.
+    """
+    import tarfile
+    import zipfile
+    if is_zip(archive):
+        with zipfile.ZipFile(archive) as f:
+            for info in f.infolist():
+                if not info.is_dir():
+                    yield ArchiveMemberSource(archive, info.filename)
+    else:
+        with tarfile.open(archive, 'r:*') as f:
+            for info in f:
+                if info.isfile():
+                    yield ArchiveMemberSource(archive, info.name, info.offset_data, info.size)
+
+
+def get_archive_member(archive: Path, member: str) -> ArchiveMemberSource:
+    """Returns a member of a zip or tar archive.
+
+    Args:
+        archive (Path): Path of the archive.
+        member (str): Path of the member in the archive.
+
+    Returns:
+        ArchiveMemberSource: The member or None if the archive does not contain it.
+    """
+    import zipfile
+    opened = _get_open_archive(archive)
+    try:
+        if isinstance(opened, zipfile.ZipFile):
+            opened.getinfo(member)
+            return ArchiveMemberSource(archive, member)
+        info = opened.getmember(member)
+    except KeyError:
+        return None
+    return ArchiveMemberSource(archive, info.name, info.offset_data, info.size) if info.isfile() else None
+
+
+def resolve_reference(file: Union[Path, InputSource], reference: str) -> Union[Path, InputSource]:
+    """Resolves the path of a file referenced by a file, e.g. the road network of a scenario.
+
+    Relative references of archive members are looked up in the same archive first, then next to the archive.
+
+    Args:
+        file (Union[Path, InputSource]): The referencing file.
+        reference (str): Absolute path or path relative to the folder of the referencing file.
+
+    Returns:
+        Union[Path, InputSource]: Path of the referenced file or its archive member.
+    """
+    if os.path.isabs(reference):
+        return Path(reference)
+    if isinstance(file, ArchiveMemberSource):
+        import tarfile
+        import zipfile
+        member = posixpath.normpath(posixpath.join(posixpath.dirname(file.member), reference.replace('\\', '/')))
+        try:
+            source = get_archive_member(file.archive, member)
+        except (OSError, zipfile.BadZipFile, tarfile.TarError):
+            source = None
+        if source is not None:
+            return source
+        return file.archive.parent / reference
+    if isinstance(file, InputSource):
+        return file.path.parent / reference
+    return Path(file).parent / reference
+
+
+def as_source(file: Union[Path, InputSource]) -> InputSource:
+    """Returns the input source of a file path or the source itself."""
+    return file if isinstance(file, InputSource) else FileSource(file)
+
+
+def get_files(input_files: List[str], extensions: List[str] = None) -> Iterator[Union[Path, InputSource]]:
+    """Lists the files of the input arguments: files, folders (recursively) and zip or tar archives (their members).
+
+    Files of folders and archives are filtered by their extension and duplicates (e.g. of overlapping folders)
+    are skipped while listing, so nothing is parsed twice. Files passed directly are not filtered.
+
+    Args:
+        input_files (List[str]): Paths of files, folders and archives.
+        extensions (List[str], optional): Extensions without dot of the files to validate in folders
+            and archives, e.g. ['xodr']. Defaults to None for all files.
+
+    Yields:
+        Union[Path, InputSource]: Path of a plain file or the source of an archive member.
+    """
+    suffixes = None if extensions is None else {f'.{extension.lower()}' for extension in extensions}
+    seen = set()
+
+    def accept(file: Union[Path, InputSource], filtered: bool) -> bool:
+        if filtered and suffixes is not None and file.suffix.lower() not in suffixes:
+            return False
+        key = as_source(file).get_key()
+        if key in seen:
+            logging.warning(f'Skipping duplicate input {file}')
+            return False
+        seen.add(key)
+        return True
+
+    def expand(file: Path, filtered: bool) -> Iterator[Union[Path, InputSource]]:
+        if is_archive(file):
+            import tarfile
+            import zipfile
+            try:
+                for member in get_archive_members(file):
+                    if accept(member, True):
+                        yield member
+            except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                logging.error(f'Could not read archive {file}: {e}')
+        elif accept(file, filtered):
+            yield file
+
+    for data in input_files:
+        if os.path.isdir(data):
+            for root, dirs, files in os.walk(data):
+                for file in files:
+                    yield from expand(Path(os.path.join(root, file)), True)
+        else:
+            yield from expand(Path(data), False)
@@ -0,0 +1,384 @@
+from result_report import Checker, IssueLevel
+from checker_data import CheckerData
+from document_cache import DEFAULT_DOCUMENT_CACHE_SIZE, get_document_cache
+from contextlib import nullcontext
+from typing import Dict, List
+from lxml import etree
+
+import importlib
+import logging
+import queue
+import threading
+import traceback
+
+# seconds a worker may take to read and parse the validated file, large files take minutes
+DEFAULT_LOAD_TIME_LIMIT = 600.0
+
+try:
+    import resource  # not available on Windows, memory limits are not applied there
+except ImportError:
+    resource = None
+
+
+def _get_address_space() -> int:
+    # size of the virtual memory of the process, the memory limit is added on top of it
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+
+def _set_memory_limit(memory_limit: int) -> tuple:
+    if resource is None or memory_limit is None:
+        return None
+    try:
+        limit = _get_address_space() + memory_limit
+    except OSError:
+        return None  # no /proc, e.g. macOS
+    previous = resource.getrlimit(resource.RLIMIT_AS)
+    hard = previous[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return previous
+
+
+def _load_document(request: dict) -> tuple:
+    """Loads the document of the next checks in the worker process.
+
+    Returns:
+        tuple: The file and its document. The document keeps the parse error, it is raised to the checks like in the main process.
+    """
+    document_cache = get_document_cache(request['document_cache_size'])
+    document = document_cache.get(request['load'])
+    try:
+        document.tree  # parsed before the time and memory limits of the checks, it is shared with the next checkers of the file
+    except (etree.XMLSyntaxError, OSError):
+        pass
+    return request['load'], document
+
+
+def _run_check(request: dict, loaded: tuple) -> tuple:
+    """Runs a check in the worker process on the document loaded before.
+
+    Returns:
+        tuple: ('done', success, checker, referenced documents), ('error', traceback) or ('memory', None).
+    """
+    module = importlib.import_module(request['module_name'])
+    checker = Checker(request['checker_id'], request['description'])
+    if request['issue_limits']:
+        checker.set_issue_limits(**request['issue_limits'])
+    file, document = loaded
+    checker_data = CheckerData(file=file, reporter=None, config=request['config'], format_settings=request['format_settings'],
+                               checker=checker, version=request['version'], document=document,
+                               document_cache=get_document_cache(request['document_cache_size']))
+
+    previous_limit = _set_memory_limit(request['memory_limit'])
+    try:
+        success = module.check(checker_data)
+    except MemoryError:
+        return ('memory', None)
+    except:
+        return ('error', traceback.format_exc())
+    finally:
+        if previous_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, previous_limit)
+    return ('done', success, checker, checker_data.referenced_documents)
+
+
+def _worker_main(connection: 'multiprocessing.connection.Connection', logging_args: tuple):
+    """Loop of a worker process: loads documents and runs the requested checks until the connection is closed."""
+    from main import configure_logging
+    configure_logging(*logging_args)
+    loaded = None
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        if 'module_names' in request:
+            for module_name in request['module_names']:
+                importlib.import_module(module_name)
+            connection.send(('done', True, None, []))
+            continue
+        try:
+            if 'load' in request:
+                loaded = None  # the previous document is not used by the next checks
+                loaded = _load_document(request)
+                response = ('loaded',)
+            else:
+                response = _run_check(request, loaded)
+        except MemoryError:
+            response = ('memory', None)
+        except:
+            response = ('error', traceback.format_exc())
+        try:
+            connection.send(response)
+        except Exception:
+            # e.g. an issue with an external object which cannot be pickled
+            connection.send(('error', traceback.format_exc()))
+        if response[0] == 'memory':
+            return  # a fresh worker is started for the next check
+
+
+class _Worker:
+    """A worker process with the connection to it."""
+
+    def __init__(self, context, logging_args: tuple) -> None:
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, logging_args), name='checker-worker', daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class CheckerWorkerPool:
+    """Worker processes running checkers isolated from the validating process, with time and memory limits.
+
+    The workers are started once and kept for all files: a checker module is imported once per worker
+    and the parsed file is shared by the checkers of a file running on the same worker (document cache of the worker).
+    A checker exceeding its time limit is killed together with its worker, a checker exceeding its memory limit
+    ends its worker. Both are reported as error issues of the checker and a new worker is started for the next check.
+    Issues generated before a limit was exceeded are lost.
+
+    Only the issues of the checker are returned from the worker, changes of the checker data (e.g. data or the tree)
+    are not visible to the following checkers. Streaming checkers always run in the validating process.
+    """
+
+    workers: int
+    time_limit: float
+    memory_limit: int
+    document_cache_size: int
+    load_time_limit: float
+
+    def __init__(self, workers: int = 1, time_limit: float = None, memory_limit: int = None, document_cache_size: int = DEFAULT_DOCUMENT_CACHE_SIZE,
+                 load_time_limit: float = DEFAULT_LOAD_TIME_LIMIT) -> None:
+        """Constructs a CheckerWorkerPool object. The workers are started on first use.
+
+        Args:
+            workers (int, optional): Number of worker processes, i.e. checkers running at the same time. Defaults to 1.
+            time_limit (float, optional): Default wall time limit of a check in seconds. Defaults to None for no limit.
+            memory_limit (int, optional): Default limit of the memory a check allocates in bytes. Defaults to None for no limit.
+            document_cache_size (int, optional): Maximal memory of the parsed documents kept by a worker. Defaults to DEFAULT_DOCUMENT_CACHE_SIZE.
+            load_time_limit (float, optional): Wall time limit of a worker for reading and parsing the validated file before a check,
+                not counted for the time limit of the check. Defaults to DEFAULT_LOAD_TIME_LIMIT.
+        """
+        self.workers = max(1, workers)
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.document_cache_size = document_cache_size
+        self.load_time_limit = load_time_limit
+        # imported with the first pool, it is not needed without isolation and slows down the start
+        import multiprocessing
+        # a fresh interpreter per worker, forking the validating process with its threads is not safe
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        # idle workers and free slots (None) for workers not started yet or replaced
+        self._idle = queue.LifoQueue()
+        for _ in range(self.workers):
+            self._idle.put(None)
+        self._started = set()
+        self._lock = threading.Lock()
+        if memory_limit is not None and resource is None:
+            logging.warning('Memory limits of checks are not supported on this platform')
+
+    def _get_worker(self) -> _Worker:
+        # blocks while all workers are busy
+        worker = self._idle.get()
+        if worker is None:
+            # the log level of the validating process, the issues are logged by it when they are merged into the report
+            worker = _Worker(self._context, (logging.getLevelName(logging.getLogger().level), 'off'))
+            with self._lock:
+                self._started.add(worker)
+        return worker
+
+    def _release(self, worker: _Worker):
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker):
+        # the worker is dead or killed, the next check starts a new one
+        with self._lock:
+            self._started.discard(worker)
+        self._idle.put(None)
+
+    def _receive(self, worker: _Worker, timeout: float) -> tuple:
+        # waits for the response of a worker, a killed or ended worker is replaced
+        if not worker.connection.poll(timeout):
+            worker.kill()
+            self._replace(worker)
+            return ('timeout',)
+        try:
+            response = worker.connection.recv()
+        except (EOFError, OSError):
+            worker.process.join()
+            worker.connection.close()
+            self._replace(worker)
+            return ('terminated', worker.process.exitcode)
+        if response[0] == 'memory':
+            # the worker ends after a memory error
+            worker.process.join()
+            worker.connection.close()
+            self._replace(worker)
+        return response
+
+    def _set_failed(self, checker_data: CheckerData):
+        # the result depends on the run, e.g. the load of the machine, so the report is not cached
+        if checker_data.reporter is not None:
+            checker_data.reporter.isolation_failed = True
+
+    def prewarm(self, module_names: List[str]):
+        """Starts the workers and imports the checker modules, so the first checks do not pay for it.
+        Waits for busy workers, so it should be called before the validation.
+
+        Args:
+            module_names (List[str]): Module names of the checkers, e.g. of CheckPlan.get_checkers.
+        """
+        workers = [self._get_worker() for _ in range(self.workers)]
+        for worker in workers:
+            worker.connection.send({'module_names': module_names})
+        for worker in workers:
+            try:
+                worker.connection.recv()
+            except (EOFError, OSError):
+                worker.kill()
+                self._replace(worker)
+                continue
+            self._release(worker)
+
+    def execute(self, task: 'CheckTask', checker_data: CheckerData, profiler=None) -> bool:
+        """Executes the checker of a task in a worker process and adds its issues to the checker of the report.
+        The worker loads the file before the check, the time limit of the check starts after loading.
+        An exception, a timeout or an exceeded memory limit of the check is reported as error issue of the checker.
+
+        Args:
+            task (CheckTask): The task with the isolation limits of the checker (time_limit in s, memory_limit in MB).
+            checker_data (CheckerData): The checker data of the file, the checker is the checker of the task.
+            profiler (CheckProfiler, optional): Profiler measuring the check. Defaults to None.
+
+        Returns:
+            bool: False if the check requests to cancel all further checks of the file.
+        """
+        checker = task.report_checker
+        planned = task.checker
+        limits = task.isolation
+        time_limit = limits.get('time_limit', self.time_limit)
+        memory_limit = limits['memory_limit'] * 1024 * 1024 if limits.get('memory_limit') is not None else self.memory_limit
+        issue_limits = None
+        if checker._limited:
+            issue_limits = {'max_issues': checker.max_issues, 'aggregate_issues': checker.aggregate_issues, 'sample_locations': checker.sample_locations}
+        request = {
+            'module_name': planned.module_name,
+            'checker_id': planned.checker_id,
+            'description': planned.description,
+            'issue_limits': issue_limits,
+            'config': task.config if task.config is not None else checker_data.config,
+            'format_settings': checker_data.format_settings,
+            # the file is not parsed by the validating process only for the version, the worker detects it from its own tree
+            'version': checker_data.version if checker_data.document.is_loaded() else None,
+            'memory_limit': memory_limit,
+            'document_cache_size': self.document_cache_size
+        }
+
+        measure = profiler.measure(task.bundle.name, checker) if profiler is not None else nullcontext()
+        with measure:
+            worker = self._get_worker()
+            # the file is loaded first, so reading and parsing it does not count for the time limit of the check
+            loading = True
+            try:
+                worker.connection.send({'load': checker_data.file, 'document_cache_size': self.document_cache_size})
+                response = self._receive(worker, self.load_time_limit)
+                if response[0] == 'loaded':
+                    loading = False
+                    worker.connection.send(request)
+                    response = self._receive(worker, time_limit)
+            except Exception:
+                # e.g. a buffer or a configuration which cannot be pickled
+                self._release(worker)
+                logging.exception(f'Could not isolate {planned.checker_id}, running it in the validating process')
+                return planned.execute(checker_data, bundle_name=task.bundle.name)
+
+            if response[0] == 'timeout':
+                if loading:
+                    message = f'exceeded the time limit of {self.load_time_limit} s for loading the file'
+                else:
+                    message = f'exceeded the time limit of {time_limit} s'
+                logging.error(f'{planned.checker_id} {message}')
+                checker.gen_issue(IssueLevel.ERROR, f'Could not {planned.description}: {message}')
+                self._set_failed(checker_data)
+            elif response[0] == 'terminated':
+                logging.error(f'Worker of {planned.checker_id} terminated with exit code {response[1]}')
+                checker.gen_issue(IssueLevel.ERROR, f'Could not {planned.description}: checker process terminated with exit code {response[1]}')
+                self._set_failed(checker_data)
+            elif response[0] == 'memory':
+                if loading or memory_limit is None:
+                    message = 'out of memory'
+                else:
+                    message = f'exceeded the memory limit of {memory_limit // (1024 * 1024)} MB'
+                logging.error(f'{planned.checker_id} {message}')
+                checker.gen_issue(IssueLevel.ERROR, f'Could not {planned.description}: {message}')
+                self._set_failed(checker_data)
+            elif response[0] == 'error':
+                self._release(worker)
+                logging.error(f'Could not {planned.checker_id}\n{response[1]}')
+                checker.gen_issue(IssueLevel.ERROR, f'Could not {planned.description}')
+            else:
+                self._release(worker)
+                _, success, result, referenced_documents = response
+                for issue in result._issues:
+                    checker.add_issue(issue)
+                checker.truncated += result.truncated
+                # the references loaded by the worker are checked by the result cache as well
+                checker_data.referenced_documents.extend(referenced_documents)
+                if success is False:
+                    logging.error(f'Cancel checks for the file {planned.checker_id}')
+                    return False
+        checker.log_summary()
+        return True
+
+    def close(self):
+        """Stops the worker processes. Workers still running a check are stopped after it."""
+        with self._lock:
+            workers = list(self._started)
+            self._started.clear()
+        for worker in workers:
+            worker.close()
+
+
+_pools: Dict[tuple, CheckerWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(workers: int = 1, time_limit: float = None, memory_limit: int = None, document_cache_size: int = DEFAULT_DOCUMENT_CACHE_SIZE) -> CheckerWorkerPool:
+    """Returns the worker pool of this process for the given limits, shared by all files validated by the process.
+
+    Args:
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        time_limit (float, optional): Default wall time limit of a check in seconds. Defaults to None.
+        memory_limit (int, optional): Default memory limit of a check in bytes. Defaults to None.
+        document_cache_size (int, optional): Maximal memory of the parsed documents kept by a worker. Defaults to DEFAULT_DOCUMENT_CACHE_SIZE.
+
+    Returns:
+        CheckerWorkerPool: The pool.
+    """
+    key = (workers, time_limit, memory_limit, document_cache_size)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = CheckerWorkerPool(workers, time_limit, memory_limit, document_cache_size)
+            _pools[key] = pool
+        return pool
@@ -1,35 +1,245 @@
 #!/bin/python3
 
-if __name__ == '__main__':
-    from validator import validate, get_files
+if not __package__:
+    from validator import ValidationOptions, validate_file, validate_file_report, write_result, get_files
+    from input_source import close_archives
+    from profiler import PROFILE_MODES
+    from result_cache import DEFAULT_CACHE_SIZE
+    from document_cache import DEFAULT_DOCUMENT_CACHE_SIZE
+    from result_report import ISSUE_LOG_MODES, set_issue_logging
 else:
-    from .validator import validate, get_files
+    from .validator import ValidationOptions, validate_file, validate_file_report, write_result, get_files
+    from .input_source import close_archives
+    from .profiler import PROFILE_MODES
+    from .result_cache import DEFAULT_CACHE_SIZE
+    from .document_cache import DEFAULT_DOCUMENT_CACHE_SIZE
+    from .result_report import ISSUE_LOG_MODES, set_issue_logging
 from pathlib import Path
 
 import argparse
 import logging
 import json
 import os
+import sys
+
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+
+def configure_logging(log_level: str = 'DEBUG', issue_log: str = 'all', issue_log_sample: int = 100):
+    """Configures logging of the main process and of the worker processes.
+
+    Args:
+        log_level (str, optional): Level of the root logger. Defaults to 'DEBUG'.
+        issue_log (str, optional): How generated issues are logged, see set_issue_logging. Defaults to 'all'.
+        issue_log_sample (int, optional): Log every n-th issue in sampled mode. Defaults to 100.
+    """
+    logging.basicConfig(level=log_level,
+                        format='%(asctime)s.%(msecs)03d [%(levelname)5s-%(name)s] {%(module)s -> %(funcName)s} %(message)s',
+                        datefmt='%d/%m/%Y %H:%M:%S',
+                        force=True)
+    logging.getLogger(__name__).setLevel(max(logging.WARNING, logging.getLevelName(log_level)))
+    set_issue_logging(issue_log, issue_log_sample)
+
+
+def add_common_arguments(parser: argparse.ArgumentParser):
+    """Adds the arguments shared by the validation of files and the server.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser.
+    """
+    parser.add_argument('--compact-json', action='store_true', help='Write json reports without indentation.')
+    parser.add_argument('-a', '--addition-check-dirs', action='append', help='Additional directories for validation checks.')
+    parser.add_argument('-c', '--config', type=str, help='Path to config file. Otherwise the config is taken from the format folder')
+    parser.add_argument('-l', '--log-level', choices=LOG_LEVELS, default='DEBUG', help='Log level (available: DEBUG, INFO, WARNING, ERROR, CRITICAL).')
+    parser.add_argument('--issue-log', choices=ISSUE_LOG_MODES, default='all', help='Logging of found issues: every issue, every n-th issue (sampled), a summary per checker or off.')
+    parser.add_argument('--issue-log-sample', type=int, default=100, help='Log every n-th issue of a checker with --issue-log sampled.')
+    parser.add_argument('--checker-threads', type=int, default=1, help='Number of threads running checkers declared as READ_ONLY concurrently within a file. The checkers run one after another with --profile memory.')
+    parser.add_argument('--no-cache', action='store_true', help='Validate all files again even if --cache-dir is given.')
+    parser.add_argument('--cache-dir', type=str, help='Enables the result cache in this directory (e.g. ~/.cache/OpenValidator/results): unchanged results are restored instead of validating the files again. The directory must only be writable by the user.')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024), help='Maximal size of the result cache in MB, least recently used results are removed first.')
+    parser.add_argument('--document-cache-size', type=int, default=DEFAULT_DOCUMENT_CACHE_SIZE // (1024 * 1024), help='Maximal memory in MB of the parsed documents referenced by the validated files (e.g. road networks of scenarios), kept for the following files of a process.')
+    parser.add_argument('--isolate', action='store_true', help='Run the checkers in warm worker processes, so a hanging or crashing checker is reported as error instead of stopping the validation.')
+    parser.add_argument('--check-time-limit', type=float, help='Wall time limit of an isolated checker in seconds (default no limit).')
+    parser.add_argument('--check-memory-limit', type=int, help='Memory limit of an isolated checker in MB (default no limit, not supported on Windows).')
+
+
+def get_options(args: argparse.Namespace, format_extension: str = None, output_type: str = 'xqar', profile: str = None) -> ValidationOptions:
+    """Returns the validation options of the parsed common arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        format_extension (str, optional): Format to be checked. Defaults to None.
+        output_type (str, optional): Output format of the reports. Defaults to 'xqar'.
+        profile (str, optional): Profile mode. Defaults to None.
+
+    Returns:
+        ValidationOptions: The options.
+    """
+    # get config path
+    config_path = None
+    if args.config:
+        config_path = Path(args.config)
+
+    return ValidationOptions(additional_check_dirs=args.addition_check_dirs,
+                             config_path=config_path,
+                             format_extension=format_extension,
+                             output_type=output_type,
+                             compact_json=args.compact_json,
+                             profile=profile,
+                             cache_dir=None if args.no_cache or args.cache_dir is None else Path(args.cache_dir),
+                             cache_size=args.cache_size * 1024 * 1024,
+                             checker_threads=args.checker_threads,
+                             document_cache_size=args.document_cache_size * 1024 * 1024,
+                             isolate=args.isolate,
+                             check_time_limit=args.check_time_limit,
+                             check_memory_limit=args.check_memory_limit * 1024 * 1024 if args.check_memory_limit is not None else None)
+
+
+def main_serve(argv):
+    if not __package__:
+        from server import get_available_formats, serve
+    else:
+        from .server import get_available_formats, serve
+
+    parser = argparse.ArgumentParser(prog='main.py serve',
+                                     description='Runs a validation server with loaded checks, see README.')
+    parser.add_argument('--socket', type=str, help='Path of a unix domain socket to listen on instead of TCP.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='TCP host to listen on.')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on.')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Number of worker processes validating requests in parallel (0 uses all cores).')
+    parser.add_argument('-f', '--format', action='append', help='Formats loaded at startup (default all format folders).')
+    parser.add_argument('--max-upload-size', type=int, default=512, help='Maximal size in MB of an uploaded file, larger uploads are rejected with 413.')
+    parser.add_argument('--file-root', type=str, help='Folder of the files which can be validated by path (file parameter), '
+                                                      'other paths are rejected with 403. Without it only uploads are validated.')
+    add_common_arguments(parser)
 
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s.%(msecs)03d [%(levelname)5s-%(name)s] {%(module)s -> %(funcName)s} %(message)s',
-                    datefmt='%d/%m/%Y %H:%M:%S')
-logging.getLogger(__name__).setLevel(logging.WARNING)
+    args = parser.parse_args(argv)
+    logging_args = (args.log_level, args.issue_log, args.issue_log_sample)
+    configure_logging(*logging_args)
+
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    formats = args.format or get_available_formats()
+    if args.file_root and not Path(args.file_root).is_dir():
+        logging.error(f'Could not start the server: the file root {args.file_root} is not a folder')
+        exit(1)
+    try:
+        serve(get_options(args), workers, formats, logging_args,
+              socket_path=Path(args.socket) if args.socket else None, host=args.host, port=args.port,
+              max_upload_size=args.max_upload_size * 1024 * 1024, file_root=Path(args.file_root) if args.file_root else None)
+    except FileExistsError as e:
+        logging.error(f'Could not start the server: {e}')
+        exit(1)
+
+
+def main_manifest(argv):
+    if not __package__:
+        from check_plan import get_check_dirs, write_manifest
+        from server import get_available_formats
+    else:
+        from .check_plan import get_check_dirs, write_manifest
+        from .server import get_available_formats
+
+    parser = argparse.ArgumentParser(prog='main.py manifest',
+                                     description='Writes the manifest of the check folders, so the checks are found without discovery and imported on first use, see README.')
+    parser.add_argument('-f', '--format', action='append', help='Formats whose checks folder gets a manifest (default all format folders).')
+    parser.add_argument('-a', '--addition-check-dirs', action='append', help='Additional directories for validation checks.')
+    parser.add_argument('-l', '--log-level', choices=LOG_LEVELS, default='INFO', help='Log level (available: DEBUG, INFO, WARNING, ERROR, CRITICAL).')
+
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level)
+
+    check_dirs = []
+    for format_extension in args.format or get_available_formats():
+        check_dirs.extend(get_check_dirs(None, {'extension': format_extension}))
+    check_dirs.extend(Path(additional_dir) for additional_dir in args.addition_check_dirs or [])
+    for check_dir in check_dirs:
+        manifest_file = write_manifest(check_dir)
+        logging.info(f'Wrote {manifest_file}')
+
+
+def main_query(argv):
+    if not __package__:
+        from result_store import ResultStore
+        from result_report import get_IssueLevel_from_str, get_IssueLevel_str
+    else:
+        from .result_store import ResultStore
+        from .result_report import get_IssueLevel_from_str, get_IssueLevel_str
+
+    parser = argparse.ArgumentParser(prog='main.py query',
+                                     description='Queries the issues of a result store written with -t sqlite and exports its reports as XQAR, see README.')
+    parser.add_argument('DATABASE', help='The result store, e.g. reports/results.sqlite.')
+    parser.add_argument('--file', type=str, help='Only issues of the validated file (as passed to main.py).')
+    parser.add_argument('--checker', type=str, help='Only issues of the checker id.')
+    parser.add_argument('--level', choices=['error', 'warning', 'info'], help='Only issues of the level.')
+    parser.add_argument('--road', type=str, help='Only issues with a road location of the road id.')
+    parser.add_argument('--description', type=str, help='Only issues whose description matches the SQL LIKE pattern, e.g. "%%missing%%".')
+    parser.add_argument('--limit', type=int, help='Maximal number of printed issues.')
+    parser.add_argument('--files', action='store_true', help='Print the files with matching issues and their number instead of the issues.')
+    parser.add_argument('--xqar', type=str, help='Export the reports of the files with matching issues (all files without filters) as XQAR into the folder.')
+
+    args = parser.parse_args(argv)
+    if not Path(args.DATABASE).is_file():
+        parser.error(f'Result store {args.DATABASE} does not exist')
+    store = ResultStore(Path(args.DATABASE))
+    filters = {
+        'checker_id': args.checker,
+        'level': get_IssueLevel_from_str(args.level) if args.level else None,
+        'road_id': args.road,
+        'description': args.description
+    }
+
+    if args.xqar:
+        if args.file:
+            files = [args.file]
+        elif any(value is not None for value in filters.values()):
+            files = list(store.query_files(**filters))
+        else:
+            files = store.get_files()
+        output_directory = Path(args.xqar)
+        output_directory.mkdir(parents=True, exist_ok=True)
+        for file in files:
+            output_file = output_directory / (Path(file).name + '.xqar')
+            if store.export_xqar(file, output_file):
+                print(f'{file} -> {output_file}')
+            else:
+                print(f'No report of {file}')
+    elif args.files:
+        for file, count in store.query_files(**filters).items():
+            if args.file is None or file == args.file:
+                print(f'{count} issues in {file}')
+    else:
+        for issue in store.query_issues(file=args.file, limit=args.limit, **filters):
+            count = f' ({issue["count"]} occurrences)' if issue['count'] != 1 else ''
+            print(f'{issue["file"]}: {get_IssueLevel_str(issue["level"])} {issue["checker_id"]}: {issue["description"]}{count}')
+    store.close()
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        main_serve(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'manifest':
+        main_manifest(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'query':
+        main_query(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(prog='main.py',
-                                     description='Validates a given XML based OpenX file.')
+                                     description='Validates a given XML based OpenX file. Use "main.py serve" to run a validation server and "main.py query" to query a result store.')
 
     parser.add_argument('-o', '--output-directory', type=str, default='reports/', help='Path to validation report folder.')
-    parser.add_argument('-t', '--output-type', choices=['xqar', 'json', 'txt'], default='xqar', help='Output format of result report (available: xqar, json, txt).')
+    parser.add_argument('-t', '--output-type', choices=['xqar', 'json', 'ndjson', 'txt', 'sqlite'], default='xqar', help='Output format of result report (available: xqar, json, ndjson, txt, sqlite). sqlite stores the reports of all files in one database results.sqlite in the report folder, see "main.py query".')
     parser.add_argument('-e', '--exit-type', choices=['no-exit', 'exit-if-error'], default='no-exit', help='Should the script be terminated after an error or not.')
-    parser.add_argument('-a', '--addition-check-dirs', action='append', help='Additional directories for validation checks.')
-    parser.add_argument('-c', '--config', type=str, help='Path to config file. Otherwise the config is taken from the format folder')
     parser.add_argument('-f', '--format', type=str, default='xodr', help='Specification of the formats to be checked (file extension or check folder), e.g. xodr for OpenDrive.') # TODO format dependent
-    parser.add_argument('INPUT_FILES', nargs='+', help='file(s) or folder to validate')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes validating files in parallel (0 uses all cores).')
+    parser.add_argument('--prefetch', type=int, default=0, help='Pipelined batch mode (with -j 1): number of files read and parsed ahead in a background thread while the current file is checked, reports are written in a background thread. 0 disables the pipeline.')
+    parser.add_argument('--profile', choices=PROFILE_MODES, help='Profile each checker and write <file>.profile.json and <file>.profile.folded (flamegraph) next to the report. memory traces allocations, is slower and runs the checkers one after another (no --checker-threads).')
+    add_common_arguments(parser)
+    parser.add_argument('INPUT_FILES', nargs='+', help='file(s), folder or zip/tar archives to validate')
 
     args = parser.parse_args()
+    configure_logging(args.log_level, args.issue_log, args.issue_log_sample)
 
     # get output dir
     output_directory = Path(args.output_directory)
@@ -40,35 +250,91 @@ def main():
         logging.error(f'Provided output folder exists and is not an directory: {output_directory.absolute()}')
         exit(1)
 
-    # get config path
-    config_path = None
-    if args.config:
-        config_path = Path(args.config)
+    options = get_options(args, args.format, args.output_type, args.profile)
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
 
     issue_counter = []
+    cache_hits = 0
+    cache_misses = 0
     # validate input files
-    for file in get_files(args.INPUT_FILES):
-        output_file = output_directory / (file.name + '.' + args.output_type)        
-        
-        # validate        
-        result, valid = validate(file, args.addition_check_dirs, config_path, args.format)
-        
-        # write result
-        if valid:
-            logging.info(f'write to {output_file}')
-            if args.output_type == 'json':
-                result.write_as_json(output_file)
-            elif args.output_type == 'xqar':
-                result.write_as_xqar(output_file)
-            elif args.output_type == 'txt':
-                result.write_as_txt(output_file)
-
-            issue_counter.append(f'{result.get_issues_count()} issues in {os.path.basename(file)}')
-        elif args.exit_type == 'exit-if-error':
+    if jobs == 1 and args.prefetch > 0:
+        if not __package__:
+            from pipeline import ValidationPipeline
+        else:
+            from .pipeline import ValidationPipeline
+        failed = False
+        with ValidationPipeline(output_directory, options, args.prefetch) as pipeline:
+            for file, count, valid, cached in pipeline.run(get_files(args.INPUT_FILES, [args.format])):
+                if valid:
+                    issue_counter.append(f'{count} issues in {file.name}')
+                    cache_hits += cached
+                    cache_misses += not cached
+                elif args.exit_type == 'exit-if-error':
+                    # reports of the validated files are still written
+                    failed = True
+                    break
+        if failed:
             exit(1)
+    elif jobs == 1:
+        for file in get_files(args.INPUT_FILES, [args.format]):
+            count, valid, cached = validate_file(file, output_directory, options)
+            if valid:
+                issue_counter.append(f'{count} issues in {file.name}')
+                cache_hits += cached
+                cache_misses += not cached
+            elif args.exit_type == 'exit-if-error':
+                exit(1)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        files = list(get_files(args.INPUT_FILES, [args.format]))
+        exit_if_error = args.exit_type == 'exit-if-error'
+        with ProcessPoolExecutor(max_workers=jobs, initializer=configure_logging, initargs=(args.log_level, args.issue_log, args.issue_log_sample)) as executor:
+            if exit_if_error:
+                # the reports are written in input order by this process, so no report of a file after a failed file
+                # is written like in the serial run
+                futures = [executor.submit(validate_file_report, file, options) for file in files]
+            else:
+                futures = [executor.submit(validate_file, file, output_directory, options) for file in files]
+            # collect in input order, so the summary is the same as for the serial run
+            for file, future in zip(files, futures):
+                if exit_if_error:
+                    result, valid = future.result()
+                    if valid:
+                        write_result(result, file, output_directory, options)
+                        count, cached = result.get_issues_count(), result.from_cache
+                else:
+                    count, valid, cached = future.result()
+                if valid:
+                    issue_counter.append(f'{count} issues in {file.name}')
+                    cache_hits += cached
+                    cache_misses += not cached
+                elif exit_if_error:
+                    # drop all pending files, the reports of the files running in the workers are not written
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    exit(1)
+    # the archives were kept open for the following members of the batch
+    close_archives()
+    if options.output_type == 'sqlite':
+        # the stores of the worker processes are closed when the workers exit
+        if not __package__:
+            from result_store import close_result_stores
+        else:
+            from .result_store import close_result_stores
+        close_result_stores()
+    if jobs == 1 and logging.getLogger().isEnabledFor(logging.DEBUG):
+        # the schemas compiled by the worker processes of -j are not listed
+        if not __package__:
+            from schema_registry import get_schema_registry
+        else:
+            from .schema_registry import get_schema_registry
+        for path, stats in get_schema_registry().get_stats().items():
+            logging.debug(f'Schema {path} (XSD {stats["xsd_version"]}) compiled in {stats["compile_time"]:.3f} s, reused {stats["hits"]} times')
 
     for file_isses in issue_counter:
         print(file_isses)
+    if options.cache_dir is not None:
+        print(f'Result cache: {cache_hits} hits, {cache_misses} misses')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,154 @@
+from validator import ValidationOptions, get_options_worker_pool, get_session, write_result
+from result_cache import get_result_cache
+from document_cache import get_document_cache
+from input_source import InputSource, close_archives
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple, Union
+from lxml import etree
+
+import logging
+import queue
+import threading
+
+# marks the end of the files in the queues
+_DONE = object()
+
+
+class ValidationPipeline:
+    """Pipelined validation of a batch of files in one process.
+
+    A prefetch thread lists, reads and parses the next files while the checks run on the current file
+    in the calling thread, and a writer thread serializes the finished reports. The stages are bounded,
+    so at most prefetch parsed files besides the checked file and write_queue reports are held in memory.
+    Parsing with lxml and writing release the GIL, so the throughput approaches the slowest stage.
+
+    Usage:
+        with ValidationPipeline(output_directory, options) as pipeline:
+            for file, count, valid, cached in pipeline.run(files):
+                ...
+    """
+
+    output_directory: Path
+    options: ValidationOptions
+    prefetch: int
+
+    def __init__(self, output_directory: Path, options: ValidationOptions, prefetch: int = 2, write_queue: int = 2) -> None:
+        """Constructs a ValidationPipeline object.
+
+        Args:
+            output_directory (Path): The folder the reports are written to.
+            options (ValidationOptions): Options of the validation run.
+            prefetch (int, optional): Number of files read and parsed ahead of the checks. Defaults to 2.
+            write_queue (int, optional): Number of reports waiting to be written before the checks wait. Defaults to 2.
+        """
+        self.output_directory = output_directory
+        self.options = options
+        self.prefetch = prefetch
+        self._session = get_session(options.additional_check_dirs, options.config_path, options.format_extension)
+        self._cache = get_result_cache(options.cache_dir, options.cache_size) if options.cache_dir is not None else None
+        self._document_cache = get_document_cache(options.document_cache_size)
+        self._worker_pool = get_options_worker_pool(options)
+        self._prefetched = queue.Queue()
+        # a slot is taken before a file is parsed and freed when its checks start, so the file the prefetch
+        # thread is parsing counts as well as the queued files
+        self._prefetch_slots = threading.Semaphore(max(1, prefetch))
+        self._written = queue.Queue(maxsize=max(1, write_queue))
+        self._stop = threading.Event()
+        self._prefetch_thread = None
+        self._writer_thread = None
+        self._writer_error = None
+
+    def __enter__(self) -> 'ValidationPipeline':
+        self._writer_thread = threading.Thread(target=self._write, name='report-writer')
+        self._writer_thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        if self._prefetch_thread is not None:
+            # the prefetch thread stops after the file it is reading
+            self._prefetch_thread.join()
+        # reports of validated files are still written
+        self._written.put(_DONE)
+        self._writer_thread.join()
+        if exc_type is None and self._writer_error is not None:
+            raise self._writer_error
+
+    def _acquire_slot(self) -> bool:
+        # waits for a free prefetch slot unless the pipeline is stopped
+        while not self._stop.is_set():
+            if self._prefetch_slots.acquire(timeout=0.1):
+                return True
+        return False
+
+    def _prefetch(self, files: Iterable[Union[Path, InputSource]]):
+        try:
+            for file in files:
+                if not self._acquire_slot():
+                    return
+                try:
+                    job = self._session.prepare(file, profile=self.options.profile, cache=self._cache, document_cache=self._document_cache,
+                                                  worker_pool=self._worker_pool)
+                    if not job.is_done() and job.needs_tree():
+                        try:
+                            job.document.tree
+                        except (etree.XMLSyntaxError, OSError):
+                            pass  # kept by the document and reported by the checks
+                except Exception as e:
+                    job = e
+                self._prefetched.put((file, job))
+        except Exception as e:
+            # listing the files failed
+            self._prefetched.put((None, e))
+        finally:
+            # archives are kept open per thread for the following members
+            close_archives()
+        self._prefetched.put(_DONE)
+
+    def _write(self):
+        while True:
+            item = self._written.get()
+            if item is _DONE:
+                return
+            if self._writer_error is not None:
+                continue  # drain the queue, the error is raised in the check stage
+            result, file = item
+            try:
+                write_result(result, file, self.output_directory, self.options)
+            except Exception as e:
+                logging.exception(f'Could not write the report of {file}')
+                self._writer_error = e
+
+    def run(self, files: Iterable[Union[Path, InputSource]]) -> Iterator[Tuple[Union[Path, InputSource], int, bool, bool]]:
+        """Validates the files in their order and queues their reports for writing.
+
+        Args:
+            files (Iterable[Union[Path, InputSource]]): The files, e.g. of get_files. Iterated by the prefetch thread.
+
+        Yields:
+            Tuple[Union[Path, InputSource], int, bool, bool]: The file, its number of issues, if the validation was successful
+                and if the result was restored from the cache, when the checks of the file are finished.
+        """
+        self._prefetch_thread = threading.Thread(target=self._prefetch, args=(files,), name='prefetch', daemon=True)
+        self._prefetch_thread.start()
+        while True:
+            item = self._prefetched.get()
+            if item is _DONE:
+                return
+            if self._writer_error is not None:
+                raise self._writer_error
+            file, job = item
+            if file is not None:
+                self._prefetch_slots.release()
+            if isinstance(job, Exception):
+                raise job
+
+            result, valid = self._session.run(job, self.options.checker_threads, self._worker_pool, self.options.needs_xpaths)
+            if not valid:
+                yield file, 0, False, False
+                continue
+            # the queued report must not keep the elements and so the tree of the checked file alive
+            result.resolve_xpaths()
+            # blocks while the writer is behind
+            self._written.put((result, file))
+            yield file, result.get_issues_count(), True, result.from_cache
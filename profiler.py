@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+import json
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILE_MODES = ['time', 'memory']
+
+
+def _get_max_rss() -> int:
+    """Returns the peak resident set size of this process in bytes or 0 if unknown."""
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CheckerProfile:
+    """Measured resources of a single checker run."""
+
+    bundle: str
+    checker_id: str
+    wall_time: float
+    cpu_time: float
+    peak_memory: int
+    issue_count: int
+
+    def __init__(self, bundle: str, checker_id: str, wall_time: float, cpu_time: float, peak_memory: int, issue_count: int) -> None:
+        """Constructs a CheckerProfile object.
+
+        Args:
+            bundle (str): Name of the checker bundle.
+            checker_id (str): ID of the checker.
+            wall_time (float): Elapsed time in seconds.
+            cpu_time (float): CPU time of the process in seconds.
+            peak_memory (int): Peak of allocated memory (memory mode) or growth of the peak RSS (time mode) in bytes.
+            issue_count (int): Number of issues generated by the checker.
+        """
+        self.bundle = bundle
+        self.checker_id = checker_id
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_memory = peak_memory
+        self.issue_count = issue_count
+
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this profile."""
+        return {
+            'bundle': self.bundle,
+            'checker_id': self.checker_id,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_memory': self.peak_memory,
+            'issue_count': self.issue_count
+        }
+
+
+class CheckProfiler:
+    """Records wall time, CPU time, peak memory and issue count for each checker of a validation.
+
+    In memory mode allocations are traced with tracemalloc, which slows down the checks.
+    In time mode the growth of the peak RSS of the process is recorded instead.
+    """
+
+    mode: str
+    profiles: List[CheckerProfile]
+
+    def __init__(self, mode: str = 'time') -> None:
+        """Constructs a CheckProfiler object.
+
+        Args:
+            mode (str, optional): time or memory. Defaults to 'time'.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Unknown profile mode {mode}, available: {", ".join(PROFILE_MODES)}')
+        self.mode = mode
+        self.profiles = []
+        self.total_time = 0.0
+
+    @contextmanager
+    def measure(self, bundle: str, checker):
+        """Context manager measuring the execution of a checker.
+
+        Args:
+            bundle (str): Name of the checker bundle.
+            checker (Checker): The checker of the result report the issues are generated for.
+        """
+        trace_memory = self.mode == 'memory'
+        started_tracing = False
+        if trace_memory:
+            # imported when memory is profiled, it is not needed by a plain validation
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        else:
+            memory_start = _get_max_rss()
+        issues_start = len(checker._issues)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            cpu_time = time.process_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            if trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1] - memory_start
+                if started_tracing:
+                    tracemalloc.stop()
+            else:
+                peak_memory = _get_max_rss() - memory_start
+            self.total_time += wall_time
+            self.profiles.append(CheckerProfile(bundle, checker.checker_id, wall_time, cpu_time, peak_memory, len(checker._issues) - issues_start))
+
+    def get_bundle_totals(self) -> Dict[str, dict]:
+        """Returns the summed wall time, CPU time, issue count and maximal peak memory per bundle."""
+        totals = {}
+        for profile in self.profiles:
+            total = totals.setdefault(profile.bundle, {'wall_time': 0.0, 'cpu_time': 0.0, 'peak_memory': 0, 'issue_count': 0})
+            total['wall_time'] += profile.wall_time
+            total['cpu_time'] += profile.cpu_time
+            total['peak_memory'] = max(total['peak_memory'], profile.peak_memory)
+            total['issue_count'] += profile.issue_count
+        return totals
+
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of all measurements."""
+        return {
+            'mode': self.mode,
+            'total_time': self.total_time,
+            'bundles': self.get_bundle_totals(),
+            'checkers': [profile.toJSON() for profile in self.profiles]
+        }
+
+    def write_as_json(self, file: Path):
+        """Writes the measurements as JSON file.
+
+        Args:
+            file (Path): The path of the JSON file.
+        """
+        with open(file, 'w') as f:
+            json.dump(self.toJSON(), f, indent=4)
+
+    def get_as_collapsed_stacks(self, root: str) -> List[str]:
+        """Returns the wall times in the collapsed stack format of flamegraph tools (root;bundle;checker microseconds).
+
+        Args:
+            root (str): Name of the root frame, e.g. the name of the checked file.
+
+        Returns:
+            List[str]: One line per checker.
+        """
+        lines = []
+        for profile in self.profiles:
+            frames = [root, profile.bundle, profile.checker_id]
+            # ; separates frames in the collapsed format
+            stack = ';'.join(frame.replace(';', ',') for frame in frames)
+            lines.append(f'{stack} {round(profile.wall_time * 1000000)}')
+        return lines
+
+    def write_as_collapsed_stacks(self, file: Path, root: str):
+        """Writes the wall times in the collapsed stack format, e.g. for flamegraph.pl or speedscope.
+
+        Args:
+            file (Path): The path of the output file.
+            root (str): Name of the root frame, e.g. the name of the checked file.
+        """
+        with open(file, 'w') as f:
+            for line in self.get_as_collapsed_stacks(root):
+                f.write("%s\n" % line)
@@ -0,0 +1,259 @@
+from typing import Dict, List, Tuple
+from lxml import etree
+
+
+# (tag, id attribute, element type) of the referable elements per format extension
+DEFINITION_RULES = {
+    'xodr': [
+        ('road', 'id', 'road'),
+        ('junction', 'id', 'junction'),
+        ('junctionGroup', 'id', 'junctionGroup'),
+        ('controller', 'id', 'controller'),
+        ('signal', 'id', 'signal'),
+        ('object', 'id', 'object'),
+        ('station', 'id', 'station'),
+    ],
+    'xosc': [
+        ('ScenarioObject', 'name', 'entity'),
+        ('EntitySelection', 'name', 'entity'),
+        ('Story', 'name', 'story'),
+        ('Act', 'name', 'act'),
+        ('ManeuverGroup', 'name', 'maneuverGroup'),
+        ('Maneuver', 'name', 'maneuver'),
+        ('Event', 'name', 'event'),
+        ('Action', 'name', 'action'),
+        ('ParameterDeclaration', 'name', 'parameter'),
+        ('VariableDeclaration', 'name', 'variable'),
+        ('TrafficSignalController', 'name', 'trafficSignalController'),
+    ]
+}
+
+# (tag, reference attribute, element type) of the references per format extension.
+# The tag '*' matches all elements. An element type starting with '@' is read from that attribute of the element.
+REFERENCE_RULES = {
+    'xodr': [
+        ('predecessor', 'elementId', '@elementType'),
+        ('successor', 'elementId', '@elementType'),
+        ('road', 'junction', 'junction'),
+        ('connection', 'incomingRoad', 'road'),
+        ('connection', 'connectingRoad', 'road'),
+        ('connection', 'linkedRoad', 'road'),
+        ('priority', 'high', 'road'),
+        ('priority', 'low', 'road'),
+        ('junctionReference', 'junction', 'junction'),
+        ('control', 'signalId', 'signal'),
+        ('signalReference', 'id', 'signal'),
+        ('dependency', 'id', 'signal'),
+        ('objectReference', 'id', 'object'),
+        ('segment', 'roadId', 'road'),
+    ],
+    'xosc': [
+        ('*', 'entityRef', 'entity'),
+        ('*', 'masterEntityRef', 'entity'),
+        ('StoryboardElementStateCondition', 'storyboardElementRef', '@storyboardElementType'),
+        ('ParameterSetAction', 'parameterRef', 'parameter'),
+        ('ParameterModifyAction', 'parameterRef', 'parameter'),
+        ('ParameterCondition', 'parameterRef', 'parameter'),
+        ('VariableSetAction', 'variableRef', 'variable'),
+        ('VariableModifyAction', 'variableRef', 'variable'),
+        ('VariableCondition', 'variableRef', 'variable'),
+        ('TrafficSignalControllerAction', 'trafficSignalControllerRef', 'trafficSignalController'),
+        ('TrafficSignalControllerCondition', 'trafficSignalControllerRef', 'trafficSignalController'),
+        ('TrafficSignalController', 'reference', 'trafficSignalController'),
+    ]
+}
+
+# values which do not reference an element, e.g. road junction="-1"
+NO_REFERENCE_VALUES = {
+    'xodr': {'-1', ''},
+    'xosc': {''}
+}
+
+
+class Reference:
+    """A reference of an element to another element by type and id."""
+
+    __slots__ = ('element', 'attribute', 'target_type', 'target_id')
+
+    element: etree._Element
+    attribute: str
+    target_type: str
+    target_id: str
+
+    def __init__(self, element: etree._Element, attribute: str, target_type: str, target_id: str) -> None:
+        """Constructs a Reference object.
+
+        Args:
+            element (etree._Element): The referencing element.
+            attribute (str): Attribute of the referencing element holding the id.
+            target_type (str): Type of the referenced element, e.g. road or entity.
+            target_id (str): Id of the referenced element.
+        """
+        self.element = element
+        self.attribute = attribute
+        self.target_type = target_type
+        self.target_id = target_id
+
+    @property
+    def sourceline(self) -> int:
+        """Line of the referencing element in the file."""
+        return self.element.sourceline
+
+    def __repr__(self) -> str:
+        return f'Reference({self.element.tag}@{self.attribute} -> {self.target_type} {self.target_id!r}, line {self.sourceline})'
+
+
+class ReferenceIndex:
+    """Index of the referable elements of a document by (element type, id) and of the references between them.
+
+    The index is built with a single pass over the document. The rules for the element types and references
+    are selected by the format extension (see DEFINITION_RULES and REFERENCE_RULES). References whose id
+    is a parameter ($name in OpenSCENARIO) are resolved at runtime and not indexed.
+    """
+
+    format_extension: str
+    _definitions: Dict[Tuple[str, str], List[etree._Element]]
+    _references: List[Reference]
+    _references_to: Dict[Tuple[str, str], List[Reference]]
+
+    def __init__(self, root: etree._Element, format_extension: str) -> None:
+        """Constructs a ReferenceIndex object.
+
+        Args:
+            root (etree._Element): Root element of the indexed document.
+            format_extension (str): Extension of the format, e.g. xodr or xosc.
+        """
+        self.format_extension = format_extension
+        self._definitions = {}
+        self._references = []
+        self._references_to = {}
+        self._build(root)
+
+    def _build(self, root: etree._Element):
+        definition_rules = {}
+        for tag, attribute, element_type in DEFINITION_RULES.get(self.format_extension, []):
+            definition_rules.setdefault(tag, []).append((attribute, element_type))
+        reference_rules = {}
+        for tag, attribute, element_type in REFERENCE_RULES.get(self.format_extension, []):
+            reference_rules.setdefault(tag, []).append((attribute, element_type))
+        any_tag_rules = reference_rules.pop('*', [])
+        no_reference_values = NO_REFERENCE_VALUES.get(self.format_extension, set())
+
+        definitions = self._definitions
+        references = self._references
+        references_to = self._references_to
+        for el in root.iter():
+            tag = el.tag
+            if not isinstance(tag, str):  # comments and processing instructions
+                continue
+            for attribute, element_type in definition_rules.get(tag, ()):
+                identifier = el.get(attribute)
+                if identifier is not None:
+                    definitions.setdefault((element_type, identifier), []).append(el)
+            rules = reference_rules.get(tag)
+            for attribute, element_type in (rules + any_tag_rules if rules else any_tag_rules):
+                identifier = el.get(attribute)
+                if identifier is None or identifier in no_reference_values or identifier.startswith('$'):
+                    continue
+                if element_type.startswith('@'):
+                    element_type = el.get(element_type[1:])
+                    if element_type is None:
+                        continue
+                reference = Reference(el, attribute, element_type, identifier)
+                references.append(reference)
+                references_to.setdefault((element_type, identifier), []).append(reference)
+
+    def get(self, element_type: str, identifier: str) -> etree._Element:
+        """Returns the element with the given type and id.
+
+        Args:
+            element_type (str): Type of the element, e.g. road, junction or entity.
+            identifier (str): Id (OpenSCENARIO: name) of the element.
+
+        Returns:
+            etree._Element: The first element with the id in document order or None if not found.
+        """
+        elements = self._definitions.get((element_type, identifier))
+        return elements[0] if elements else None
+
+    def get_all(self, element_type: str, identifier: str) -> List[etree._Element]:
+        """Returns all elements with the given type and id, more than one if the id is not unique.
+
+        Args:
+            element_type (str): Type of the elements.
+            identifier (str): Id of the elements.
+
+        Returns:
+            List[etree._Element]: The found elements in document order.
+        """
+        return self._definitions.get((element_type, identifier), [])
+
+    def get_sourceline(self, element_type: str, identifier: str) -> int:
+        """Returns the line of the element with the given type and id in the file or None if not found."""
+        el = self.get(element_type, identifier)
+        return el.sourceline if el is not None else None
+
+    def get_ids(self, element_type: str) -> List[str]:
+        """Returns the ids of all elements of a type in document order of their first definition.
+
+        Args:
+            element_type (str): Type of the elements.
+
+        Returns:
+            List[str]: The ids.
+        """
+        return [identifier for definition_type, identifier in self._definitions if definition_type == element_type]
+
+    def get_references(self, target_type: str = None) -> List[Reference]:
+        """Returns all indexed references in document order.
+
+        Args:
+            target_type (str, optional): Only return references to elements of this type. Defaults to None.
+
+        Returns:
+            List[Reference]: The references.
+        """
+        if target_type is None:
+            return self._references
+        return [reference for reference in self._references if reference.target_type == target_type]
+
+    def get_references_to(self, element_type: str, identifier: str) -> List[Reference]:
+        """Returns the references to an element (reverse adjacency), also if the element does not exist.
+
+        Args:
+            element_type (str): Type of the referenced element.
+            identifier (str): Id of the referenced element.
+
+        Returns:
+            List[Reference]: The referencing elements in document order.
+        """
+        return self._references_to.get((element_type, identifier), [])
+
+    def resolve(self, reference: Reference) -> etree._Element:
+        """Returns the element a reference points to or None if it is dangling."""
+        return self.get(reference.target_type, reference.target_id)
+
+    def get_dangling_references(self, target_type: str = None) -> List[Reference]:
+        """Returns the references to elements which do not exist in the document.
+
+        Args:
+            target_type (str, optional): Only return references to elements of this type. Defaults to None.
+
+        Returns:
+            List[Reference]: The dangling references in document order.
+        """
+        definitions = self._definitions
+        return [reference for reference in self.get_references(target_type)
+                if (reference.target_type, reference.target_id) not in definitions]
+
+    def get_duplicates(self, element_type: str = None) -> Dict[Tuple[str, str], List[etree._Element]]:
+        """Returns the (element type, id) keys which are defined more than once.
+
+        Args:
+            element_type (str, optional): Only return elements of this type. Defaults to None.
+
+        Returns:
+            Dict[Tuple[str, str], List[etree._Element]]: The elements per key.
+        """
+        return {key: elements for key, elements in self._definitions.items()
+                if len(elements) > 1 and (element_type is None or key[0] == element_type)}
@@ -0,0 +1,279 @@
+from result_report import ResultReport
+from pathlib import Path
+from typing import Dict, Tuple, Union
+from input_source import InputSource, as_source, resolve_reference
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import threading
+
+# increase if the stored reports are no longer compatible with the framework
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'OpenValidator' / 'results'
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024
+
+
+class ResultCache:
+    """On-disk cache of result reports of successful validations.
+
+    Reports are stored by a key of the file content, the config, the format settings and the fingerprint of the
+    loaded checker modules. Entries are evicted in least recently used order if the cache grows above its maximal size.
+    Entries are written atomically, so several processes can share the cache directory.
+
+    Documents loaded through CheckerData.get_referenced_document (e.g. road networks of scenarios) are stored
+    with their digests, a report is only reused if they did not change.
+
+    The reports are pickled and loading a pickle can execute code, so the cache is only used if its directory
+    is owned by the user and not writable by group or others.
+    """
+
+    directory: Path
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        """Constructs a ResultCache object.
+
+        Args:
+            directory (Path, optional): Cache directory, created if it does not exist. Defaults to DEFAULT_CACHE_DIR.
+            max_size (int, optional): Maximal size of all stored reports in bytes. Defaults to DEFAULT_CACHE_SIZE.
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._trusted = None
+        self._lock = threading.Lock()
+
+    def is_trusted(self) -> bool:
+        """Returns if the cache directory is owned by the user and not writable by others. The directory is created
+        only accessible by the user if it does not exist. Checked once, an untrusted cache is not used.
+        """
+        with self._lock:
+            if self._trusted is None:
+                self._trusted = _is_private_directory(self.directory)
+                if not self._trusted:
+                    logging.warning(f'Result cache {self.directory} is not owned by the user or is writable by others, the cache is not used')
+            return self._trusted
+
+    def get_key(self, file: Union[Path, InputSource], config: dict, format_settings: dict, plan_fingerprint: str, isolation: tuple = None) -> str:
+        """Returns the cache key of a validation.
+
+        Args:
+            file (Union[Path, InputSource]): The validated file.
+            config (dict): The loaded config.
+            format_settings (dict): The loaded format settings.
+            plan_fingerprint (str): Fingerprint of the checker modules, see CheckPlan.get_fingerprint.
+            isolation (tuple, optional): Default time and memory limits of isolated checkers or None without isolation. Defaults to None.
+
+        Returns:
+            str: The key.
+        """
+        h = hashlib.sha256()
+        h.update(f'{CACHE_VERSION}\n'.encode())
+        h.update(as_source(file).get_digest().encode())
+        h.update(json.dumps(config, sort_keys=True, default=str).encode())
+        h.update(json.dumps(format_settings, sort_keys=True, default=str).encode())
+        h.update(plan_fingerprint.encode())
+        h.update(f'\n{isolation}'.encode())
+        return h.hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}.pickle'
+
+    def load(self, key: str, file: Union[Path, InputSource] = None) -> ResultReport:
+        """Returns the stored report for a key and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+            file (Union[Path, InputSource], optional): The validated file, relative references of the report are resolved
+                against it. Defaults to None.
+
+        Returns:
+            ResultReport: The stored report or None if the key is not cached or a referenced document changed.
+        """
+        path = self._get_path(key)
+        try:
+            if not self.is_trusted():
+                raise FileNotFoundError()
+            with open(path, 'rb') as f:
+                report, references = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            report = None
+        except Exception:
+            logging.exception(f'Could not load cached result {path}')
+            report = None
+
+        if report is not None:
+            for reference, digest in references:
+                if get_reference_digest(file, reference) != digest:
+                    logging.debug(f'Referenced document {reference} changed, validating {file} again')
+                    report = None
+                    break
+
+        with self._lock:
+            if report is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return report
+
+    def store(self, key: str, report: ResultReport, file: Union[Path, InputSource] = None):
+        """Stores a report and evicts the least recently used reports if the cache is too large.
+
+        Args:
+            key (str): The cache key.
+            report (ResultReport): The report of a successful validation.
+            file (Union[Path, InputSource], optional): The validated file, relative references of the report are resolved
+                against it. Defaults to None.
+        """
+        if not self.is_trusted():
+            return
+        # share the XPath strings of locations referring to the same element
+        report.resolve_xpaths()
+        referenced_documents = report.referenced_documents
+        references = []
+        for reference in dict.fromkeys(referenced_documents):
+            references.append((reference, get_reference_digest(file, reference)))
+        profile = report.profile
+        try:
+            report.profile = None
+            report.referenced_documents = []
+            data = pickle.dumps((report, references), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            logging.exception('Could not serialize result for the cache')
+            return
+        finally:
+            report.profile = profile
+            report.referenced_documents = referenced_documents
+
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            logging.exception(f'Could not write cached result {path}')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._get_entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_size:
+                self._evict()
+
+    def _get_entries(self):
+        entries = []
+        for entry_path in self.directory.glob('*/*.pickle'):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return entries
+
+    def _evict(self):
+        # shrink below 90% of the maximal size, so not every store evicts
+        entries = sorted(self._get_entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_size * 0.9
+        for _, entry_size, entry_path in entries:
+            if size <= target:
+                break
+            try:
+                entry_path.unlink()
+                logging.debug(f'Evicted cached result {entry_path}')
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+
+def _is_private_directory(directory: Path) -> bool:
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        status = os.stat(directory)
+    except OSError:
+        logging.exception(f'Could not create the result cache {directory}')
+        return False
+    if not hasattr(os, 'getuid'):
+        return True  # no owner and mode bits on Windows
+    return status.st_uid == os.getuid() and not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def get_reference_digest(file: Union[Path, InputSource], reference: Union[str, Path, InputSource]) -> str:
+    """Returns the sha256 hex digest of a document referenced by a file or None if it cannot be read.
+
+    Args:
+        file (Union[Path, InputSource]): The referencing file.
+        reference (Union[str, Path, InputSource]): The reference as passed to CheckerData.get_referenced_document.
+
+    Returns:
+        str: The digest.
+    """
+    if not isinstance(reference, InputSource):
+        reference = resolve_reference(file, str(reference))
+    try:
+        return as_source(reference).get_digest()
+    except (OSError, KeyError):
+        return None
+
+
+def restore_report(report: ResultReport, checked_file: Union[Path, InputSource], file: Union[Path, InputSource], format_settings: dict) -> ResultReport:
+    """Adapts a report loaded from the cache to the file it is used for.
+    The cache key only depends on the content, so the report could stem from a copy of the file.
+
+    Args:
+        report (ResultReport): The cached report.
+        checked_file (Union[Path, InputSource]): The path of the file as provided to validate.
+        file (Union[Path, InputSource]): The resolved path of the file.
+        format_settings (dict): The format settings.
+
+    Returns:
+        ResultReport: The adapted report.
+    """
+    report.checked_file = checked_file
+    param_name = format_settings['extension'].capitalize() + 'File'
+    for bundle in report._checker_bundles:
+        if param_name in bundle.params:
+            bundle.params[param_name] = str(file)
+    report.from_cache = True
+    return report
+
+
+_caches: Dict[Tuple[str, int], ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(directory: Path = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_CACHE_SIZE) -> ResultCache:
+    """Returns the result cache of this process for a cache directory.
+
+    Args:
+        directory (Path, optional): Cache directory. Defaults to DEFAULT_CACHE_DIR.
+        max_size (int, optional): Maximal size of the cache in bytes. Defaults to DEFAULT_CACHE_SIZE.
+
+    Returns:
+        ResultCache: The cache.
+    """
+    key = (str(directory), max_size)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ResultCache(directory, max_size)
+            _caches[key] = cache
+        return cache
@@ -1,8 +1,9 @@
-from typing import List, Dict, Union
+from typing import BinaryIO, List, Dict, Union
 from datetime import datetime
 from pathlib import Path
 from lxml import etree
 from enum import Enum
+from io import BytesIO
 from abc import ABC
 
 import logging
@@ -30,11 +31,42 @@ def get_IssueLevel_from_str(level: str) -> IssueLevel:
         return IssueLevel.WARNING
     return IssueLevel.INFORMATION
 
+_ISSUE_LEVEL_JSON = {level: str(level) for level in IssueLevel}
+
+
+ISSUE_LOG_MODES = ['all', 'sampled', 'summary', 'off']
+
+issue_logger = logging.getLogger(__name__)
+
+
+class IssueLogSettings:
+    """Settings for logging generated issues, see set_issue_logging."""
+    mode: str = 'all'
+    sample_rate: int = 100
+
+
+def set_issue_logging(mode: str = 'all', sample_rate: int = 100):
+    """Configures how generated issues are logged.
+
+    Args:
+        mode (str, optional): all - log every issue, sampled - log every sample_rate-th issue of a checker
+            and a summary per checker, summary - log only a summary per checker, off - log nothing. Defaults to 'all'.
+        sample_rate (int, optional): Log every n-th issue in sampled mode. Defaults to 100.
+    """
+    if mode not in ISSUE_LOG_MODES:
+        raise ValueError(f'Unknown issue log mode {mode}, available: {", ".join(ISSUE_LOG_MODES)}')
+    IssueLogSettings.mode = mode
+    IssueLogSettings.sample_rate = max(1, sample_rate)
+
 
 class Location(ABC):
     """Empty abstract class for validation locations.
     Location of an validation issue can refer to an file, line, position, ...
+
+    Locations and issues use __slots__, as reports can hold hundreds of thousands of them.
     """
+    __slots__ = ()
+
     class_type: int
 
     def __lt__(self, other):
@@ -50,6 +82,9 @@ class FileLocation(Location):
         Location (Location): Extends abstract location class.
     """
 
+    __slots__ = ('file_type', 'row', 'column')
+
+    class_type = 0
     file_type: str
     row: int
     column: int
@@ -67,7 +102,10 @@ class FileLocation(Location):
         self.file_type = '1' # Todo ask Cariad
         self.row = row
         self.column = column
-        self.class_type = 0
+
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this location."""
+        return {'class_type': self.class_type, 'column': self.column, 'file_type': self.file_type, 'row': self.row}
 
 
 class XmlLocation(Location):
@@ -77,28 +115,80 @@ class XmlLocation(Location):
         Location (Location): Extends abstract location class.
     """
 
-    xpath: str
+    __slots__ = ('_xpath', '_element')
+
+    class_type = 1
 
     def __init__(self,
                  xpath: Union[str, etree._Element] = None) -> None:
         """Constructs a XmlLocation object.
 
+        If an element is provided, its XPath is computed on first access of xpath and not on construction.
+
         Args:
-            file (Path, optional): Path of the file the issue refers to. Defaults to None.
-            xpath (str, optional): XPath location in the refered file. Defaults to None.
+            xpath (Union[str, etree._Element], optional): XPath location in the refered file or the referred element. Defaults to None.
         """
         super().__init__()
+        self._xpath = None
+        self._element = None
         if xpath is not None:
             if isinstance(xpath, str):
-                self.xpath = xpath
+                self._xpath = xpath
             elif isinstance(xpath, etree._Element):
-                # ToDo check if this produces a valid xpath beginning from root node
-                el: etree._Element = xpath
-                tree = etree.ElementTree(el)
-                self.xpath = tree.getpath(el)
+                self._element = xpath
             else:
                 logging.error(f'Unknown type of provided XPath: {type(xpath)}')
-        self.class_type = 1
+
+    @property
+    def xpath(self) -> str:
+        """XPath location in the refered file, computed from the referred element on first access."""
+        if self._element is not None:
+            self.resolve()
+        return self._xpath
+
+    @xpath.setter
+    def xpath(self, xpath: str):
+        self._xpath = xpath
+        self._element = None
+
+    @property
+    def element(self) -> etree._Element:
+        """The referred element or None if the XPath is already computed."""
+        return self._element
+
+    def resolve(self, xpaths: Dict[etree._Element, str] = None):
+        """Computes the XPath of the referred element and releases the element.
+
+        Args:
+            xpaths (Dict[etree._Element, str], optional): Already computed XPaths by element,
+                extended by the computed XPath. Defaults to None.
+        """
+        el = self._element
+        if el is None:
+            return
+        if xpaths is None:
+            self._xpath = get_element_xpath(el)
+        else:
+            xpath = xpaths.get(el)
+            if xpath is None:
+                xpath = get_element_xpath(el)
+                xpaths[el] = xpath
+            self._xpath = xpath
+        self._element = None
+
+    def release(self):
+        """Releases the referred element without computing its XPath, e.g. for outputs without XPaths."""
+        self._element = None
+
+    def __reduce__(self):
+        # elements cannot be pickled, so the XPath is resolved
+        return (XmlLocation, (self.xpath,))
+
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this location."""
+        if self.xpath is None:
+            return {'class_type': self.class_type}
+        return {'class_type': self.class_type, 'xpath': self.xpath}
 
 
 class RoadLocation(Location):
@@ -108,6 +198,9 @@ class RoadLocation(Location):
         Location (Location): Extends abstract location class.
     """
 
+    __slots__ = ('road_id', 's', 't')
+
+    class_type = 2
     road_id: str
     s: str
     t: str
@@ -127,7 +220,22 @@ class RoadLocation(Location):
         self.road_id = road_id
         self.s = s
         self.t = t
-        self.class_type = 2
+
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this location."""
+        return {'class_type': self.class_type, 'road_id': self.road_id, 's': self.s, 't': self.t}
+
+
+def get_element_xpath(el: etree._Element) -> str:
+    """Returns the absolute XPath of an element, beginning from the root node of its document.
+
+    Args:
+        el (etree._Element): The element.
+
+    Returns:
+        str: The XPath, e.g. /OpenDRIVE/road[2]/planView.
+    """
+    return el.getroottree().getpath(el)
 
 
 def create_location_for_road(el: etree._Element, roadID: int, s: float, t: float) -> List[Location]:
@@ -165,6 +273,8 @@ def create_location_from_element(el: etree._Element) -> List[Location]:
 class Issue:
     """Class representing a validation issue."""
 
+    __slots__ = ('_identifier', 'level', 'description', 'locations', 'external')
+
     identifier: uuid.UUID
     level: IssueLevel
     description: str
@@ -192,8 +302,71 @@ class Issue:
         self.locations = locations
         self.external = external
 
+    @property
+    def identifier(self) -> uuid.UUID:
+        """Identifier of the issue. Kept as 128 bit integer and converted on access."""
+        return uuid.UUID(int=self._identifier) if self._identifier is not None else None
+
+    @identifier.setter
+    def identifier(self, identifier: uuid.UUID):
+        self._identifier = identifier.int if identifier is not None else None
+
+    # occurrences of the issue, only more than one for an AggregatedIssue
+    count = 1
+
     def __lt__(self, other):
-        return self.identifier < other.identifier           
+        return self._identifier < other._identifier
+
+    def get_report_description(self) -> str:
+        """Returns the description with the number of occurrences of an aggregated issue for XQAR and text reports."""
+        if self.count == 1:
+            return self.description
+        return f'{self.description} ({self.count} occurrences)'
+
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this issue."""
+        # the count of aggregated issues is the first key in sorted order
+        issue_json = {'count': self.count} if self.count != 1 else {}
+        issue_json['description'] = self.description
+        issue_json['external'] = self.external
+        issue_json['identifier'] = str(self.identifier) if self.identifier is not None else None
+        issue_json['level'] = _ISSUE_LEVEL_JSON.get(self.level)
+        issue_json['locations'] = [location.toJSON() for location in self.locations] if self.locations is not None else None
+        return issue_json
+
+
+class AggregatedIssue(Issue):
+    """Issue standing for all issues of a checker with the same level and description.
+
+    Only the locations of the first occurrences are kept as samples, see Checker.set_issue_limits.
+    """
+
+    __slots__ = ('count',)
+
+    count: int
+
+    def __init__(self,
+                 identifier: uuid.UUID = None,
+                 level: IssueLevel = None,
+                 description: str = None,
+                 locations: List[Location] = None,
+                 external: object = None,
+                 count: int = 1) -> None:
+        """Constructs a AggregatedIssue object.
+
+        Args:
+            identifier (uuid.UUID, optional): Identifier of the issue. Defaults to None.
+            level (IssueLevel, optional): Severity level of the issue. Defaults to None.
+            description (str, optional): Description of the issue. Defaults to None.
+            locations (List[Location], optional): Sample locations of the occurrences. Defaults to None.
+            external (object, optional): External links the issue refers to. Defaults to None.
+            count (int, optional): Number of occurrences. Defaults to 1.
+        """
+        super().__init__(identifier, level, description, locations, external)
+        self.count = count
+
+
+DEFAULT_SAMPLE_LOCATIONS = 5
 
 
 class Checker:
@@ -202,6 +375,15 @@ class Checker:
     _issues: List[Issue]
     checker_id: str
     description: str
+    # issue limits, see set_issue_limits. Class defaults, so reports restored from older cache entries have them
+    max_issues: int = None
+    aggregate_issues: bool = False
+    sample_locations: int = DEFAULT_SAMPLE_LOCATIONS
+    truncated: int = 0
+    _limited: bool = False
+    _full: bool = False
+    _aggregated: Dict[tuple, AggregatedIssue] = None
+    _sampled_locations: List[Location] = ()
 
     def __init__(self, checker_id: str = None, description: str = None):
         """Constructs a Checker object.
@@ -217,14 +399,60 @@ class Checker:
     def __lt__(self, other):
         return self.checker_id < other.checker_id
 
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this checker."""
+        checker_json = {
+            '_issues': [issue.toJSON() for issue in self._issues],
+            'checker_id': self.checker_id,
+            'description': self.description
+        }
+        if self.truncated:
+            checker_json['truncated'] = self.truncated
+        return checker_json
+
+    def set_issue_limits(self, max_issues: int = None, aggregate_issues: bool = False, sample_locations: int = DEFAULT_SAMPLE_LOCATIONS):
+        """Limits the issues kept by this checker, e.g. for a faulty input producing the same issue for every element.
+
+        Issues beyond max_issues are only counted as truncated: they get no identifier, are not logged and not reported.
+
+        Args:
+            max_issues (int, optional): Maximal number of reported issues. Defaults to None for no limit.
+            aggregate_issues (bool, optional): Report issues with the same level and description as one AggregatedIssue
+                with their count. Defaults to False.
+            sample_locations (int, optional): Number of occurrences of an aggregated issue whose locations are kept.
+                Defaults to DEFAULT_SAMPLE_LOCATIONS.
+        """
+        self.max_issues = max_issues
+        self.aggregate_issues = aggregate_issues
+        self.sample_locations = sample_locations
+        self._limited = max_issues is not None or aggregate_issues
+        self._full = max_issues is not None and len(self._issues) >= max_issues
+        self._aggregated = {} if aggregate_issues else None
+        # sample locations added to already reported issues, see xml_stream
+        self._sampled_locations = []
+
+    def is_truncated(self) -> bool:
+        """Returns if issues were dropped because of max_issues."""
+        return self.truncated > 0
+
     def add_issue(self, issue: Issue):
         """Adds an issue to the list of issues for this checker.
 
         Args:
             issue (Issue): The issue to be attached.
         """
-        logging.info(f"  {self.checker_id}: {issue.description}")
-        self._issues.append(issue)
+        if self._limited:
+            if self._merge_issue(issue.level, issue.description, issue.locations, issue.count) is not None:
+                return
+            if self._full:
+                self.truncated += issue.count
+                return
+            if self.aggregate_issues and not isinstance(issue, AggregatedIssue):
+                issue = AggregatedIssue(issue.identifier, issue.level, issue.description, issue.locations, issue.external)
+            self._append_limited(issue)
+        else:
+            self._issues.append(issue)
+        self._log_issue(issue.description)
 
     def gen_issue(self, level: IssueLevel = None,
                  description: str = None,
@@ -239,20 +467,81 @@ class Checker:
             external (object, optional): External link of the issue. Defaults to None.
 
         Returns:
-            Issue: the generated issue.
+            Issue: the generated issue. With issue limits the aggregated issue of the occurrence
+                or an unreported issue if max_issues is reached.
         """
-        logging.info(f"  {self.checker_id}: {description}")
-        issue = Issue(uuid.uuid4(), level, description, locations, external)
-        self._issues.append(issue)
+        if self._limited:
+            issue = self._merge_issue(level, description, locations)
+            if issue is not None:
+                return issue
+            if self._full:
+                # only counted, the caller still gets an issue to work with
+                self.truncated += 1
+                return Issue(None, level, description, locations, external)
+            if self.aggregate_issues:
+                issue = AggregatedIssue(uuid.uuid4(), level, description, locations, external)
+            else:
+                issue = Issue(uuid.uuid4(), level, description, locations, external)
+            self._append_limited(issue)
+        else:
+            issue = Issue(uuid.uuid4(), level, description, locations, external)
+            self._issues.append(issue)
+        self._log_issue(description)
+        return issue
+
+    def _merge_issue(self, level: IssueLevel, description: str, locations: List[Location], count: int = 1) -> AggregatedIssue:
+        # returns the aggregated issue the occurrence was counted for or None
+        if self._aggregated is None:
+            return None
+        issue = self._aggregated.get((level, description))
+        if issue is None:
+            return None
+        if locations and issue.count < self.sample_locations:
+            if issue.locations is None:
+                issue.locations = []
+            issue.locations.extend(locations)
+            self._sampled_locations.extend(locations)
+        issue.count += count
         return issue
 
+    def _append_limited(self, issue: Issue):
+        self._issues.append(issue)
+        if self._aggregated is not None:
+            # the samples of further occurrences are added, so the list of the caller is not changed
+            if issue.locations is not None:
+                issue.locations = list(issue.locations)
+            self._aggregated[(issue.level, issue.description)] = issue
+        if self.max_issues is not None and len(self._issues) >= self.max_issues:
+            self._full = True
+
+    def _log_issue(self, description: str):
+        mode = IssueLogSettings.mode
+        if mode == 'all' or (mode == 'sampled' and (len(self._issues) - 1) % IssueLogSettings.sample_rate == 0):
+            # the message is only formatted if the logger is enabled for info
+            issue_logger.info('  %s: %s', self.checker_id, description, stacklevel=3)
+
+    def log_summary(self):
+        """Logs the number of issues of this checker if issues are logged sampled or summarized."""
+        if IssueLogSettings.mode in ('sampled', 'summary'):
+            issue_logger.info('  %s: %s', self.checker_id, self.get_summary())
+
+    def get_issues_count(self) -> int:
+        """Returns the number of occurrences of the reported issues, an AggregatedIssue counts all its occurrences.
+        Truncated issues are not included, see truncated.
+        """
+        return sum(issue.count for issue in self._issues)
+
     def get_summary(self):
         """Generates a string summary of the checker.
 
         Returns:
             str: String summary of the checker.
         """
-        return f'Found {len(self._issues)} issue' if len(self._issues) == 1 else f'Found {len(self._issues)} issues'
+        count = self.get_issues_count()
+        summary = f'Found {count} issue' if count == 1 else f'Found {count} issues'
+        if self.truncated:
+            summary += f', truncated {self.truncated} more (max_issues {self.max_issues})'
+        return summary
 
 
 class CheckerBundle:
@@ -281,6 +570,16 @@ class CheckerBundle:
     def __lt__(self, other):
         return self.name < other.name          
 
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this checker bundle."""
+        return {
+            '_checkers': [checker.toJSON() for checker in self._checkers],
+            'description': self.description,
+            'name': self.name,
+            'params': dict(sorted(self.params.items())),
+            'version': self.version
+        }
+
     def add_checker(self, checker: Checker):
         """Appends a checker to the list in this bundle.
 
@@ -309,8 +608,12 @@ class CheckerBundle:
         Returns:
             str: String summary of the checker bundle.
         """
-        incidents = sum([len(checker._issues) for checker in self._checkers])
-        return f'Found {incidents} incident' if incidents == 1 else f'Found {incidents} incidents'
+        incidents = sum([checker.get_issues_count() for checker in self._checkers])
+        summary = f'Found {incidents} incident' if incidents == 1 else f'Found {incidents} incidents'
+        truncated = sum([checker.truncated for checker in self._checkers])
+        if truncated:
+            summary += f', truncated {truncated} more'
+        return summary
     
     def get_build_date(self):
         """Returns the build date of the checker bundle.
@@ -342,12 +645,96 @@ def dumper(obj):
         return obj.__dict__
 
 
+XQAR_VERSION = '1.0.0'
+
+
+def _get_xqar_declaration() -> bytes:
+    # the declaration of ElementTree.write(xml_declaration=True, encoding='utf-8') of the former writer,
+    # the case of the encoding name differs between lxml versions and serialization functions
+    buffer = BytesIO()
+    etree.ElementTree(etree.Element('CheckerResults')).write(buffer, xml_declaration=True, encoding='utf-8')
+    return buffer.getvalue().split(b'\n', 1)[0] + b'\n'
+
+
+XQAR_DECLARATION = _get_xqar_declaration()
+
+
+def get_xqar_bundle_attributes(bundle: CheckerBundle) -> Dict[str, str]:
+    """Returns the XQAR attributes of a CheckerBundle element in XQAR order."""
+    return {
+        'build_date': bundle.get_build_date(),
+        'description': bundle.description,
+        'name': bundle.name,
+        'summary': bundle.get_summary(),
+        'version': str(bundle.version)
+    }
+
+
+def get_xqar_checker_attributes(checker: Checker) -> Dict[str, str]:
+    """Returns the XQAR attributes of a Checker element in XQAR order."""
+    return {
+        'checkerId': checker.checker_id,
+        'description': checker.description,
+        'summary': checker.get_summary()
+    }
+
+
+def gen_xqar_param_element(parent: etree._Element, name: str, value: str) -> etree._Element:
+    """Generates a XQAR Param element, as child of parent if parent is not None."""
+    attributes = {'name': name, 'value': value}
+    if parent is None:
+        return etree.Element('Param', attributes)
+    return etree.SubElement(parent, 'Param', attributes)
+
+
+def gen_xqar_issue_element(issue: Issue) -> etree._Element:
+    """Generates the XQAR Issue element with its locations.
+
+    Args:
+        issue (Issue): The issue.
+
+    Returns:
+        etree._Element: The Issue element.
+    """
+    description = issue.get_report_description()
+    issue_element = etree.Element('Issue')
+    issue_element.set('description', description)
+    issue_element.set('issueId', str(issue.identifier))
+    issue_element.set('level', str(issue.level.value))
+
+    location_element = etree.SubElement(issue_element, 'Locations')
+    location_element.set('description', description)
+    if issue.locations is not None:
+        issue.locations.sort()
+        for location in issue.locations:
+            if isinstance(location, XmlLocation) and location.xpath is not None:
+                x_path_location_element = etree.SubElement(location_element, 'XMLLocation')
+                x_path_location_element.set('xpath', str(location.xpath))
+            if isinstance(location, FileLocation):
+                file_location_element = etree.SubElement(location_element, 'FileLocation')
+                file_location_element.set('column', str(location.column))
+                file_location_element.set('fileType', str(location.file_type))
+                file_location_element.set('row', str(location.row))
+            if isinstance(location, RoadLocation):
+                road_location_element = etree.SubElement(location_element, 'RoadLocation')
+                road_location_element.set('roadId', str(location.road_id))
+                if location.s is not None:
+                    road_location_element.set('s', str(location.s))
+                if location.t is not None:
+                    road_location_element.set('t', str(location.t))
+    return issue_element
+
+
 class ResultReport:
     """Class representing a result report."""
 
     _checker_bundles: List[CheckerBundle]
     report_meta: Dict[str, str]
     checked_file: Path
+    profile: object
+    from_cache: bool
+    referenced_documents: list
+    isolation_failed: bool
 
     def __init__(self, checked_file: Path = None):
         """Constructs a ResultReport object.
@@ -358,6 +745,12 @@ class ResultReport:
         self._checker_bundles = []
         self.report_meta = {}
         self.checked_file = checked_file
+        self.profile = None  # CheckProfiler if the checks were profiled
+        self.from_cache = False
+        # documents referenced by the checked file and loaded by the checkers, see ResultCache.store
+        self.referenced_documents = []
+        # an isolated checker exceeded a limit or crashed, see CheckerWorkerPool.execute
+        self.isolation_failed = False
 
     def add_checker_bundle(self, checker_bundle: CheckerBundle):
         """Appends a checker bundle to this result report.
@@ -382,20 +775,110 @@ class ResultReport:
         self._checker_bundles.append(checker_bundle)
         return checker_bundle
     
+    def resolve_xpaths(self):
+        """Computes the XPaths of all XmlLocations created from elements.
+
+        Each XPath is computed once per element and shared by all locations referring to the element.
+        Afterwards the report holds no references to the checked document anymore.
+        """
+        xpaths = {}
+        for bundle in self._checker_bundles:
+            for checker in bundle._checkers:
+                for issue in checker._issues:
+                    if issue.locations is not None:
+                        for location in issue.locations:
+                            if isinstance(location, XmlLocation):
+                                location.resolve(xpaths)
+
+    def release_elements(self):
+        """Releases the elements of all XmlLocations without computing their XPaths.
+
+        For reports whose output has no XPaths (txt), so the checked document is not kept alive.
+        """
+        for bundle in self._checker_bundles:
+            for checker in bundle._checkers:
+                for issue in checker._issues:
+                    if issue.locations is not None:
+                        for location in issue.locations:
+                            if isinstance(location, XmlLocation):
+                                location.release()
+
     def get_issues_count(self):
+        """Returns the number of found issues: the occurrences of the reported issues and the truncated issues."""
         count = 0
         for bundle in self._checker_bundles:
-            count = count + sum([len(checker._issues) for checker in bundle._checkers])
+            count = count + sum([checker.get_issues_count() + checker.truncated for checker in bundle._checkers])
         return count
 
-    def write_as_json(self, file: Path):
+    def toJSON(self) -> dict:
+        """Returns the JSON representation of this result report.
+
+        Keys are in sorted order, so the serialized document has the same layout as with sort_keys.
+        """
+        self.resolve_xpaths()
+        return {
+            '_checker_bundles': [bundle.toJSON() for bundle in self._checker_bundles],
+            'checked_file': str(self.checked_file) if self.checked_file is not None else None,
+            'report_meta': dict(sorted(self.report_meta.items()))
+        }
+
+    def get_as_json(self, compact: bool = False) -> str:
+        """Returns this result report as JSON string.
+
+        Args:
+            compact (bool, optional): Without indentation and whitespace. Defaults to False.
+
+        Returns:
+            str: The JSON string.
+        """
+        # dumper is only needed for unknown objects in Issue.external, whose keys are only sorted by sort_keys
+        if compact:
+            return json.dumps(self.toJSON(), default=dumper, sort_keys=True, separators=(',', ':'))
+        return json.dumps(self.toJSON(), default=dumper, sort_keys=True, indent=4)
+
+    def write_as_json(self, file: Path, compact: bool = False):
         """Serializes this result report as an JSON string into the specified file.
 
         Args:
             file (Path): The path the JSON string will be written to.
+            compact (bool, optional): Write without indentation and whitespace. Defaults to False.
         """
+        text = self.get_as_json(compact)
         with open(file, 'w') as f:
-            json.dump(self, f,  default=dumper, sort_keys=True, indent=4)
+            f.write(text)
+
+    def write_as_ndjson(self, file: Path):
+        """Serializes the issues of this result report as newline delimited JSON, one issue per line.
+
+        Each line is the JSON representation of the issue extended by the bundle name and the checker id.
+
+        Args:
+            file (Path): The path the issues will be written to.
+        """
+        self.resolve_xpaths()
+        encoder = json.JSONEncoder(default=dumper, separators=(',', ':'))
+        with open(file, 'w') as f:
+            for bundle in self._checker_bundles:
+                for checker in bundle._checkers:
+                    for issue in checker._issues:
+                        issue_json = issue.toJSON()
+                        issue_json['bundle'] = bundle.name
+                        issue_json['checker_id'] = checker.checker_id
+                        f.write(encoder.encode(issue_json))
+                        f.write('\n')
+
+    def write_as_sqlite(self, database: Path, file: str = None):
+        """Stores this result report in a SQLite result store, which can be shared by the reports of a batch.
+
+        A stored report of the same file is replaced. See result_store.ResultStore for queries and the XQAR export.
+
+        Args:
+            database (Path): The path of the database, created if it does not exist.
+            file (str, optional): Name of the validated file the report is stored by. Defaults to None for the checked file.
+        """
+        # imported on first use, the store imports this module
+        from result_store import get_result_store
+        get_result_store(database).write(self, file)
 
     def get_as_xqar_xml_tree(self) -> etree._Element:
         """Returns this ResultReport as an XQAR, XML conform representation.
@@ -403,69 +886,84 @@ class ResultReport:
         Returns:
             etree._Element: The XML element representing this result report in XQAR.
         """
+        self.resolve_xpaths()
         xml_tree = etree.Element('CheckerResults')
-        xml_tree.set('version', '1.0.0')
+        xml_tree.set('version', XQAR_VERSION)
 
         self._checker_bundles.sort()
         for bundle in self._checker_bundles:
-            bundle_element = etree.SubElement(xml_tree, 'CheckerBundle')
+            bundle_element = etree.SubElement(xml_tree, 'CheckerBundle', get_xqar_bundle_attributes(bundle))
             for k, v in bundle.params.items():
-                param_element = etree.SubElement(bundle_element, 'Param')
-                param_element.set('name', k)
-                param_element.set('value', v)
-
-            bundle_element.set('build_date', bundle.get_build_date())
-            bundle_element.set('description', bundle.description)
-            bundle_element.set('name', bundle.name)
-            bundle_element.set('summary', bundle.get_summary())
-            bundle_element.set('version', str(bundle.version))
+                gen_xqar_param_element(bundle_element, k, v)
 
             bundle._checkers.sort()
             for check in bundle._checkers:
-                check_element = etree.SubElement(bundle_element, 'Checker')
-                check_element.set('checkerId', check.checker_id)
-                check_element.set('description', check.description)
-                check_element.set('summary', check.get_summary())
+                check_element = etree.SubElement(bundle_element, 'Checker', get_xqar_checker_attributes(check))
 
                 check._issues.sort()
-                for issue in check._issues:                
-                    issue_element = etree.SubElement(check_element, 'Issue')
-                    issue_element.set('description', issue.description)
-                    issue_element.set('issueId', str(issue.identifier))                    
-                    issue_element.set('level', str(issue.level.value))
-
-                    location_element = etree.SubElement(issue_element, 'Locations')
-                    location_element.set('description', issue.description)
-                    if issue.locations is not None:
-                        issue.locations.sort()
-                        for location in issue.locations:
-                            if isinstance(location, XmlLocation) and location.xpath is not None:
-                                x_path_location_element = etree.SubElement(location_element, 'XMLLocation')
-                                x_path_location_element.set('xpath', str(location.xpath))
-                            if isinstance(location, FileLocation):
-                                file_location_element = etree.SubElement(location_element, 'FileLocation')
-                                file_location_element.set('column', str(location.column))
-                                file_location_element.set('fileType', str(location.file_type))
-                                file_location_element.set('row', str(location.row))
-                            if isinstance(location, RoadLocation):
-                                road_location_element = etree.SubElement(location_element, 'RoadLocation')
-                                road_location_element.set('roadId', str(location.road_id))
-                                if location.s is not None:
-                                    road_location_element.set('s', str(location.s))
-                                if location.t is not None:
-                                    road_location_element.set('t', str(location.t)) 
+                for issue in check._issues:
+                    check_element.append(gen_xqar_issue_element(issue))
         return xml_tree
-    
 
-    def write_as_xqar(self, file: Path):
+
+    def write_as_xqar(self, file: Union[Path, BinaryIO]):
         """Serializes this result report as an XQAR conform string into the specified file.
 
+        The document is written incrementally, bundle by bundle and issue by issue, without building the
+        complete XQAR tree in memory. The output is the same as the pretty printed get_as_xqar_xml_tree().
+
         Args:
-            file (Path): The path the XQAR conform string will be written to.
+            file (Union[Path, BinaryIO]): The path or binary file object the XQAR conform string will be written to.
         """
-        et = etree.ElementTree(self.get_as_xqar_xml_tree())
-        et.write(file, pretty_print=True, xml_declaration=True, encoding='utf-8')
-    
+        if isinstance(file, (str, Path)):
+            with open(file, 'wb') as f:
+                self._write_xqar_stream(f)
+        else:
+            self._write_xqar_stream(file)
+
+    def _write_xqar_stream(self, f: BinaryIO):
+        self.resolve_xpaths()
+        self._checker_bundles.sort()
+        f.write(XQAR_DECLARATION)
+        with etree.xmlfile(f, encoding='UTF-8') as xf:
+            if not self._checker_bundles:
+                xf.write(etree.Element('CheckerResults', version=XQAR_VERSION))
+            else:
+                with xf.element('CheckerResults', version=XQAR_VERSION):
+                    for bundle in self._checker_bundles:
+                        xf.write('\n  ')
+                        self._write_xqar_bundle(xf, bundle)
+                    xf.write('\n')
+        f.write(b'\n')
+
+    def _write_xqar_bundle(self, xf: etree.xmlfile, bundle: CheckerBundle):
+        bundle_attributes = get_xqar_bundle_attributes(bundle)
+        if not bundle.params and not bundle._checkers:
+            xf.write(etree.Element('CheckerBundle', bundle_attributes))
+            return
+
+        with xf.element('CheckerBundle', bundle_attributes):
+            for k, v in bundle.params.items():
+                xf.write('\n    ')
+                xf.write(gen_xqar_param_element(None, k, v))
+
+            bundle._checkers.sort()
+            for check in bundle._checkers:
+                xf.write('\n    ')
+                checker_attributes = get_xqar_checker_attributes(check)
+                if not check._issues:
+                    xf.write(etree.Element('Checker', checker_attributes))
+                    continue
+
+                with xf.element('Checker', checker_attributes):
+                    check._issues.sort()
+                    for issue in check._issues:
+                        xf.write('\n      ')
+                        issue_element = gen_xqar_issue_element(issue)
+                        etree.indent(issue_element, space='  ', level=3)
+                        xf.write(issue_element)
+                    xf.write('\n    ')
+            xf.write('\n  ')
 
     def get_as_text_list(self) -> list:
         """Returns this ResultReport as a simple text representation.
@@ -483,9 +981,11 @@ class ResultReport:
 
                 if len(check._issues) > 0:
                     for issue in check._issues:                
-                        text.append(f'    {get_IssueLevel_str(issue.level)}: {issue.description}')
+                        text.append(f'    {get_IssueLevel_str(issue.level)}: {issue.get_report_description()}')
                     else:
                         text.append('    ok') 
+                if check.truncated:
+                    text.append(f'    truncated: {check.truncated} more issues (max_issues {check.max_issues})')
         return text    
 
     
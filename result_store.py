@@ -0,0 +1,391 @@
+from result_report import ResultReport, Issue, AggregatedIssue, IssueLevel, Location, FileLocation, XmlLocation, RoadLocation, dumper
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Union
+from datetime import datetime
+
+import json
+import sqlite3
+import threading
+import uuid
+
+# increase if the tables are no longer compatible with the framework
+STORE_VERSION = 1
+
+DEFAULT_STORE_FILE = 'results.sqlite'
+
+# rows inserted per executemany, bounds the memory of the rows of a large report
+BATCH_SIZE = 10000
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE IF NOT EXISTS reports (id INTEGER PRIMARY KEY, file TEXT NOT NULL UNIQUE, written TEXT, report_meta TEXT)',
+    'CREATE TABLE IF NOT EXISTS bundles (id INTEGER PRIMARY KEY, report INTEGER NOT NULL, name TEXT, description TEXT, version TEXT, params TEXT)',
+    'CREATE TABLE IF NOT EXISTS checkers (id INTEGER PRIMARY KEY, report INTEGER NOT NULL, bundle INTEGER NOT NULL, checker_id TEXT, description TEXT, '
+    'truncated INTEGER, max_issues INTEGER)',
+    'CREATE TABLE IF NOT EXISTS issues (id INTEGER PRIMARY KEY, report INTEGER NOT NULL, checker INTEGER NOT NULL, identifier TEXT, level INTEGER, '
+    'description TEXT, count INTEGER, external TEXT, locations INTEGER)',
+    'CREATE TABLE IF NOT EXISTS locations (issue INTEGER NOT NULL, report INTEGER NOT NULL, position INTEGER, class_type INTEGER, xpath TEXT, '
+    'file_row INTEGER, file_column INTEGER, file_type TEXT, road_id TEXT, s TEXT, t TEXT)',
+    'CREATE INDEX IF NOT EXISTS bundles_report ON bundles (report)',
+    'CREATE INDEX IF NOT EXISTS checkers_report ON checkers (report)',
+    'CREATE INDEX IF NOT EXISTS checkers_checker_id ON checkers (checker_id)',
+    'CREATE INDEX IF NOT EXISTS issues_report ON issues (report)',
+    'CREATE INDEX IF NOT EXISTS issues_checker_level ON issues (checker, level)',
+    'CREATE INDEX IF NOT EXISTS issues_level ON issues (level)',
+    'CREATE INDEX IF NOT EXISTS locations_issue ON locations (issue)',
+    'CREATE INDEX IF NOT EXISTS locations_report ON locations (report)',
+    'CREATE INDEX IF NOT EXISTS locations_road_id ON locations (road_id)'
+]
+
+_INSERT_BUNDLE = 'INSERT INTO bundles VALUES (?, ?, ?, ?, ?, ?)'
+_INSERT_CHECKER = 'INSERT INTO checkers VALUES (?, ?, ?, ?, ?, ?, ?)'
+_INSERT_ISSUE = 'INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+_INSERT_LOCATION = 'INSERT INTO locations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+
+def _get_location_row(issue_id: int, report_id: int, position: int, location: Location) -> tuple:
+    if isinstance(location, XmlLocation):
+        return (issue_id, report_id, position, location.class_type, location.xpath, None, None, None, None, None, None)
+    if isinstance(location, FileLocation):
+        return (issue_id, report_id, position, location.class_type, None, location.row, location.column, location.file_type, None, None, None)
+    if isinstance(location, RoadLocation):
+        road_id = str(location.road_id) if location.road_id is not None else None
+        return (issue_id, report_id, position, location.class_type, None, None, None, None, road_id, location.s, location.t)
+    return None  # not part of the XQAR report either
+
+
+def _create_location(row: tuple) -> Location:
+    class_type, xpath, file_row, file_column, file_type, road_id, s, t = row
+    if class_type == XmlLocation.class_type:
+        return XmlLocation(xpath)
+    if class_type == FileLocation.class_type:
+        location = FileLocation(file_row, file_column)
+        location.file_type = file_type
+        return location
+    return RoadLocation(road_id, s, t)
+
+
+class ResultStore:
+    """SQLite database of the result reports of a batch, indexed for queries across the validated files.
+
+    Every report is stored with its bundles, checkers, issues and locations in one transaction, so readers never see
+    a partial report. Writing the report of a file again replaces its previous report. The database is opened in
+    WAL mode, so several threads and processes (e.g. main.py -j) can write to it and queries do not block writers.
+
+    Usage:
+        store = get_result_store(Path('reports/results.sqlite'))
+        store.write(report)
+        store.query_files(checker_id='roads_have_ids', level=IssueLevel.ERROR)
+        store.export_xqar('road.xodr', Path('road.xodr.xqar'))
+    """
+
+    path: Path
+    timeout: float
+
+    def __init__(self, path: Path, timeout: float = 60.0) -> None:
+        """Constructs a ResultStore object and creates the database if it does not exist.
+
+        Args:
+            path (Path): Path of the database file.
+            timeout (float, optional): Seconds to wait for a write lock held by another writer. Defaults to 60.0.
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # transactions are started explicitly, the lock serializes the threads of this process
+        self._connection = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        # durable after a crash of the process, only a power loss can lose the last transactions
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                for statement in _SCHEMA:
+                    self._connection.execute(statement)
+                row = self._connection.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+                if row is None:
+                    self._connection.execute("INSERT INTO store_meta VALUES ('version', ?)", (str(STORE_VERSION),))
+                elif row[0] != str(STORE_VERSION):
+                    raise ValueError(f'Result store {self.path} has version {row[0]}, expected {STORE_VERSION}')
+                self._connection.execute('COMMIT')
+            except:
+                self._connection.execute('ROLLBACK')
+                raise
+
+    def write(self, report: ResultReport, file: str = None):
+        """Stores a result report, replacing a stored report of the same file.
+
+        Args:
+            report (ResultReport): The report.
+            file (str, optional): Name of the validated file the report is stored and queried by. Defaults to None for the checked file of the report.
+        """
+        report.resolve_xpaths()
+        file = str(file if file is not None else report.checked_file)
+        with self._lock:
+            connection = self._connection
+            # the write lock is taken at the start, so the ids below are not used by another writer
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._delete(file)
+                report_id = connection.execute('INSERT INTO reports (file, written, report_meta) VALUES (?, ?, ?)',
+                                               (file, datetime.now().isoformat(timespec='seconds'), json.dumps(report.report_meta, default=dumper))).lastrowid
+                bundle_id = self._get_next_id('bundles')
+                checker_id = self._get_next_id('checkers')
+                issue_id = self._get_next_id('issues')
+
+                bundle_rows, checker_rows, issue_rows, location_rows = [], [], [], []
+                for bundle in report._checker_bundles:
+                    bundle_rows.append((bundle_id, report_id, bundle.name, bundle.description, str(bundle.version), json.dumps(bundle.params, default=dumper)))
+                    for checker in bundle._checkers:
+                        checker_rows.append((checker_id, report_id, bundle_id, checker.checker_id, checker.description, checker.truncated, checker.max_issues))
+                        for issue in checker._issues:
+                            identifier = issue.identifier
+                            level = issue.level.value if issue.level is not None else None
+                            external = json.dumps(issue.external, default=dumper) if issue.external is not None else None
+                            locations = issue.locations
+                            issue_rows.append((issue_id, report_id, checker_id, str(identifier) if identifier is not None else None, level,
+                                               issue.description, issue.count, external, len(locations) if locations is not None else None))
+                            if locations is not None:
+                                for position, location in enumerate(locations):
+                                    row = _get_location_row(issue_id, report_id, position, location)
+                                    if row is not None:
+                                        location_rows.append(row)
+                            issue_id += 1
+                            if len(location_rows) >= BATCH_SIZE or len(issue_rows) >= BATCH_SIZE:
+                                self._insert(_INSERT_ISSUE, issue_rows)
+                                self._insert(_INSERT_LOCATION, location_rows)
+                        checker_id += 1
+                    bundle_id += 1
+                self._insert(_INSERT_BUNDLE, bundle_rows)
+                self._insert(_INSERT_CHECKER, checker_rows)
+                self._insert(_INSERT_ISSUE, issue_rows)
+                self._insert(_INSERT_LOCATION, location_rows)
+                connection.execute('COMMIT')
+            except:
+                connection.execute('ROLLBACK')
+                raise
+
+    def _get_next_id(self, table: str) -> int:
+        return self._connection.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}').fetchone()[0]
+
+    def _insert(self, statement: str, rows: list):
+        if rows:
+            self._connection.executemany(statement, rows)
+            rows.clear()
+
+    def _delete(self, file: str):
+        row = self._connection.execute('SELECT id FROM reports WHERE file = ?', (file,)).fetchone()
+        if row is None:
+            return
+        for table in ['locations', 'issues', 'checkers', 'bundles']:
+            self._connection.execute(f'DELETE FROM {table} WHERE report = ?', row)
+        self._connection.execute('DELETE FROM reports WHERE id = ?', row)
+
+    def delete(self, file: str):
+        """Removes the stored report of a file.
+
+        Args:
+            file (str): Name of the validated file.
+        """
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._delete(file)
+                self._connection.execute('COMMIT')
+            except:
+                self._connection.execute('ROLLBACK')
+                raise
+
+    def _query(self, statement: str, parameters: list) -> list:
+        with self._lock:
+            return self._connection.execute(statement, parameters).fetchall()
+
+    @staticmethod
+    def _get_filter(file: str = None, checker_id: str = None, level: IssueLevel = None, road_id: str = None, description: str = None) -> (str, list):
+        conditions = []
+        parameters = []
+        if file is not None:
+            conditions.append('reports.file = ?')
+            parameters.append(str(file))
+        if checker_id is not None:
+            conditions.append('checkers.checker_id = ?')
+            parameters.append(checker_id)
+        if level is not None:
+            conditions.append('issues.level = ?')
+            parameters.append(level.value)
+        if road_id is not None:
+            conditions.append('issues.id IN (SELECT issue FROM locations WHERE road_id = ?)')
+            parameters.append(str(road_id))
+        if description is not None:
+            conditions.append('issues.description LIKE ?')
+            parameters.append(description)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        return where, parameters
+
+    def query_issues(self, file: str = None, checker_id: str = None, level: IssueLevel = None, road_id: str = None, description: str = None,
+                     limit: int = None) -> List[Dict[str, any]]:
+        """Returns the stored issues matching all given filters, in the order they were reported.
+
+        Args:
+            file (str, optional): Name of the validated file. Defaults to None.
+            checker_id (str, optional): Id of the checker. Defaults to None.
+            level (IssueLevel, optional): Level of the issue. Defaults to None.
+            road_id (str, optional): Road id of a RoadLocation of the issue. Defaults to None.
+            description (str, optional): SQL LIKE pattern of the description, e.g. '%missing%'. Defaults to None.
+            limit (int, optional): Maximal number of returned issues. Defaults to None for all.
+
+        Returns:
+            List[Dict[str, any]]: file, bundle, checker_id, level (IssueLevel), description, count and identifier of each issue.
+        """
+        where, parameters = self._get_filter(file, checker_id, level, road_id, description)
+        statement = ('SELECT reports.file, bundles.name, checkers.checker_id, issues.level, issues.description, issues.count, issues.identifier '
+                     'FROM issues JOIN checkers ON checkers.id = issues.checker JOIN bundles ON bundles.id = checkers.bundle '
+                     f'JOIN reports ON reports.id = issues.report{where} ORDER BY issues.id')
+        if limit is not None:
+            statement += ' LIMIT ?'
+            parameters.append(limit)
+        return [{'file': file, 'bundle': bundle, 'checker_id': checker, 'level': IssueLevel(level) if level is not None else None,
+                 'description': description, 'count': count, 'identifier': identifier}
+                for file, bundle, checker, level, description, count, identifier in self._query(statement, parameters)]
+
+    def query_files(self, checker_id: str = None, level: IssueLevel = None, road_id: str = None, description: str = None) -> Dict[str, int]:
+        """Returns the files having issues matching all given filters, e.g. which files have an issue in a checker.
+
+        Args:
+            checker_id (str, optional): Id of the checker. Defaults to None.
+            level (IssueLevel, optional): Level of the issue. Defaults to None.
+            road_id (str, optional): Road id of a RoadLocation of the issue. Defaults to None.
+            description (str, optional): SQL LIKE pattern of the description. Defaults to None.
+
+        Returns:
+            Dict[str, int]: Number of matching issues by file name, sorted by file name.
+        """
+        where, parameters = self._get_filter(None, checker_id, level, road_id, description)
+        statement = ('SELECT reports.file, COUNT(*) FROM issues JOIN checkers ON checkers.id = issues.checker '
+                     f'JOIN reports ON reports.id = issues.report{where} GROUP BY reports.file ORDER BY reports.file')
+        return dict(self._query(statement, parameters))
+
+    def get_files(self) -> List[str]:
+        """Returns the names of the files with a stored report, sorted."""
+        return [file for file, in self._query('SELECT file FROM reports ORDER BY file', [])]
+
+    def load_report(self, file: str) -> ResultReport:
+        """Restores the stored report of a file.
+
+        Args:
+            file (str): Name of the validated file.
+
+        Returns:
+            ResultReport: The report or None if no report of the file is stored.
+        """
+        with self._lock:
+            connection = self._connection
+            # one read transaction, so a concurrent writer replacing the report is not seen halfway
+            connection.execute('BEGIN')
+            try:
+                row = connection.execute('SELECT id, report_meta FROM reports WHERE file = ?', (str(file),)).fetchone()
+                if row is None:
+                    return None
+                report_id, report_meta = row
+                bundles = connection.execute('SELECT id, name, description, version, params FROM bundles WHERE report = ? ORDER BY id', (report_id,)).fetchall()
+                checkers = connection.execute('SELECT id, bundle, checker_id, description, truncated, max_issues FROM checkers WHERE report = ? ORDER BY id',
+                                              (report_id,)).fetchall()
+                issues = connection.execute('SELECT checker, identifier, level, description, count, external, locations, id FROM issues WHERE report = ? ORDER BY id',
+                                            (report_id,)).fetchall()
+                locations = connection.execute('SELECT issue, class_type, xpath, file_row, file_column, file_type, road_id, s, t FROM locations '
+                                               'WHERE report = ? ORDER BY issue, position', (report_id,)).fetchall()
+            finally:
+                connection.execute('COMMIT')
+
+        report = ResultReport(Path(file))
+        report.report_meta = json.loads(report_meta)
+        locations_by_issue = {}
+        for location_row in locations:
+            locations_by_issue.setdefault(location_row[0], []).append(_create_location(location_row[1:]))
+
+        bundles_by_id = {}
+        for bundle_id, name, description, version, params in bundles:
+            bundle = report.gen_checker_bundle(name, description, version)
+            bundle.params = json.loads(params)
+            bundles_by_id[bundle_id] = bundle
+        checkers_by_id = {}
+        for checker_row_id, bundle_id, checker_id, description, truncated, max_issues in checkers:
+            checker = bundles_by_id[bundle_id].gen_checker(checker_id, description)
+            if truncated:
+                checker.truncated = truncated
+                checker.max_issues = max_issues
+            checkers_by_id[checker_row_id] = checker
+        for checker_row_id, identifier, level, description, count, external, location_count, issue_id in issues:
+            identifier = uuid.UUID(identifier) if identifier is not None else None
+            level = IssueLevel(level) if level is not None else None
+            external = json.loads(external) if external is not None else None
+            issue_locations = locations_by_issue.get(issue_id, []) if location_count is not None else None
+            if count != 1:
+                issue = AggregatedIssue(identifier, level, description, issue_locations, external, count)
+            else:
+                issue = Issue(identifier, level, description, issue_locations, external)
+            # appended directly, the issues were limited and logged when they were reported
+            checkers_by_id[checker_row_id]._issues.append(issue)
+        return report
+
+    def export_xqar(self, file: str, output: Union[Path, BinaryIO]) -> bool:
+        """Writes the stored report of a file as XQAR.
+
+        Args:
+            file (str): Name of the validated file.
+            output (Union[Path, BinaryIO]): The path or binary file object the XQAR is written to.
+
+        Returns:
+            bool: False if no report of the file is stored.
+        """
+        report = self.load_report(file)
+        if report is None:
+            return False
+        report.write_as_xqar(output)
+        return True
+
+    def close(self):
+        """Closes the database, the store is not usable afterwards."""
+        with self._lock:
+            # updates the statistics of the query planner if the tables changed a lot
+            self._connection.execute('PRAGMA optimize')
+            self._connection.close()
+
+
+_stores: Dict[str, ResultStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_result_store(path: Path) -> ResultStore:
+    """Returns the result store of this process for a database file, shared by all files and threads writing to it.
+
+    Args:
+        path (Path): Path of the database file.
+
+    Returns:
+        ResultStore: The store.
+    """
+    key = str(Path(path).absolute())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if not _stores:
+                # worker processes (main.py -j) exit without running atexit handlers, but run the finalizers of multiprocessing
+                from multiprocessing.util import Finalize
+                Finalize(None, close_result_stores, exitpriority=10)
+            store = ResultStore(path)
+            _stores[key] = store
+        return store
+
+
+def close_result_stores():
+    """Closes the result stores of this process, so their write-ahead logs are checkpointed into the database files."""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
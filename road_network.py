@@ -0,0 +1,476 @@
+from result_report import Location, create_location_for_road, create_location_from_element
+from lxml import etree
+from typing import Dict, List, Tuple
+
+import math
+import numpy as np
+
+# geometry types of the plan view
+LINE = 0
+ARC = 1
+SPIRAL = 2
+POLY3 = 3
+PARAM_POLY3 = 4
+
+GEOMETRY_TYPES = {'line': LINE, 'arc': ARC, 'spiral': SPIRAL, 'poly3': POLY3, 'paramPoly3': PARAM_POLY3}
+
+# nodes of the Gauss-Legendre quadrature for the spiral integration
+_SPIRAL_NODES, _SPIRAL_WEIGHTS = np.polynomial.legendre.leggauss(10)
+
+
+# attributes of the geometry types, the parameters are padded to 8 values
+_PARAMETER_NAMES = {
+    LINE: [],
+    ARC: ['curvature'],
+    SPIRAL: ['curvStart', 'curvEnd'],
+    POLY3: ['a', 'b', 'c', 'd'],
+    PARAM_POLY3: ['aU', 'bU', 'cU', 'dU', 'aV', 'bV', 'cV', 'dV']
+}
+_NO_PARAMETERS = [None] * 8
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _to_floats(values: list) -> np.ndarray:
+    """Converts (nested lists of) attribute values to a float array, missing and invalid values are NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([[_to_float(value) for value in row] if isinstance(row, list) else _to_float(row) for row in values], dtype=np.float64)
+
+
+class Polynomials:
+    """Cubic polynomials a + b*ds + c*ds² + d*ds³ along the roads, e.g. elevations or lane offsets.
+
+    Records are sorted by road and s, every record is valid from its s to the s of the next record of the road.
+    """
+
+    road: np.ndarray
+    s: np.ndarray
+    coefficients: np.ndarray
+
+    def __init__(self, road: List[int], s: List[str], coefficients: List[List[str]], road_lengths: np.ndarray) -> None:
+        """Constructs a Polynomials object.
+
+        Args:
+            road (List[int]): Road index of each record.
+            s (List[str]): Start of each record along the road (attribute values).
+            coefficients (List[List[str]]): a, b, c, d of each record (attribute values).
+            road_lengths (np.ndarray): Lengths of all roads, used to build the search keys.
+        """
+        road = np.asarray(road, dtype=np.int64)
+        s = _to_floats(s)
+        coefficients = _to_floats(coefficients).reshape(-1, 4)
+        order = np.lexsort((s, road))
+        self.road = road[order]
+        self.s = s[order]
+        self.coefficients = coefficients[order]
+        # one key range per road, so a single search finds the record of a road and s
+        self._key_scale = float(np.nanmax(road_lengths, initial=0.0)) + 1.0
+        self._keys = self.road * self._key_scale + np.nan_to_num(self.s)
+
+    def evaluate(self, road: np.ndarray, s: np.ndarray) -> np.ndarray:
+        """Returns the values at positions along roads. Positions before the first record of their road are 0.
+
+        Args:
+            road (np.ndarray): Road index of each position.
+            s (np.ndarray): s of each position.
+
+        Returns:
+            np.ndarray: The values.
+        """
+        road = np.asarray(road, dtype=np.int64)
+        s = np.asarray(s, dtype=np.float64)
+        values = np.zeros(s.shape)
+        if len(self.road) == 0:
+            return values
+        records = np.searchsorted(self._keys, road * self._key_scale + s, side='right') - 1
+        valid = records >= 0
+        valid[valid] = self.road[records[valid]] == road[valid]
+        records = records[valid]
+        ds = s[valid] - self.s[records]
+        a, b, c, d = self.coefficients[records].T
+        values[valid] = a + ds * (b + ds * (c + ds * d))
+        return values
+
+
+class ReferenceLineSamples:
+    """Sampled points of the reference lines, one row per point."""
+
+    geometry: np.ndarray
+    road: np.ndarray
+    s: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    hdg: np.ndarray
+
+    def __init__(self, geometry: np.ndarray, road: np.ndarray, s: np.ndarray, x: np.ndarray, y: np.ndarray, hdg: np.ndarray) -> None:
+        """Constructs a ReferenceLineSamples object.
+
+        Args:
+            geometry (np.ndarray): Geometry index of each point.
+            road (np.ndarray): Road index of each point.
+            s (np.ndarray): s along the road.
+            x (np.ndarray): x coordinate.
+            y (np.ndarray): y coordinate.
+            hdg (np.ndarray): Heading of the reference line.
+        """
+        self.geometry = geometry
+        self.road = road
+        self.s = s
+        self.x = x
+        self.y = y
+        self.hdg = hdg
+
+    def __len__(self) -> int:
+        return len(self.s)
+
+
+class GridIndex:
+    """Uniform grid of axis aligned boxes for overlap queries.
+
+    Each box is registered in all cells it covers. The cells are stored as sorted arrays, so the index is
+    built without Python loops over the boxes.
+    """
+
+    boxes: np.ndarray
+    cell_size: float
+
+    def __init__(self, boxes: np.ndarray, cell_size: float) -> None:
+        """Constructs a GridIndex object.
+
+        Args:
+            boxes (np.ndarray): (n, 4) array of xmin, ymin, xmax, ymax. Boxes with NaN are not indexed.
+            cell_size (float): Edge length of the grid cells.
+        """
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.cell_size = cell_size
+        items = np.flatnonzero(~np.isnan(self.boxes).any(axis=1))
+        if len(items) == 0:
+            self._origin = np.zeros(2)
+            self._rows = 1
+            self._columns = 0
+            self._keys = np.empty(0, dtype=np.int64)
+            self._items = np.empty(0, dtype=np.int64)
+            return
+
+        self._origin = self.boxes[items, :2].min(axis=0)
+        cells = self._get_cells(self.boxes[items])
+        self._rows = int(cells[:, 3].max()) + 1
+        self._columns = int(cells[:, 2].max()) + 1
+        columns = cells[:, 2] - cells[:, 0] + 1
+        counts = columns * (cells[:, 3] - cells[:, 1] + 1)
+        box = np.repeat(np.arange(len(items)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = cells[box, 0] + local % columns[box]
+        cell_y = cells[box, 1] + local // columns[box]
+        keys = cell_x * self._rows + cell_y
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._items = items[box[order]]
+
+    def _get_cells(self, boxes: np.ndarray) -> np.ndarray:
+        # first and last cell column and row of each box
+        return np.floor((boxes - np.tile(self._origin, 2)) / self.cell_size).astype(np.int64)
+
+    def query(self, xmin: float, ymin: float, xmax: float, ymax: float) -> np.ndarray:
+        """Returns the boxes overlapping a box.
+
+        Args:
+            xmin (float): Minimal x of the box.
+            ymin (float): Minimal y of the box.
+            xmax (float): Maximal x of the box.
+            ymax (float): Maximal y of the box.
+
+        Returns:
+            np.ndarray: Sorted indices of the overlapping boxes.
+        """
+        x0, y0, x1, y1 = self._get_cells(np.array([[xmin, ymin, xmax, ymax]]))[0]
+        y0, y1 = max(y0, 0), min(y1, self._rows - 1)
+        found = []
+        if y0 <= y1:
+            for cell_x in range(max(x0, 0), min(x1, self._columns - 1) + 1):
+                start = np.searchsorted(self._keys, cell_x * self._rows + y0, side='left')
+                end = np.searchsorted(self._keys, cell_x * self._rows + y1, side='right')
+                found.append(self._items[start:end])
+        candidates = np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        boxes = self.boxes[candidates]
+        overlapping = (boxes[:, 0] <= xmax) & (boxes[:, 2] >= xmin) & (boxes[:, 1] <= ymax) & (boxes[:, 3] >= ymin)
+        return candidates[overlapping]
+
+    def get_overlapping_pairs(self) -> np.ndarray:
+        """Returns all pairs of overlapping boxes.
+
+        Returns:
+            np.ndarray: (m, 2) array of box indices i < j, sorted.
+        """
+        boundaries = np.flatnonzero(np.diff(self._keys)) + 1
+        starts = np.concatenate(([0], boundaries))
+        sizes = np.diff(np.concatenate((starts, [len(self._keys)])))
+        pairs = []
+        # cells with the same number of boxes are handled together
+        for size in np.unique(sizes[sizes > 1]):
+            cell_starts = starts[sizes == size]
+            items = self._items[cell_starts[:, None] + np.arange(size)[None, :]]
+            first, second = np.triu_indices(size, k=1)
+            pairs.append(np.stack((items[:, first].ravel(), items[:, second].ravel()), axis=1))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        pairs = np.sort(np.concatenate(pairs), axis=1)
+        pairs = np.unique(pairs, axis=0)
+        a = self.boxes[pairs[:, 0]]
+        b = self.boxes[pairs[:, 1]]
+        overlapping = (a[:, 0] <= b[:, 2]) & (a[:, 2] >= b[:, 0]) & (a[:, 1] <= b[:, 3]) & (a[:, 3] >= b[:, 1])
+        return pairs[overlapping]
+
+
+class RoadNetwork:
+    """Columnar NumPy view of the roads of an OpenDRIVE file for geometry checks.
+
+    Roads, plan view geometries, elevations and lane offsets are stored as arrays with one row per element,
+    so checks can evaluate all geometries at once instead of looping over the lxml elements.
+    Attributes that are missing or not a number are NaN. Use create_location to report issues of a road position.
+    """
+
+    road_ids: List[str]
+    road_lengths: np.ndarray
+    road_elements: List[etree._Element]
+    geometry_road: np.ndarray
+    geometry_s: np.ndarray
+    geometry_x: np.ndarray
+    geometry_y: np.ndarray
+    geometry_hdg: np.ndarray
+    geometry_length: np.ndarray
+    geometry_type: np.ndarray
+    geometry_parameters: np.ndarray
+    geometry_normalized: np.ndarray
+    geometry_elements: List[etree._Element]
+    elevations: Polynomials
+    lane_offsets: Polynomials
+
+    def __init__(self, root: etree._Element) -> None:
+        """Constructs a RoadNetwork object with a single pass over the roads of the file.
+
+        Args:
+            root (etree._Element): Root element of the OpenDRIVE file.
+        """
+        self.road_ids = []
+        self.road_elements = []
+        road_lengths = []
+        self.geometry_elements = []
+        geometry_road = []
+        geometry_values = ([], [], [], [], [])  # s, x, y, hdg, length
+        geometry_types = []
+        parameters = []
+        normalized = []
+        polynomial_rows = {'elevationProfile/elevation': ([], [], []), 'lanes/laneOffset': ([], [], [])}
+
+        # attribute values are collected as strings and converted at once
+        for road_index, road in enumerate(root.iterfind('road')):
+            self.road_ids.append(road.get('id'))
+            self.road_elements.append(road)
+            road_lengths.append(road.get('length'))
+
+            for geometry in road.iterfind('planView/geometry'):
+                geometry_road.append(road_index)
+                for values, name in zip(geometry_values, ('s', 'x', 'y', 'hdg', 'length')):
+                    values.append(geometry.get(name))
+                geometry_type = -1
+                geometry_parameters = _NO_PARAMETERS
+                is_normalized = True
+                for child in geometry:
+                    geometry_type = GEOMETRY_TYPES.get(child.tag, -1)
+                    if geometry_type >= 0:
+                        names = _PARAMETER_NAMES[geometry_type]
+                        geometry_parameters = [child.get(name) for name in names] + _NO_PARAMETERS[len(names):]
+                        if geometry_type == PARAM_POLY3:
+                            is_normalized = child.get('pRange', 'normalized') != 'arcLength'
+                        break
+                geometry_types.append(geometry_type)
+                parameters.append(geometry_parameters)
+                normalized.append(is_normalized)
+                self.geometry_elements.append(geometry)
+
+            for path, (records_road, records_s, records_coefficients) in polynomial_rows.items():
+                for record in road.iterfind(path):
+                    records_road.append(road_index)
+                    records_s.append(record.get('s'))
+                    records_coefficients.append([record.get(name) for name in ('a', 'b', 'c', 'd')])
+
+        self.road_lengths = _to_floats(road_lengths)
+        self.geometry_road = np.array(geometry_road, dtype=np.int64)
+        self.geometry_s, self.geometry_x, self.geometry_y, self.geometry_hdg, self.geometry_length = [_to_floats(values) for values in geometry_values]
+        self.geometry_type = np.array(geometry_types, dtype=np.int8)
+        self.geometry_parameters = _to_floats(parameters).reshape(-1, 8)
+        self.geometry_normalized = np.array(normalized, dtype=bool)
+        self.elevations = Polynomials(*polynomial_rows['elevationProfile/elevation'], self.road_lengths)
+        self.lane_offsets = Polynomials(*polynomial_rows['lanes/laneOffset'], self.road_lengths)
+        self._samples: Dict[float, ReferenceLineSamples] = {}
+        self._spatial_indices: Dict[Tuple[float, float], GridIndex] = {}
+
+    def evaluate(self, geometry: np.ndarray, ds: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Evaluates reference line points of plan view geometries.
+
+        poly3 geometries are evaluated with u = ds, which is exact for small lateral offsets only.
+        Geometries of unknown type are evaluated as lines.
+
+        Args:
+            geometry (np.ndarray): Geometry index of each point.
+            ds (np.ndarray): Distance of each point from the start of its geometry.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: x, y and heading of the points.
+        """
+        geometry = np.asarray(geometry, dtype=np.int64)
+        ds = np.asarray(ds, dtype=np.float64)
+        x = np.empty(ds.shape)
+        y = np.empty(ds.shape)
+        hdg = np.empty(ds.shape)
+        types = self.geometry_type[geometry]
+
+        # evaluated per type, so only the parameters of the type are gathered
+        for geometry_type in (LINE, ARC, SPIRAL, POLY3, PARAM_POLY3, -1):
+            if geometry_type == -1:
+                mask = (types < 0) | (types > PARAM_POLY3)
+            else:
+                mask = types == geometry_type
+            if not mask.any():
+                continue
+            g = geometry[mask]
+            d = ds[mask]
+            x0 = self.geometry_x[g]
+            y0 = self.geometry_y[g]
+            h0 = self.geometry_hdg[g]
+
+            if geometry_type == ARC:
+                k = self.geometry_parameters[g, 0]
+                # arcs without curvature are lines
+                k = np.where(np.abs(k) > 1e-12, k, np.nan)
+                end = h0 + np.nan_to_num(k) * d
+                cos_start, sin_start = np.cos(h0), np.sin(h0)
+                x[mask] = np.where(np.isnan(k), x0 + d * cos_start, x0 + (np.sin(end) - sin_start) / k)
+                y[mask] = np.where(np.isnan(k), y0 + d * sin_start, y0 - (np.cos(end) - cos_start) / k)
+                hdg[mask] = end
+            elif geometry_type == SPIRAL:
+                curv_start = self.geometry_parameters[g, 0]
+                length = self.geometry_length[g]
+                curv_rate = np.divide(self.geometry_parameters[g, 1] - curv_start, length, out=np.zeros_like(length), where=length > 0)
+                # integrate cos and sin of the heading along the spiral
+                t = d[:, None] * (_SPIRAL_NODES[None, :] + 1.0) / 2.0
+                theta = h0[:, None] + curv_start[:, None] * t + curv_rate[:, None] * t * t / 2.0
+                weights = d[:, None] / 2.0 * _SPIRAL_WEIGHTS[None, :]
+                x[mask] = x0 + (weights * np.cos(theta)).sum(axis=1)
+                y[mask] = y0 + (weights * np.sin(theta)).sum(axis=1)
+                hdg[mask] = h0 + curv_start * d + curv_rate * d * d / 2.0
+            elif geometry_type in (POLY3, PARAM_POLY3):
+                coefficients = self.geometry_parameters[g]
+                if geometry_type == POLY3:
+                    p = d
+                    u, du = p, np.ones_like(p)
+                    a, b, c, e = coefficients[:, :4].T
+                else:
+                    length = self.geometry_length[g]
+                    p = np.where(self.geometry_normalized[g], np.divide(d, length, out=np.zeros_like(length), where=length > 0), d)
+                    au, bu, cu, eu = coefficients[:, :4].T
+                    u = au + p * (bu + p * (cu + p * eu))
+                    du = bu + p * (2.0 * cu + 3.0 * eu * p)
+                    a, b, c, e = coefficients[:, 4:].T
+                v = a + p * (b + p * (c + p * e))
+                dv = b + p * (2.0 * c + 3.0 * e * p)
+                cos_start, sin_start = np.cos(h0), np.sin(h0)
+                x[mask] = x0 + u * cos_start - v * sin_start
+                y[mask] = y0 + u * sin_start + v * cos_start
+                hdg[mask] = h0 + np.arctan2(dv, du)
+            else:
+                x[mask] = x0 + d * np.cos(h0)
+                y[mask] = y0 + d * np.sin(h0)
+                hdg[mask] = h0
+
+        return x, y, hdg
+
+    def sample(self, step: float = 1.0) -> ReferenceLineSamples:
+        """Returns points along all reference lines, every step meters and at the end of each geometry.
+        The samples are computed once per step.
+
+        Args:
+            step (float, optional): Distance of the points in meters. Defaults to 1.0.
+
+        Returns:
+            ReferenceLineSamples: The points in geometry order.
+        """
+        samples = self._samples.get(step)
+        if samples is not None:
+            return samples
+
+        length = np.nan_to_num(self.geometry_length, nan=0.0).clip(min=0.0)
+        counts = np.ceil(length / step).astype(np.int64) + 1
+        geometry = np.repeat(np.arange(len(length)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ds = np.minimum(local * step, length[geometry])
+        x, y, hdg = self.evaluate(geometry, ds)
+        samples = ReferenceLineSamples(geometry, self.geometry_road[geometry], self.geometry_s[geometry] + ds, x, y, hdg)
+        self._samples[step] = samples
+        return samples
+
+    def get_geometry_boxes(self, step: float = 1.0) -> np.ndarray:
+        """Returns the bounding boxes of the geometries from the sampled reference lines.
+
+        Args:
+            step (float, optional): Distance of the sampled points in meters. Defaults to 1.0.
+
+        Returns:
+            np.ndarray: (n, 4) array of xmin, ymin, xmax, ymax per geometry.
+        """
+        samples = self.sample(step)
+        if len(samples) == 0:
+            return np.empty((0, 4))
+        # every geometry has at least one sample, so the samples of a geometry start at these offsets
+        starts = np.flatnonzero(np.diff(samples.geometry, prepend=-1))
+        return np.stack((np.minimum.reduceat(samples.x, starts), np.minimum.reduceat(samples.y, starts),
+                         np.maximum.reduceat(samples.x, starts), np.maximum.reduceat(samples.y, starts)), axis=1)
+
+    def get_spatial_index(self, cell_size: float = 50.0, step: float = 1.0) -> GridIndex:
+        """Returns a grid index of the geometry bounding boxes, built once per cell size and step.
+
+        Args:
+            cell_size (float, optional): Edge length of the grid cells in meters. Defaults to 50.0.
+            step (float, optional): Distance of the sampled points for the bounding boxes. Defaults to 1.0.
+
+        Returns:
+            GridIndex: The index, box indices are geometry indices.
+        """
+        key = (cell_size, step)
+        index = self._spatial_indices.get(key)
+        if index is None:
+            index = GridIndex(self.get_geometry_boxes(step), cell_size)
+            self._spatial_indices[key] = index
+        return index
+
+    def create_location(self, road: int, s: float, t: float = 0.0) -> List[Location]:
+        """Returns the locations of a position on a road for an issue.
+
+        Args:
+            road (int): Road index.
+            s (float): s along the road.
+            t (float, optional): Lateral offset. Defaults to 0.0.
+
+        Returns:
+            List[Location]: XmlLocation and FileLocation of the road element and the RoadLocation.
+        """
+        return create_location_for_road(self.road_elements[road], self.road_ids[road], float(s), float(t))
+
+    def create_geometry_location(self, geometry: int) -> List[Location]:
+        """Returns the locations of a plan view geometry element for an issue.
+
+        Args:
+            geometry (int): Geometry index.
+
+        Returns:
+            List[Location]: XmlLocation and FileLocation of the geometry element.
+        """
+        return create_location_from_element(self.geometry_elements[geometry])
@@ -0,0 +1,192 @@
+from pathlib import Path
+from typing import Dict, List, Tuple
+from lxml import etree
+
+import logging
+import threading
+import time
+
+VERSIONING_NAMESPACE = 'http://www.w3.org/2007/XMLSchema-versioning'
+
+
+class CompiledSchema:
+    """XML schema compiled once and shared by all files and threads of the process.
+
+    XSD 1.0 schemas are compiled with lxml, XSD 1.1 schemas (vc:minVersion="1.1") with the xmlschema package.
+    """
+
+    path: Path
+    xsd_version: str
+    schema: any
+    compile_time: float
+    hits: int
+
+    def __init__(self, path: Path) -> None:
+        """Constructs a CompiledSchema object and compiles the schema.
+
+        Args:
+            path (Path): Path of the main XSD file, included files are resolved relative to it.
+
+        Raises:
+            etree.XMLSchemaParseError, etree.XMLSyntaxError, OSError: If the schema cannot be loaded or compiled.
+            ImportError: If the schema is an XSD 1.1 schema and the xmlschema package is not installed.
+        """
+        self.path = path
+        self.hits = 0
+        # lxml collects the errors of a validation in the schema object, so validations of the same schema are serialized
+        self._lock = threading.Lock()
+        start = time.perf_counter()
+        document = etree.parse(str(path))
+        self.xsd_version = document.getroot().get(f'{{{VERSIONING_NAMESPACE}}}minVersion', '1.0')
+        if self.xsd_version == '1.1':
+            try:
+                import xmlschema  # only needed for XSD 1.1 schemas
+            except ImportError as e:
+                raise ImportError(f'The XSD 1.1 schema {path} requires the xmlschema package (pip install xmlschema)') from e
+            self.schema = xmlschema.XMLSchema11(str(path))
+        else:
+            self.schema = etree.XMLSchema(document)
+        self.compile_time = time.perf_counter() - start
+
+    def validate(self, tree: etree._ElementTree) -> List[Tuple[str, int, int]]:
+        """Validates a tree against the schema.
+
+        Args:
+            tree (etree._ElementTree): The parsed file.
+
+        Returns:
+            List[Tuple[str, int, int]]: Message, line and column of each schema violation, empty if the tree is valid.
+        """
+        if self.xsd_version == '1.1':
+            return [(error.reason or str(error), getattr(error.elem, 'sourceline', 0) or 0, 0)
+                    for error in self.schema.iter_errors(tree)]
+        with self._lock:
+            if self.schema.validate(tree):
+                return []
+            return [(error.message, error.line, error.column) for error in self.schema.error_log]
+
+
+class SchemaRegistry:
+    """Compiled schemas of the formats by (format extension, version), shared by all files and threads of the process.
+
+    The schema files of a format are listed in its format.json as "schemas": {"1.7": "schema/OpenDRIVE_Core.xsd"},
+    relative to the format folder. A schema is compiled on first request and kept until the process ends.
+    """
+
+    directory: Path
+
+    def __init__(self, directory: Path = None) -> None:
+        """Constructs a SchemaRegistry object.
+
+        Args:
+            directory (Path, optional): Folder containing the format folders. Defaults to the framework folder.
+        """
+        self.directory = directory if directory is not None else Path(__file__).parent
+        self._schemas = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def get_schema_path(self, format_settings: dict, version: Tuple[int, int]) -> Path:
+        """Returns the schema file of a format version.
+
+        Args:
+            format_settings (dict): Settings of the format (format.json).
+            version (Tuple[int, int]): (revMajor, revMinor) of the file.
+
+        Returns:
+            Path: The schema file or None if the format has no schema for the version.
+        """
+        if version is None:
+            return None
+        schema_file = format_settings.get('schemas', {}).get(f'{version[0]}.{version[1]}')
+        if schema_file is None:
+            return None
+        return (self.directory / format_settings['extension'] / schema_file).resolve()
+
+    def get_versions(self, format_settings: dict) -> List[Tuple[int, int]]:
+        """Returns the versions with a schema file of a format."""
+        return [tuple(int(part) for part in version.split('.')) for version in format_settings.get('schemas', {})]
+
+    def get(self, format_settings: dict, version: Tuple[int, int]) -> CompiledSchema:
+        """Returns the compiled schema of a format version, compiled on first request.
+
+        Args:
+            format_settings (dict): Settings of the format (format.json).
+            version (Tuple[int, int]): (revMajor, revMinor) of the file.
+
+        Returns:
+            CompiledSchema: The schema or None if the format has no schema for the version.
+
+        Raises:
+            etree.XMLSchemaParseError, etree.XMLSyntaxError, OSError, ImportError: If the schema cannot be compiled.
+                The error is kept and raised again on further requests.
+        """
+        path = self.get_schema_path(format_settings, version)
+        if path is None:
+            return None
+        return self.get_file(path)
+
+    def get_file(self, path: Path) -> CompiledSchema:
+        """Returns the compiled schema of a schema file, compiled on first request.
+
+        Args:
+            path (Path): Path of the XSD file.
+
+        Returns:
+            CompiledSchema: The schema.
+        """
+        key = str(Path(path).resolve())
+        schema = self._schemas.get(key)
+        if schema is None:
+            with self._lock:
+                path_lock = self._path_locks.setdefault(key, threading.Lock())
+            # only threads waiting for the same schema are blocked while it is compiled
+            with path_lock:
+                schema = self._schemas.get(key)
+                if schema is None:
+                    error = self._errors.get(key)
+                    if error is not None:
+                        raise error
+                    try:
+                        schema = CompiledSchema(Path(key))
+                    except (etree.XMLSchemaParseError, etree.XMLSyntaxError, OSError, ImportError) as e:
+                        logging.error(f'Could not compile schema {key}: {e}')
+                        self._errors[key] = e
+                        raise
+                    logging.info(f'Compiled schema {key} (XSD {schema.xsd_version}) in {schema.compile_time:.3f} s')
+                    self._schemas[key] = schema
+                    return schema
+        schema.hits += 1
+        return schema
+
+    def prewarm(self, format_settings: dict, versions: List[Tuple[int, int]] = None):
+        """Compiles the schemas of a format, so the first file does not pay for the compilation.
+
+        Args:
+            format_settings (dict): Settings of the format (format.json).
+            versions (List[Tuple[int, int]], optional): The versions to compile. Defaults to all versions of the format.
+        """
+        for version in versions if versions is not None else self.get_versions(format_settings):
+            try:
+                self.get(format_settings, version)
+            except (etree.XMLSchemaParseError, etree.XMLSyntaxError, OSError, ImportError):
+                pass  # logged by get, raised again for the checks using the schema
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Returns the compile time in seconds and the number of reuses of the compiled schemas by schema file."""
+        return {key: {'compile_time': schema.compile_time, 'hits': schema.hits, 'xsd_version': schema.xsd_version}
+                for key, schema in self._schemas.items()}
+
+
+_registry: SchemaRegistry = None
+_registry_lock = threading.Lock()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Returns the schema registry of this process."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SchemaRegistry()
+        return _registry
@@ -0,0 +1,346 @@
+if not __package__:
+    from validator import ValidationOptions, get_options_worker_pool, get_session, validate
+    from check_plan import get_check_plan
+    from result_cache import get_result_cache
+    from input_source import BufferSource, InputSource, close_archives
+    from schema_registry import get_schema_registry
+    from document_cache import get_document_cache
+else:
+    from .validator import ValidationOptions, get_options_worker_pool, get_session, validate
+    from .check_plan import get_check_plan
+    from .result_cache import get_result_cache
+    from .input_source import BufferSource, InputSource, close_archives
+    from .schema_registry import get_schema_registry
+    from .document_cache import get_document_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import List, Union
+from urllib.parse import parse_qs, urlsplit
+
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+
+SERVE_OUTPUT_TYPES = ['xqar', 'json']
+# larger uploads are rejected before they are read into memory
+DEFAULT_MAX_UPLOAD_SIZE = 512 * 1024 * 1024
+_CONTENT_TYPES = {'xqar': 'application/xml', 'json': 'application/json'}
+
+
+def get_available_formats() -> List[str]:
+    """Returns the formats with a format folder, e.g. ['xodr', 'xosc']."""
+    return sorted(path.parent.name for path in Path(__file__).parent.glob('*/format.json'))
+
+
+def prewarm(options: ValidationOptions, formats: List[str]):
+    """Loads the settings, check plans and schemas of the formats and starts the checker workers with isolation,
+    so the first request does not pay for the imports.
+
+    Args:
+        options (ValidationOptions): Check directories and config of the server.
+        formats (List[str]): The formats to load.
+    """
+    session = get_session(options.additional_check_dirs, options.config_path, None)
+    for format_extension in formats:
+        format_settings, _ = session.load_settings(format_extension)
+        if format_settings is None:
+            continue
+        check_plan = get_check_plan(format_settings, options.additional_check_dirs)
+        logging.info(f'Loaded {sum(len(bundle.checkers) for bundle in check_plan.bundles)} checks for {format_extension}')
+        get_schema_registry().prewarm(format_settings)
+        worker_pool = get_options_worker_pool(options)
+        if worker_pool is not None:
+            worker_pool.prewarm([checker.module_name for _, checker in check_plan.get_checkers()])
+
+
+def init_worker(logging_args: tuple, options: ValidationOptions, formats: List[str]):
+    """Initializer of the worker processes: configures logging and loads the check plans and schemas.
+
+    Args:
+        logging_args (tuple): Arguments of configure_logging.
+        options (ValidationOptions): Options of the server.
+        formats (List[str]): The formats to load.
+    """
+    if not __package__:
+        from main import configure_logging
+    else:
+        from .main import configure_logging
+    configure_logging(*logging_args)
+    prewarm(options, formats)
+
+
+def start_executor(options: ValidationOptions, workers: int, formats: List[str], logging_args: tuple) -> ProcessPoolExecutor:
+    """Starts the worker processes of the server and waits until they loaded the formats.
+
+    Args:
+        options (ValidationOptions): Options of the server.
+        workers (int): Number of worker processes.
+        formats (List[str]): The formats to load.
+        logging_args (tuple): Arguments of configure_logging for the worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The started pool.
+    """
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(logging_args, options, formats))
+    # start all workers now, so the imports are done before the first request
+    for future in [executor.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+    return executor
+
+
+def validate_to_bytes(file: Union[Path, InputSource], options: ValidationOptions) -> (bool, bytes, int, bool):
+    """Validates a file and returns the serialized result report. Executed in the worker processes.
+
+    Args:
+        file (Union[Path, InputSource]): The file to validate or the uploaded content.
+        options (ValidationOptions): Options of the request, output_type is xqar or json.
+
+    Returns:
+        (bool, bytes, int, bool): If the validation was successful, the report, the number of issues
+            and if the result was restored from the cache.
+    """
+    cache = None
+    if options.cache_dir is not None:
+        cache = get_result_cache(options.cache_dir, options.cache_size)
+    try:
+        result, valid = validate(file, options.additional_check_dirs, options.config_path, options.format_extension, cache=cache,
+                                 checker_threads=options.checker_threads, document_cache=get_document_cache(options.document_cache_size),
+                                 worker_pool=get_options_worker_pool(options))
+    finally:
+        # the worker lives as long as the server, archives read by the request are not kept open
+        close_archives()
+    if not valid:
+        return False, b'', 0, False
+
+    if options.output_type == 'json':
+        data = result.get_as_json(options.compact_json).encode()
+    else:
+        buffer = BytesIO()
+        result.write_as_xqar(buffer)
+        data = buffer.getvalue()
+    return True, data, result.get_issues_count(), result.from_cache
+
+
+class ValidationRequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of the validation server.
+
+    - GET /health: status of the server
+    - POST /validate?file=[path]: validates a file below the file_root of the server, disabled without file_root
+    - POST /validate?name=[file name] with the file content as body: validates the uploaded content
+
+    Optional query parameters of /validate are format (e.g. xodr, otherwise taken from the file extension)
+    and type (xqar or json, default xqar). The response body is the result report.
+    Uploads larger than the max_upload_size of the server are rejected with 413.
+    """
+
+    server_version = 'OpenValidator'
+
+    def address_string(self) -> str:
+        # client_address of unix sockets is empty
+        return self.client_address[0] if self.client_address else self.server.server_address
+
+    def log_message(self, format, *args):
+        logging.debug(f'{self.address_string()} {format % args}')
+
+    def send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/health':
+            self.send_json(404, {'error': f'Unknown path {self.path}'})
+            return
+        self.send_json(200, {'status': 'ok', 'workers': self.server.workers, 'formats': self.server.formats})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/validate':
+            self.send_json(404, {'error': f'Unknown path {url.path}'})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        output_type = query.get('type', 'xqar')
+        if output_type not in SERVE_OUTPUT_TYPES:
+            self.send_json(400, {'error': f'Unknown type {output_type}, available: {", ".join(SERVE_OUTPUT_TYPES)}'})
+            return
+        options = replace(self.server.options, output_type=output_type, format_extension=query.get('format'))
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self.send_json(400, {'error': f'Invalid Content-Length {self.headers.get("Content-Length")}'})
+            return
+        if length > self.server.max_upload_size:
+            # the body is not read, so the connection cannot be used for further requests
+            self.close_connection = True
+            self.send_json(413, {'error': f'Upload of {length} bytes exceeds the limit of {self.server.max_upload_size} bytes'})
+            return
+        if length > 0:
+            # uploaded content, the file name is kept for the format detection and the report
+            name = Path(query.get('name', 'upload.' + (options.format_extension or 'xml'))).name
+            data = self.rfile.read(length)
+            if len(data) < length:
+                self.send_json(400, {'error': f'Incomplete body, received {len(data)} of {length} bytes'})
+                return
+            self.respond_validation(BufferSource(data, name), options)
+        elif 'file' in query:
+            file = self.server.get_allowed_file(query['file'])
+            if file is None:
+                self.send_json(403, {'error': f'Validating files of the server is not allowed for {query["file"]}'})
+                return
+            self.respond_validation(file, options)
+        else:
+            self.send_json(400, {'error': 'Provide the file parameter or the file content as body'})
+
+    def respond_validation(self, file: Union[Path, InputSource], options: ValidationOptions):
+        executor = self.server.executor
+        try:
+            valid, data, issue_count, cached = executor.submit(validate_to_bytes, file, options).result()
+        except BrokenProcessPool:
+            # e.g. a crashing checker or the out of memory killer, the next requests are validated by new workers
+            logging.exception(f'A worker process terminated while validating {file}')
+            self.server.restart_executor(executor)
+            self.send_json(500, {'error': f'Could not validate {file.name}: the worker process terminated'})
+            return
+        except Exception as e:
+            logging.exception(f'Could not validate {file}')
+            self.send_json(500, {'error': f'Could not validate {file.name}: {e}'})
+            return
+        if not valid:
+            self.send_json(422, {'error': f'Could not validate {file.name}, see the server log'})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', _CONTENT_TYPES[options.output_type])
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Issue-Count', str(issue_count))
+        self.send_header('X-Result-Cached', 'true' if cached else 'false')
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ValidationServerMixin:
+    """Shared state of the TCP and the unix socket server."""
+
+    daemon_threads = True
+    options: ValidationOptions
+    executor: ProcessPoolExecutor
+    workers: int
+    formats: List[str]
+    logging_args: tuple
+    max_upload_size: int
+    file_root: Path
+
+    def get_allowed_file(self, file: str) -> Path:
+        """Returns the path of a file parameter if it is below the file root.
+
+        Args:
+            file (str): The file parameter, relative paths are relative to the file root.
+
+        Returns:
+            Path: The resolved path or None if the file parameter is disabled or the file is outside of the file root.
+        """
+        if self.file_root is None:
+            return None
+        # symbolic links and .. are resolved, so they cannot leave the root
+        path = (self.file_root / file).resolve()
+        return path if path.is_relative_to(self.file_root) else None
+
+    def restart_executor(self, broken: ProcessPoolExecutor):
+        """Replaces a broken pool of worker processes by a new prewarmed pool.
+
+        Args:
+            broken (ProcessPoolExecutor): The broken pool, it is only replaced once by the requests which failed with it.
+        """
+        with self._executor_lock:
+            if self.executor is not broken:
+                return
+            logging.warning(f'Restarting the {self.workers} worker processes')
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = start_executor(self.options, self.workers, self.formats, self.logging_args)
+
+
+class ValidationHTTPServer(ValidationServerMixin, ThreadingHTTPServer):
+    """Validation server on a TCP address."""
+
+
+class ValidationUnixServer(ValidationServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Validation server on a unix domain socket."""
+
+
+def serve(options: ValidationOptions, workers: int, formats: List[str], logging_args: tuple,
+          socket_path: Path = None, host: str = '127.0.0.1', port: int = 8765, max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+          file_root: Path = None):
+    """Runs the validation server until it is interrupted (Ctrl+C or SIGTERM).
+
+    Requests are accepted concurrently and validated by a pool of worker processes,
+    which keep the settings and check plans loaded between requests.
+
+    Args:
+        options (ValidationOptions): Check directories, config, cache and json options of all requests.
+        workers (int): Number of worker processes.
+        formats (List[str]): The formats loaded at startup.
+        logging_args (tuple): Arguments of configure_logging for the worker processes.
+        socket_path (Path, optional): Listen on this unix domain socket instead of TCP. Defaults to None.
+        host (str, optional): TCP host, only localhost is recommended. Defaults to '127.0.0.1'.
+        port (int, optional): TCP port. Defaults to 8765.
+        max_upload_size (int, optional): Maximal size of an uploaded file in bytes. Defaults to DEFAULT_MAX_UPLOAD_SIZE.
+        file_root (Path, optional): Folder of the files which can be validated with the file parameter,
+            the file parameter is rejected with 403 without it. Defaults to None.
+
+    Raises:
+        FileExistsError: If the socket path exists and is not a socket.
+    """
+    # a stale socket of a previous server is replaced, any other file is kept
+    if socket_path is not None and socket_path.exists() and not socket_path.is_socket():
+        raise FileExistsError(f'{socket_path} exists and is not a socket')
+
+    executor = start_executor(options, workers, formats, logging_args)
+
+    if socket_path is not None:
+        if socket_path.is_socket():
+            socket_path.unlink()
+        server = ValidationUnixServer(str(socket_path), ValidationRequestHandler)
+        address = socket_path
+    else:
+        server = ValidationHTTPServer((host, port), ValidationRequestHandler)
+        address = f'http://{host}:{server.server_address[1]}'
+    server.options = options
+    server.executor = executor
+    server.workers = workers
+    server.formats = formats
+    server.logging_args = logging_args
+    server.max_upload_size = max_upload_size
+    server.file_root = file_root.resolve() if file_root is not None else None
+    server._executor_lock = threading.Lock()
+
+    def stop(signum, frame):
+        # shutdown blocks until serve_forever returns, so it cannot be called from the serving thread
+        threading.Thread(target=server.shutdown).start()
+    signal.signal(signal.SIGTERM, stop)
+
+    logging.info(f'Serving on {address} with {workers} workers')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown(wait=True, cancel_futures=True)
+        if socket_path is not None and socket_path.exists():
+            socket_path.unlink()
+        logging.info('Server stopped')
@@ -9,4 +9,5 @@ setup(name='OpenValidator',
         license='TBD',
         packages=['OpenValidator'],
         zip_safe=False,
-        install_requires=['lxml', 'scipy'])
+        python_requires='>=3.12',
+        install_requires=['lxml', 'scipy', 'xmlschema'])
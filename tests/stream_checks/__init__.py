@@ -0,0 +1,2 @@
+# Streaming checks of the tests, used as additional check directory
+ORDER = ['stream_bundle']
@@ -0,0 +1,3 @@
+CHECKER_BUNDLE_NAME = 'stream test checks'
+CHECKER_BUNDLE_DESCRIPTION = 'Streaming checks of the tests'
+CHECKER_BUNDLE_VERSION = '1.0.0'
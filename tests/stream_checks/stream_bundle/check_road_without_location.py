@@ -0,0 +1,20 @@
+from result_report import IssueLevel
+
+
+def get_checker_id():
+    return 'road_without_location'
+
+
+def get_description():
+    return 'report roads without a location'
+
+
+def report_road(checker_data, el):
+    checker_data.checker.gen_issue(IssueLevel.WARNING, f'road {el.get("id")}')
+
+
+STREAM_HANDLERS = {'road': report_road}
+
+
+def check(checker_data) -> bool:
+    return True
@@ -0,0 +1,35 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from check_scheduler import CheckTask, sort_by_dependencies
+
+
+def gen_tasks(names: list, requires: dict) -> list:
+    checkers = {name: SimpleNamespace(module_name=name, dependencies=[]) for name in names}
+    for name, required in requires.items():
+        checkers[name].dependencies = [checkers[dependency] for dependency in required]
+    return [CheckTask(index, None, checkers[name], None, None) for index, name in enumerate(names)]
+
+
+def get_names(tasks: list) -> list:
+    return [task.checker.module_name for task in tasks]
+
+
+def test_plan_order_without_dependencies():
+    tasks = gen_tasks(['a', 'b', 'c'], {})
+    assert get_names(sort_by_dependencies(tasks)) == ['a', 'b', 'c']
+
+
+def test_required_later_checker_runs_first():
+    tasks = gen_tasks(['a', 'b', 'c', 'd'], {'a': ['c'], 'b': ['a']})
+    assert get_names(sort_by_dependencies(tasks)) == ['c', 'a', 'b', 'd']
+
+
+def test_cycle_runs_all_checkers():
+    tasks = gen_tasks(['a', 'b', 'c'], {'a': ['b'], 'b': ['a']})
+    # the ready checker runs first, then the cycle is broken in plan order
+    assert get_names(sort_by_dependencies(tasks)) == ['c', 'a', 'b']
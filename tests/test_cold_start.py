@@ -0,0 +1,21 @@
+from pathlib import Path
+
+import subprocess
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+from bench_cold_start import FORBIDDEN_MODULES, FRAMEWORK_DIR, get_command, parse_importtime
+from generators import generate_xodr
+
+
+def test_plain_validation_imports_no_forbidden_modules(tmp_path):
+    file = tmp_path / 'tiny.xodr'
+    generate_xodr(file, 5)
+    command = get_command(file, tmp_path / 'reports')
+
+    result = subprocess.run([command[0], '-X', 'importtime'] + command[1:], cwd=FRAMEWORK_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    modules = parse_importtime(result.stderr)
+    assert 'validator' in modules
+    assert [name for name in FORBIDDEN_MODULES if name in modules] == []
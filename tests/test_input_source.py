@@ -0,0 +1,75 @@
+from pathlib import Path, PurePosixPath
+
+import io
+import os
+import sys
+import tarfile
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import input_source
+from input_source import ArchiveMemberSource, close_archives, get_archive_members, get_safe_member_path
+from result_report import ResultReport
+from validator import ValidationOptions, write_result
+
+XODR = b'''<?xml version="1.0" encoding="UTF-8"?>
+<OpenDRIVE><header revMajor="1" revMinor="7"/><road id="1"/></OpenDRIVE>
+'''
+
+
+def write_tar(path: Path, members: dict):
+    with tarfile.open(path, 'w:gz') as f:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            f.addfile(info, io.BytesIO(data))
+
+
+def test_large_tar_member_is_spooled(tmp_path):
+    archive = tmp_path / 'maps.tar.gz'
+    write_tar(archive, {'small.xodr': b'<a/>', 'large.xodr': XODR})
+    small, large = get_archive_members(archive)
+    max_size = input_source.MAX_MEMORY_MEMBER_SIZE
+    input_source.MAX_MEMORY_MEMBER_SIZE = len(XODR) - 1
+    try:
+        with large.open() as f:
+            assert not isinstance(f, io.BytesIO)
+            assert f.read() == XODR
+        # large members are not kept in memory for the next read
+        assert getattr(input_source._open_archives, 'last_member', None) is None
+        assert large.parse().getroot().tag == 'OpenDRIVE'
+        with small.open() as f:
+            assert isinstance(f, io.BytesIO)
+            assert f.read() == b'<a/>'
+        assert input_source._open_archives.last_member[0] == small.get_key()
+    finally:
+        input_source.MAX_MEMORY_MEMBER_SIZE = max_size
+        close_archives()
+    assert not input_source._open_archives.archives
+    assert input_source._open_archives.last_member is None
+
+
+def test_safe_member_path():
+    archive = Path('maps.zip')
+    assert get_safe_member_path(archive, 'roads/road.xodr') == PurePosixPath('roads/road.xodr')
+    assert get_safe_member_path(archive, '../../road.xodr') == PurePosixPath('road.xodr')
+    assert get_safe_member_path(archive, 'roads/../../road.xodr') == PurePosixPath('roads/road.xodr')
+    assert get_safe_member_path(archive, '/etc/road.xodr') == PurePosixPath('etc/road.xodr')
+    assert get_safe_member_path(archive, 'C:\\roads\\road.xodr') == PurePosixPath('roads/road.xodr')
+    assert get_safe_member_path(archive, '..') == PurePosixPath('_')
+
+
+def test_write_result_stays_in_output_directory(tmp_path):
+    output_directory = tmp_path / 'reports'
+    options = ValidationOptions(output_type='xqar')
+    member = ArchiveMemberSource(tmp_path / 'maps.zip', '../../roads/road.xodr')
+    assert write_result(ResultReport(member.path), member, output_directory, options) == output_directory / 'maps.zip' / 'roads' / 'road.xodr.xqar'
+
+    # a symbolic link in the output directory does not lead the report outside of it
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    os.symlink(outside, output_directory / 'linked.zip')
+    member = ArchiveMemberSource(tmp_path / 'linked.zip', 'roads/road.xodr')
+    assert write_result(ResultReport(member.path), member, output_directory, options) == output_directory / 'road.xodr.xqar'
+    assert list(outside.iterdir()) == []
+    assert (output_directory / 'road.xodr.xqar').exists()
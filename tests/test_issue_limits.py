@@ -0,0 +1,106 @@
+from io import BytesIO
+from pathlib import Path
+from lxml import etree
+
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from check_plan import CheckPlan
+from result_report import AggregatedIssue, FileLocation, IssueLevel, ResultReport
+from validator import run_checks
+
+STREAM_CHECKS_DIR = Path(__file__).parent / 'stream_checks'
+
+FORMAT_SETTINGS = {'name': 'OpenDRIVE', 'extension': 'xodr', 'shortcut': 'ODR'}
+
+XODR = '''<?xml version="1.0" encoding="UTF-8"?>
+<OpenDRIVE><header revMajor="1" revMinor="7"/><road id="1"/><road id="2"/><road id="3"/></OpenDRIVE>
+'''
+
+
+def gen_limited_report(**limits) -> ResultReport:
+    report = ResultReport()
+    checker = report.gen_checker_bundle('bundle', 'Test bundle', '1.0.0').gen_checker('limited', 'Limited checker')
+    checker.set_issue_limits(**limits)
+    for row in range(5):
+        checker.gen_issue(IssueLevel.ERROR, 'same', [FileLocation(row, 0)])
+    for _ in range(3):
+        checker.gen_issue(IssueLevel.WARNING, 'other')
+    checker.gen_issue(IssueLevel.ERROR, 'last')
+    return report
+
+
+def get_checker(report: ResultReport):
+    return report._checker_bundles[0]._checkers[0]
+
+
+def test_max_issues_truncates():
+    report = gen_limited_report(max_issues=2)
+    checker = get_checker(report)
+
+    assert [issue.description for issue in checker._issues] == ['same', 'same']
+    assert checker.truncated == 7
+    assert checker.get_summary() == 'Found 2 issues, truncated 7 more (max_issues 2)'
+    assert report._checker_bundles[0].get_summary() == 'Found 2 incidents, truncated 7 more'
+    assert report.get_issues_count() == 9
+
+
+def test_aggregated_issues_count_occurrences():
+    report = gen_limited_report(aggregate_issues=True, sample_locations=2)
+    checker = get_checker(report)
+
+    issues = {issue.description: issue for issue in checker._issues}
+    assert all(isinstance(issue, AggregatedIssue) for issue in checker._issues)
+    assert {description: issue.count for description, issue in issues.items()} == {'same': 5, 'other': 3, 'last': 1}
+    # only the locations of the first sample_locations occurrences are kept
+    assert [location.row for location in issues['same'].locations] == [0, 1]
+    assert issues['other'].locations is None
+    assert checker.truncated == 0
+    assert checker.get_summary() == 'Found 9 issues'
+    assert report.get_issues_count() == 9
+
+
+def test_aggregated_and_truncated_outputs():
+    report = gen_limited_report(max_issues=2, aggregate_issues=True, sample_locations=2)
+    checker = get_checker(report)
+    assert checker.get_summary() == 'Found 8 issues, truncated 1 more (max_issues 2)'
+    assert report.get_issues_count() == 9
+
+    data = json.loads(report.get_as_json())
+    checker_json = data['_checker_bundles'][0]['_checkers'][0]
+    assert checker_json['truncated'] == 1
+    assert {issue['description']: issue['count'] for issue in checker_json['_issues']} == {'same': 5, 'other': 3}
+    assert {issue['description']: len(issue['locations'] or []) for issue in checker_json['_issues']} == {'same': 2, 'other': 0}
+
+    buffer = BytesIO()
+    report.write_as_xqar(buffer)
+    root = etree.fromstring(buffer.getvalue())
+    assert root.find('CheckerBundle').get('summary') == 'Found 8 incidents, truncated 1 more'
+    checker_element = root.find('CheckerBundle/Checker')
+    assert checker_element.get('summary') == 'Found 8 issues, truncated 1 more (max_issues 2)'
+    issues = {issue.get('description'): issue for issue in checker_element.iter('Issue')}
+    assert sorted(issues) == ['other (3 occurrences)', 'same (5 occurrences)']
+    assert len(issues['same (5 occurrences)'].findall('Locations/FileLocation')) == 2
+
+    text = report.get_as_text_list()
+    assert '    Error: same (5 occurrences)' in text
+    assert '    Warning: other (3 occurrences)' in text
+    assert '    truncated: 1 more issues (max_issues 2)' in text
+
+
+def test_limits_from_config(tmp_path):
+    file = tmp_path / 'roads.xodr'
+    file.write_text(XODR)
+    config = {'stream test checks': {'road_without_location': {'max_issues': 2}}}
+
+    plan = CheckPlan(FORMAT_SETTINGS, [str(STREAM_CHECKS_DIR)])
+    plan.bundles = [bundle for bundle in plan.bundles if bundle.name == 'stream test checks']
+    report = ResultReport(file)
+    assert run_checks(file, report, [str(STREAM_CHECKS_DIR)], config, FORMAT_SETTINGS, plan)
+
+    checker = get_checker(report)
+    assert [issue.description for issue in checker._issues] == ['road 1', 'road 2']
+    assert checker.truncated == 1
+    assert report.get_issues_count() == 3
@@ -0,0 +1,55 @@
+from pathlib import Path
+from lxml import etree
+
+import subprocess
+import sys
+
+FRAMEWORK_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(FRAMEWORK_DIR / 'benchmarks'))
+
+from generators import generate_xodr
+
+SYNTHETIC_CHECKS_DIR = FRAMEWORK_DIR / 'benchmarks' / 'synthetic_checks'
+
+
+def validate(input_directory: Path, output_directory: Path, *args) -> str:
+    result = subprocess.run([sys.executable, str(FRAMEWORK_DIR / 'main.py'), str(input_directory), '-f', 'xodr',
+                             '-a', str(SYNTHETIC_CHECKS_DIR), '-o', str(output_directory), '-l', 'ERROR', '--issue-log', 'off'] + list(args),
+                            cwd=FRAMEWORK_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def mask_report(path: Path) -> tuple:
+    """Returns the report without its issues and the issues of each checker with masked identifiers.
+
+    The identifiers are random (uuid4) and the issues of a checker are sorted by them,
+    so the issues of a checker are compared in sorted order.
+    """
+    root = etree.parse(str(path)).getroot()
+    issues = []
+    for checker in root.iter('Checker'):
+        checker_issues = []
+        for issue in checker.findall('Issue'):
+            issue.set('issueId', '')
+            checker_issues.append(etree.tostring(issue).strip())
+            checker.remove(issue)
+        issues.append((checker.get('checkerId'), sorted(checker_issues)))
+    return etree.tostring(root), issues
+
+
+def test_parallel_reports_match_serial(tmp_path):
+    input_directory = tmp_path / 'in'
+    input_directory.mkdir()
+    for i in range(4):
+        generate_xodr(input_directory / f'road{i}.xodr', 5 + i)
+
+    serial = validate(input_directory, tmp_path / 'serial')
+    parallel = validate(input_directory, tmp_path / 'parallel', '-j', '2')
+    assert parallel == serial
+
+    reports = sorted(path.name for path in (tmp_path / 'serial').iterdir())
+    assert reports == sorted(path.name for path in (tmp_path / 'parallel').iterdir())
+    assert len(reports) == 4
+    for name in reports:
+        assert mask_report(tmp_path / 'parallel' / name) == mask_report(tmp_path / 'serial' / name)
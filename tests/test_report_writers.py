@@ -0,0 +1,70 @@
+from io import BytesIO
+from pathlib import Path
+from lxml import etree
+
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from result_report import (FileLocation, IssueLevel, ResultReport, create_location_for_road, create_location_from_element,
+                           create_location_from_xPath, dumper)
+
+XODR = b'''<?xml version="1.0" encoding="UTF-8"?>
+<OpenDRIVE>
+  <header revMajor="1" revMinor="7"/>
+  <road id="1"><link/></road>
+  <road id="2"/>
+</OpenDRIVE>
+'''
+
+
+def gen_report() -> ResultReport:
+    root = etree.fromstring(XODR)
+    roads = root.findall('road')
+    report = ResultReport(Path('road.xodr'))
+    report.report_meta = {'tool': 'test', 'date': '2024-01-01'}
+
+    bundle = report.gen_checker_bundle('z checks', 'Bundle sorted after the other one', '1.0.0')
+    bundle.params['XodrFile'] = 'road.xodr'
+    checker = bundle.gen_checker('roads', 'Checks the roads')
+    checker.gen_issue(IssueLevel.ERROR, 'Road & <link> "1"', create_location_for_road(roads[0], 1, 0.5, -1.0))
+    checker.gen_issue(IssueLevel.WARNING, 'Road 2', create_location_from_element(roads[1]))
+    checker.gen_issue(IssueLevel.INFORMATION, 'Header', create_location_from_xPath('/OpenDRIVE/header') + [FileLocation(2, 3)])
+    checker.gen_issue(IssueLevel.WARNING, 'External', None, {'link': 'https://example.com', 'ids': [2, 1]})
+    bundle.gen_checker('empty', 'Finds nothing')
+
+    aggregated = report.gen_checker_bundle('a checks', 'Aggregated issues', '2.0.0').gen_checker('aggregated', 'Aggregates its issues')
+    aggregated.set_issue_limits(max_issues=2, aggregate_issues=True, sample_locations=1)
+    for road in roads + roads:
+        aggregated.gen_issue(IssueLevel.ERROR, f'Road {road.get("id")}', create_location_from_element(road))
+    aggregated.gen_issue(IssueLevel.ERROR, 'Truncated')
+    return report
+
+
+def test_xqar_writer_matches_element_tree():
+    report = gen_report()
+    buffer = BytesIO()
+    report.write_as_xqar(buffer)
+
+    expected = BytesIO()
+    etree.ElementTree(report.get_as_xqar_xml_tree()).write(expected, pretty_print=True, xml_declaration=True, encoding='utf-8')
+    assert buffer.getvalue() == expected.getvalue()
+
+
+def test_xqar_writer_to_file(tmp_path):
+    report = gen_report()
+    report.write_as_xqar(tmp_path / 'road.xodr.xqar')
+
+    expected = BytesIO()
+    etree.ElementTree(report.get_as_xqar_xml_tree()).write(expected, pretty_print=True, xml_declaration=True, encoding='utf-8')
+    assert (tmp_path / 'road.xodr.xqar').read_bytes() == expected.getvalue()
+
+
+def test_json_writer_matches_json_dumps(tmp_path):
+    report = gen_report()
+    assert report.get_as_json() == json.dumps(report, default=dumper, sort_keys=True, indent=4)
+    assert report.get_as_json(compact=True) == json.dumps(report, default=dumper, sort_keys=True, separators=(',', ':'))
+
+    report.write_as_json(tmp_path / 'road.xodr.json')
+    assert (tmp_path / 'road.xodr.json').read_text() == json.dumps(report, default=dumper, sort_keys=True, indent=4)
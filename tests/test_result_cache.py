@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from result_cache import ResultCache
+from result_report import IssueLevel, ResultReport
+
+FORMAT_SETTINGS = {'name': 'OpenDRIVE', 'extension': 'xodr', 'shortcut': 'ODR'}
+
+
+def gen_report(file: Path) -> ResultReport:
+    report = ResultReport(file)
+    report.gen_checker_bundle('bundle', 'Test bundle', '1.0.0').gen_checker('checker', 'Test checker').gen_issue(IssueLevel.ERROR, 'issue')
+    return report
+
+
+def get_descriptions(report: ResultReport) -> list:
+    return [issue.description for bundle in report._checker_bundles for checker in bundle._checkers for issue in checker._issues]
+
+
+def test_content_change(tmp_path):
+    file = tmp_path / 'road.xodr'
+    file.write_text('<OpenDRIVE/>')
+    cache = ResultCache(tmp_path / 'cache')
+    key = cache.get_key(file, {}, FORMAT_SETTINGS, 'fingerprint')
+    cache.store(key, gen_report(file), file)
+
+    assert get_descriptions(cache.load(key, file)) == ['issue']
+    # the key only depends on the content
+    assert cache.get_key(file, {}, FORMAT_SETTINGS, 'fingerprint') == key
+
+    file.write_text('<OpenDRIVE><road/></OpenDRIVE>')
+    changed_key = cache.get_key(file, {}, FORMAT_SETTINGS, 'fingerprint')
+    assert changed_key != key
+    assert cache.load(changed_key, file) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_referenced_document_change(tmp_path):
+    file = tmp_path / 'scenario.xosc'
+    file.write_text('<OpenSCENARIO/>')
+    network = tmp_path / 'network.xodr'
+    network.write_text('<OpenDRIVE/>')
+    cache = ResultCache(tmp_path / 'cache')
+    key = cache.get_key(file, {}, FORMAT_SETTINGS, 'fingerprint')
+    report = gen_report(file)
+    report.referenced_documents = ['network.xodr']
+    cache.store(key, report, file)
+
+    assert cache.load(key, file) is not None
+    network.write_text('<OpenDRIVE><road/></OpenDRIVE>')
+    assert cache.load(key, file) is None
+    network.unlink()
+    assert cache.load(key, file) is None
+
+
+def test_limits_change(tmp_path):
+    file = tmp_path / 'road.xodr'
+    file.write_text('<OpenDRIVE/>')
+    cache = ResultCache(tmp_path / 'cache')
+    config = {'bundle': {'checker': {'max_issues': 10}}}
+    key = cache.get_key(file, config, FORMAT_SETTINGS, 'fingerprint')
+
+    assert cache.get_key(file, {'bundle': {'checker': {'max_issues': 20}}}, FORMAT_SETTINGS, 'fingerprint') != key
+    assert cache.get_key(file, config, FORMAT_SETTINGS, 'other fingerprint') != key
+    isolated_key = cache.get_key(file, config, FORMAT_SETTINGS, 'fingerprint', (10.0, None))
+    assert isolated_key != key
+    assert cache.get_key(file, config, FORMAT_SETTINGS, 'fingerprint', (20.0, None)) != isolated_key
+
+
+def test_untrusted_directory(tmp_path):
+    file = tmp_path / 'road.xodr'
+    file.write_text('<OpenDRIVE/>')
+    directory = tmp_path / 'cache'
+    directory.mkdir()
+    os.chmod(directory, 0o777)
+    cache = ResultCache(directory)
+    key = cache.get_key(file, {}, FORMAT_SETTINGS, 'fingerprint')
+
+    assert not cache.is_trusted()
+    cache.store(key, gen_report(file), file)
+    assert list(directory.iterdir()) == []
+    # an entry written by someone else is not unpickled
+    trusted = ResultCache(tmp_path / 'trusted')
+    trusted.store(key, gen_report(file), file)
+    os.replace(trusted._get_path(key).parent, directory / key[:2])
+    assert cache.load(key, file) is None
+    assert cache.misses == 1
+
+
+def test_new_directory_is_private(tmp_path):
+    cache = ResultCache(tmp_path / 'new' / 'cache')
+    assert cache.is_trusted()
+    assert os.stat(tmp_path / 'new' / 'cache').st_mode & 0o777 == 0o700
@@ -0,0 +1,90 @@
+from io import BytesIO
+from pathlib import Path
+from lxml import etree
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from result_report import FileLocation, IssueLevel, ResultReport, create_location_for_road, create_location_from_element
+from result_store import ResultStore, close_result_stores, get_result_store
+
+XODR = b'''<?xml version="1.0" encoding="UTF-8"?>
+<OpenDRIVE>
+  <header revMajor="1" revMinor="7"/>
+  <road id="1"/>
+  <road id="2"/>
+</OpenDRIVE>
+'''
+
+
+def gen_report(file: str) -> ResultReport:
+    roads = etree.fromstring(XODR).findall('road')
+    report = ResultReport(Path(file))
+    report.report_meta = {'tool': 'test'}
+    bundle = report.gen_checker_bundle('road checks', 'Checks the roads', '1.0.0')
+    bundle.params['XodrFile'] = file
+    checker = bundle.gen_checker('roads', 'Checks the roads')
+    checker.gen_issue(IssueLevel.ERROR, 'Road 1 is missing a link', create_location_for_road(roads[0], '1', 0.5, 0.0))
+    checker.gen_issue(IssueLevel.WARNING, 'Road 2 is short', create_location_from_element(roads[1]))
+    checker.gen_issue(IssueLevel.INFORMATION, 'Header', [FileLocation(2, 3)], {'link': 'https://example.com'})
+    checker.gen_issue(IssueLevel.WARNING, 'No location')
+    limited = bundle.gen_checker('limited', 'Limited checker')
+    limited.set_issue_limits(max_issues=1, aggregate_issues=True, sample_locations=1)
+    for road in roads + roads:
+        limited.gen_issue(IssueLevel.ERROR, 'Same issue', create_location_from_element(road))
+    limited.gen_issue(IssueLevel.ERROR, 'Truncated issue')
+    return report
+
+
+def get_xqar(report: ResultReport) -> bytes:
+    buffer = BytesIO()
+    report.write_as_xqar(buffer)
+    return buffer.getvalue()
+
+
+def test_round_trip(tmp_path):
+    database = tmp_path / 'results.sqlite'
+    report = gen_report('maps/road.xodr')
+    report.write_as_sqlite(database, 'maps/road.xodr')
+    store = get_result_store(database)
+
+    loaded = store.load_report('maps/road.xodr')
+    assert get_xqar(loaded) == get_xqar(report)
+    assert loaded.get_issues_count() == report.get_issues_count() == 9
+    assert loaded.report_meta == {'tool': 'test'}
+
+    output = BytesIO()
+    assert store.export_xqar('maps/road.xodr', output)
+    assert output.getvalue() == get_xqar(report)
+    assert store.load_report('other.xodr') is None
+    assert not store.export_xqar('other.xodr', BytesIO())
+    close_result_stores()
+
+
+def test_queries(tmp_path):
+    database = tmp_path / 'results.sqlite'
+    gen_report('a.xodr').write_as_sqlite(database)
+    gen_report('b.xodr').write_as_sqlite(database)
+    # a stored report of the same file is replaced
+    gen_report('b.xodr').write_as_sqlite(database)
+    store = get_result_store(database)
+
+    assert store.get_files() == ['a.xodr', 'b.xodr']
+    assert [issue['description'] for issue in store.query_issues(file='a.xodr')] == [
+        'Road 1 is missing a link', 'Road 2 is short', 'Header', 'No location', 'Same issue']
+    assert store.query_files(checker_id='roads', level=IssueLevel.ERROR) == {'a.xodr': 1, 'b.xodr': 1}
+    assert store.query_files(road_id='1') == {'a.xodr': 1, 'b.xodr': 1}
+    issues = store.query_issues(checker_id='limited', description='Same%')
+    assert [(issue['file'], issue['count'], issue['level']) for issue in issues] == [('a.xodr', 4, IssueLevel.ERROR), ('b.xodr', 4, IssueLevel.ERROR)]
+    assert len(store.query_issues(limit=3)) == 3
+
+    store.delete('a.xodr')
+    assert store.get_files() == ['b.xodr']
+    close_result_stores()
+
+    # the closed store is checkpointed into the database file
+    assert not (tmp_path / 'results.sqlite-wal').exists()
+    store = ResultStore(database)
+    assert store.get_files() == ['b.xodr']
+    store.close()
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from server import ValidationServerMixin
+
+
+def gen_server(file_root: Path) -> ValidationServerMixin:
+    server = ValidationServerMixin()
+    server.file_root = file_root.resolve() if file_root is not None else None
+    return server
+
+
+def test_file_parameter_disabled_without_root(tmp_path):
+    file = tmp_path / 'road.xodr'
+    file.touch()
+    assert gen_server(None).get_allowed_file(str(file)) is None
+
+
+def test_file_parameter_restricted_to_root(tmp_path):
+    root = tmp_path / 'root'
+    (root / 'maps').mkdir(parents=True)
+    (root / 'maps' / 'road.xodr').touch()
+    (tmp_path / 'outside.xodr').touch()
+    os.symlink(tmp_path / 'outside.xodr', root / 'link.xodr')
+    server = gen_server(root)
+
+    assert server.get_allowed_file('maps/road.xodr') == (root / 'maps' / 'road.xodr').resolve()
+    assert server.get_allowed_file(str(root / 'maps' / 'road.xodr')) == (root / 'maps' / 'road.xodr').resolve()
+    assert server.get_allowed_file('../outside.xodr') is None
+    assert server.get_allowed_file(str(tmp_path / 'outside.xodr')) is None
+    assert server.get_allowed_file('link.xodr') is None
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from check_plan import CheckPlan
+from result_report import ResultReport, IssueLevel
+from validator import run_checks
+
+STREAM_CHECKS_DIR = Path(__file__).parent / 'stream_checks'
+
+FORMAT_SETTINGS = {'name': 'OpenDRIVE', 'extension': 'xodr', 'shortcut': 'ODR'}
+
+XODR = '''<?xml version="1.0" encoding="UTF-8"?>
+<OpenDRIVE><header revMajor="1" revMinor="7"/><road id="1"/><road id="2"/></OpenDRIVE>
+'''
+
+
+def test_stream_issue_without_locations(tmp_path):
+    file = tmp_path / 'roads.xodr'
+    file.write_text(XODR)
+
+    plan = CheckPlan(FORMAT_SETTINGS, [str(STREAM_CHECKS_DIR)])
+    plan.bundles = [bundle for bundle in plan.bundles if bundle.name == 'stream test checks']
+    report = ResultReport(file)
+    assert run_checks(file, report, [str(STREAM_CHECKS_DIR)], {}, FORMAT_SETTINGS, plan)
+
+    issues = report._checker_bundles[0]._checkers[0]._issues
+    assert [(issue.level, issue.description, issue.locations) for issue in issues] == [
+        (IssueLevel.WARNING, 'road 1', None), (IssueLevel.WARNING, 'road 2', None)]
@@ -1,185 +1,492 @@
 from result_report import ResultReport, IssueLevel, FileLocation
 from checker_data import CheckerData 
+from xml_document import XmlDocument
+from check_plan import CheckPlan, get_check_plan, get_sorted_checker_bundles
+from check_scheduler import CheckTask, run_tasks_concurrently, sort_by_dependencies
+from xml_stream import run_stream
+from profiler import CheckProfiler
+from result_cache import ResultCache, get_result_cache, restore_report
+from input_source import InputSource, get_files
+from document_cache import DEFAULT_DOCUMENT_CACHE_SIZE, DocumentCache, get_document_cache
+from isolation import CheckerWorkerPool, get_worker_pool
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Union
 from lxml import etree
 
 import logging
 import os
 import json
+import threading
 
-def get_bundle(sorted_bundles: List, path: Path):
-    name = os.path.relpath(str(path), Path(__file__).parent).replace('/', '.').replace('.py', '').replace('\\', '.')
-    module = __import__(name, fromlist=['ORDER'])
-    order = []
-    if hasattr(module, 'ORDER'):
-        for bundle in module.ORDER:
-            order.append(bundle)
-
-    bundles = []
-    bundles.extend([mod for mod in path.iterdir() if mod.is_dir() and mod.name != '__pycache__'])
-
-    # sort
-    bundle_names = {bundle.name: bundle for bundle in bundles}
-    assigned = set()
-    for bundle_order in order:
-        if bundle_order in bundle_names:
-            sorted_bundles.append(bundle_names[bundle_order])
-            assigned.add(bundle_order)
+def run_checks(file: Union[Path, InputSource], result_report: ResultReport, additional_check_dirs: List[str], config: dict, format_setting: dict, check_plan: CheckPlan = None, profiler: CheckProfiler = None, checker_threads: int = 1, document: XmlDocument = None, document_cache: DocumentCache = None, worker_pool: CheckerWorkerPool = None, resolve_xpaths: bool = True) -> bool:
+
+    checker_data = CheckerData(file=file, reporter=result_report, config=config, format_settings=format_setting, document=document, document_cache=document_cache)
+
+    if check_plan is None:
+        check_plan = get_check_plan(format_setting, additional_check_dirs)
+
+    # create all bundles and checkers in plan order first, so the report does not depend on the execution order
+    tasks = []
+    for bundle in check_plan.bundles:
+        checker_bundle = result_report.gen_checker_bundle(bundle.name, bundle.description, bundle.version)
+        param_name = format_setting['extension'].capitalize() + 'File'
+        checker_bundle.params[param_name] = str(file)
+        for checker in bundle.checkers:
+            report_checker = checker_bundle.gen_checker(checker.checker_id, checker.description)
+            limits = bundle.get_issue_limits(config, checker)
+            if limits:
+                report_checker.set_issue_limits(**limits)
+            task = CheckTask(len(tasks), bundle, checker, report_checker, bundle.get_checker_config(config, checker))
+            # streaming checkers share the pass over the file and are not isolated
+            if worker_pool is not None and not checker.streaming:
+                isolation = bundle.get_isolation_settings(config, checker)
+                if isolation.get('isolate', True):
+                    task.isolation = isolation
+            tasks.append(task)
+
+    try:
+        # all streaming checkers share one pass over the file at the position of the first streaming checker
+        streamed = [task for task in tasks if task.checker.streaming]
+        if not streamed:
+            return run_tasks(checker_data, tasks, profiler, checker_threads, worker_pool)
+        first = streamed[0].index
+        others = [task for task in tasks if not task.checker.streaming]
+        return (run_tasks(checker_data, others[:first], profiler, checker_threads, worker_pool)
+                and run_stream(checker_data, streamed, profiler)
+                and run_tasks(checker_data, others[first:], profiler, checker_threads, worker_pool))
+    finally:
+        result_report.referenced_documents = checker_data.referenced_documents
+        # all checkers finished, the locations must not keep the elements and so the tree of the released file alive
+        if resolve_xpaths:
+            result_report.resolve_xpaths()
         else:
-            logging.error(f'Provided bundle {bundle_order} is defined in order but cannot be found.')
-    for name in set(bundle_names.keys()) - assigned:
-        sorted_bundles.append(bundle_names[name])
-
-    return sorted_bundles
-
-def get_sorted_checker_bundles(additional_check_dirs: List[str], format_setting: dict) -> List:
-    # first get bundles from default format folder
-    format_path = Path(__file__).parent / format_setting['extension'] / 'checks'
-    bundle_order = []
-    bundle_order = get_bundle(bundle_order, format_path)
-
-    # then get bundles from additional folder
-    if additional_check_dirs is not None:
-        for additional_dir in additional_check_dirs:
-            additional_path = Path(additional_dir)
-            bundle_order = get_bundle(bundle_order, additional_path)
-    
-    return bundle_order
-
-
-def run_checks(file: Path, result_report: ResultReport, additional_check_dirs: List[str], config: dict, format_setting: dict) -> bool:
-
-    checker_data = CheckerData(file=file, reporter=result_report, config=config, format_settings=format_setting)
-
-    check_bundles = get_sorted_checker_bundles(additional_check_dirs, format_setting)
-    logging.debug(f'Found {len(check_bundles)} checker modules')
-
-    for check_bundle in check_bundles:
-        try:
-            # load checker bundle
-            parent_module = __name__
-            if '.' in parent_module:
-                parent_module = parent_module[:parent_module.rfind('.') + 1]
-            else:
-                parent_module = ''
-            bundle_name = parent_module + os.path.relpath(str(check_bundle), Path(__file__).parent).replace('/', '.').replace('.py', '').replace('\\', '.')
-            logging.debug(f'Loading checker bundle {{{bundle_name}}}')
-            bundle_module = __import__(bundle_name, fromlist=['CHECKER_BUNDLE_NAME', 'CHECKER_BUNDLE_DESCRIPTION', 'CHECKER_BUNDLE_VERSION', 'ORDER'])
-            
-            checker_bundle = result_report.gen_checker_bundle(bundle_module.CHECKER_BUNDLE_NAME, bundle_module.CHECKER_BUNDLE_DESCRIPTION, bundle_module.CHECKER_BUNDLE_VERSION)
-            param_name = format_setting['extension'].capitalize() + 'File'
-            checker_bundle.params[param_name] = str(file)
-
-            # get all checker python files
-            checkers = [checker for checker in check_bundle.iterdir() if checker.name.endswith('.py') and checker.name != '__init__.py' and checker.name.startswith('check_')]
-            checker_names = {checker.name: checker for checker in checkers}
-
-            # sort checks according to bundle order
-            if hasattr(bundle_module, 'ORDER'):
-                order = bundle_module.ORDER
-                sorted_checkers = []
-                assigned = set()
-                for checker_order in order:
-                    py_name = f'{checker_order}.py'
-                    if checker_order in checker_names:
-                        sorted_checkers.append(checker_names[checker_order])
-                        assigned.add(checker_order)
-                    elif py_name in checker_names:
-                        sorted_checkers.append(checker_names[py_name])
-                        assigned.add(py_name)
-                    else:
-                        logging.error(f'Provided checker {checker_order} is defined in order but cannot be found.')
-                for name in set(checker_names.keys()) - assigned:
-                    sorted_checkers.append(checker_names[name])
-                checkers = sorted_checkers
-
-            # load and execute checks
-            for checker in checkers:
-                module_name = parent_module + os.path.relpath(str(checker), Path(__file__).parent).replace('/', '.').replace('.py', '').replace('\\', '.')
-                logging.debug(f'Loading checker {{{module_name}}}')
-                try:
-                    check_module = __import__(module_name, fromlist=['check', 'get_checker_id', 'get_description'])
-                except:
-                    logging.exception(f'Could not load checker bundle {module_name}')
-                    continue
-                
-                # check required functions
-                required_functions = ['check', 'get_checker_id', 'get_description']
-                missing_function = False
-                for function in required_functions:
-                    if not hasattr(check_module, function):    
-                        logging.error(f'{module_name} has no requried function {function}')
-                        missing_function = True
-                        break
-                if missing_function: 
-                    continue                                        
-
-                # create checker
-                checker_data.checker  = checker_bundle.gen_checker(check_module.get_checker_id(), check_module.get_description())
-                # get config for check
-                if bundle_module.CHECKER_BUNDLE_NAME in config and check_module.get_checker_id() in config[bundle_module.CHECKER_BUNDLE_NAME]:
-                    checker_data.config = config[bundle_module.CHECKER_BUNDLE_NAME][check_module.get_checker_id()]
-                
-                # execute check
-                try:
-                    success = check_module.check(checker_data)
-                    if success is False: # not exist or readable or critcal check issue
-                        logging.exception(f'Cancel checks for the file {check_module.get_checker_id()}')
-                        return False
-                except:
-                    logging.exception(f'Could not {check_module.get_checker_id()}')
-                    checker_data.checker.gen_issue(IssueLevel.ERROR, f'Could not {check_module.get_description()}')                
-                
-        except:
-            logging.exception(f'Could not load checker bundle {check_bundle}')
+            result_report.release_elements()
+        checker_data.document.release()
+
+
+def run_tasks(checker_data: CheckerData, tasks: List[CheckTask], profiler: CheckProfiler = None, checker_threads: int = 1, worker_pool: CheckerWorkerPool = None) -> bool:
+    # tracemalloc has one peak for the process, so memory profiles are only correct for checkers running alone
+    if checker_threads > 1 and (profiler is None or profiler.mode != 'memory'):
+        return run_tasks_concurrently(checker_data, tasks, checker_threads, profiler, worker_pool)
+
+    for task in sort_by_dependencies(tasks):
+        logging.debug(f'Running checker {{{task.checker.module_name}}}')
+        # create checker
+        checker_data.checker = task.report_checker
+        # get config for check
+        if task.config is not None:
+            checker_data.config = task.config
+
+        # execute check
+        if task.isolation is not None:
+            if not worker_pool.execute(task, checker_data, profiler):
+                return False
+        elif not task.checker.execute(checker_data, profiler, task.bundle.name):
+            return False
     return True
 
 
-def validate(file: Path, additional_check_dirs: List[str], config_path: Path, format_extension: str) -> (ResultReport, bool):
-    
-    # init result_report and checker
-    result_report = ResultReport()
-    result_report.checked_file = file
-    file = file.expanduser()
-    file = file.resolve()
-    
-    #  extension handling
-    if format_extension == None:
-        format_extension = file.suffix.lstrip('.')
-    else:
-        if format_extension != file.suffix.lstrip('.'):
-            logging.error(f'Not supported file format: {file.suffix.lstrip('.')} of file {file}')
-            return result_report, False   
-    
-    # find format settings     
-    format_path = Path(__file__).parent / f'{format_extension}/format.json'
-    if not format_path.exists() or not format_path.is_file():
-        logging.error(f'Provided format description path does not exist or is not a file: {format_path.absolute()}')
-        return result_report, False    
-    # load format settings
-    with open(format_path, 'r') as f:
-        format_settings = json.load(f)
-
-    # get config file
-    if config_path == None:
-        config_path = Path(__file__).parent / f'{format_extension}/config.json'
-    if not config_path.exists() or not config_path.is_file():
-        logging.error(f'Provided config path does not exist or is not a file: {config_path.absolute()}')
-        return result_report, False
-    with open(config_path, 'r') as f:
-        config = json.load(f)        
-
-    # run checks
-    sucess = run_checks(file, result_report, additional_check_dirs, config, format_settings)
-    
-    return result_report, sucess
-
-def get_files(input_files: any):
-    for data in input_files:
-        if os.path.isdir(data):
-            for root, dirs, files in os.walk(data):
-                for file in files:
-                    yield Path(os.path.join(root, file))
+class SettingsFile:
+    """JSON settings file (format.json, config.json) that is only loaded again if it changed on disk."""
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        """Constructs a SettingsFile object.
+
+        Args:
+            path (Path): Path of the JSON file.
+        """
+        self.path = path
+        self._stamp = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Returns the content of the file. The file is loaded again if its modification time or size changed.
+
+        Returns:
+            dict: The loaded JSON content.
+        """
+        stat = self.path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                logging.debug(f'Loading settings {self.path}')
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+                self._stamp = stamp
+            return self._data
+
+
+class ValidatorSession:
+    """Validation settings shared by all files of a batch or a long-running service.
+
+    Format settings and config are loaded once per format and only reloaded if the files change on disk.
+    """
+
+    additional_check_dirs: List[str]
+    config_path: Path
+    format_extension: str
+
+    def __init__(self, additional_check_dirs: List[str] = None, config_path: Path = None, format_extension: str = None) -> None:
+        """Constructs a ValidatorSession object.
+
+        Args:
+            additional_check_dirs (List[str], optional): Additional directories for validation checks. Defaults to None.
+            config_path (Path, optional): Path to config file. Otherwise the config is taken from the format folder. Defaults to None.
+            format_extension (str, optional): Format to be checked. Otherwise the format is taken from the file extension. Defaults to None.
+        """
+        self.additional_check_dirs = additional_check_dirs
+        self.config_path = config_path
+        self.format_extension = format_extension
+        self._settings_files = {}
+        self._lock = threading.Lock()
+
+    def _get_settings_file(self, path: Path) -> SettingsFile:
+        with self._lock:
+            settings_file = self._settings_files.get(path)
+            if settings_file is None:
+                settings_file = SettingsFile(path)
+                self._settings_files[path] = settings_file
+            return settings_file
+
+    def load_settings(self, format_extension: str) -> (dict, dict):
+        """Returns the format settings and the config for a format.
+
+        Args:
+            format_extension (str): The format, e.g. xodr.
+
+        Returns:
+            (dict, dict): Format settings and config or (None, None) if one of the files does not exist.
+        """
+        # find format settings
+        format_path = Path(__file__).parent / f'{format_extension}/format.json'
+        if not format_path.is_file():
+            logging.error(f'Provided format description path does not exist or is not a file: {format_path.absolute()}')
+            return None, None
+        format_settings = self._get_settings_file(format_path).load()
+
+        # get config file
+        config_path = self.config_path
+        if config_path == None:
+            config_path = Path(__file__).parent / f'{format_extension}/config.json'
+        if not config_path.is_file():
+            logging.error(f'Provided config path does not exist or is not a file: {config_path.absolute()}')
+            return None, None
+        config = self._get_settings_file(config_path).load()
+
+        return format_settings, config
+
+    def prepare(self, file: Union[Path, InputSource], check_plan: CheckPlan = None, profile: str = None, cache: ResultCache = None, document_cache: DocumentCache = None, worker_pool: CheckerWorkerPool = None) -> 'ValidationJob':
+        """Prepares the validation of a file: loads the settings and the check plan and looks up the result cache.
+
+        Args:
+            file (Union[Path, InputSource]): The file to validate, an archive member or a buffer.
+            check_plan (CheckPlan, optional): Prebuilt check plan. Defaults to the cached plan of the format.
+            profile (str, optional): Profile the checkers (time or memory) and attach the profile to the report. Defaults to None.
+            cache (ResultCache, optional): Restore the report from this cache if the file was validated before
+                and store new reports in it. Not used while profiling. Defaults to None.
+            document_cache (DocumentCache, optional): Cache of the documents referenced by the file. Defaults to the cache of the process.
+            worker_pool (CheckerWorkerPool, optional): Pool the checkers will run in, its limits are part of the cache key. Defaults to None.
+
+        Returns:
+            ValidationJob: The prepared validation, see ValidationJob.is_done.
+        """
+        # init result_report and checker
+        result_report = ResultReport()
+        result_report.checked_file = file
+        job = ValidationJob(file, result_report)
+        job.document_cache = document_cache
+        if isinstance(file, Path):
+            file = file.expanduser()
+            file = file.resolve()
+        job.file = file
+
+        #  extension handling
+        format_extension = self.format_extension
+        if format_extension == None:
+            format_extension = file.suffix.lstrip('.')
         else:
-            yield Path(data)
\ No newline at end of file
+            if format_extension != file.suffix.lstrip('.'):
+                logging.error(f'Not supported file format: {file.suffix.lstrip('.')} of file {file}')
+                job.success = False
+                return job
+
+        # load format settings and config
+        format_settings, config = self.load_settings(format_extension)
+        if format_settings is None:
+            job.success = False
+            return job
+        job.format_settings = format_settings
+        job.config = config
+
+        if check_plan is None:
+            check_plan = get_check_plan(format_settings, self.additional_check_dirs)
+        job.check_plan = check_plan
+
+        # look up cached result
+        if cache is not None and profile is None:
+            try:
+                isolation = (worker_pool.time_limit, worker_pool.memory_limit) if worker_pool is not None else None
+                job.cache_key = cache.get_key(file, config, format_settings, check_plan.get_fingerprint(), isolation)
+            except OSError:
+                logging.exception(f'Could not compute cache key of {file}')
+            if job.cache_key is not None:
+                job.cache = cache
+                cached_report = cache.load(job.cache_key, file)
+                if cached_report is not None:
+                    logging.debug(f'Restored result of {file} from cache')
+                    job.result_report = restore_report(cached_report, result_report.checked_file, file, format_settings)
+                    job.success = True
+                    return job
+
+        if profile is not None:
+            profiler = CheckProfiler(profile)
+            result_report.profile = profiler
+            job.profiler = profiler
+        job.document = XmlDocument(file)
+        return job
+
+    def run(self, job: 'ValidationJob', checker_threads: int = 1, worker_pool: CheckerWorkerPool = None, resolve_xpaths: bool = True) -> (ResultReport, bool):
+        """Runs the checks of a prepared validation and stores the result in the cache.
+
+        Args:
+            job (ValidationJob): The prepared validation.
+            checker_threads (int, optional): Number of threads running checkers declared as READ_ONLY concurrently. Defaults to 1.
+            worker_pool (CheckerWorkerPool, optional): Run the checkers isolated in the worker processes of the pool. Defaults to None.
+            resolve_xpaths (bool, optional): Compute the XPaths of the issue locations, only outputs without XPaths (txt)
+                pass False. Cached reports always have XPaths. Defaults to True.
+
+        Returns:
+            (ResultReport, bool): The result report and if the validation was successful.
+        """
+        if job.is_done():
+            return job.result_report, job.success
+
+        # run checks
+        sucess = run_checks(job.file, job.result_report, self.additional_check_dirs, job.config, job.format_settings, job.check_plan, job.profiler, checker_threads, job.document, job.document_cache, worker_pool,
+                            resolve_xpaths or job.cache is not None)
+
+        # results of checkers stopped by a limit or crash depend on the run and are not cached
+        if sucess and job.cache is not None and not job.result_report.isolation_failed:
+            job.cache.store(job.cache_key, job.result_report, job.file)
+
+        return job.result_report, sucess
+
+    def validate(self, file: Union[Path, InputSource], check_plan: CheckPlan = None, profile: str = None, cache: ResultCache = None, checker_threads: int = 1, document_cache: DocumentCache = None, worker_pool: CheckerWorkerPool = None, resolve_xpaths: bool = True) -> (ResultReport, bool):
+        """Validates a file with the settings of this session.
+
+        Args:
+            file (Union[Path, InputSource]): The file to validate, an archive member or a buffer.
+            check_plan (CheckPlan, optional): Prebuilt check plan. Defaults to the cached plan of the format.
+            profile (str, optional): Profile the checkers (time or memory) and attach the profile to the report. Defaults to None.
+            cache (ResultCache, optional): Restore the report from this cache if the file was validated before
+                and store new reports in it. Not used while profiling. Defaults to None.
+            checker_threads (int, optional): Number of threads running checkers declared as READ_ONLY concurrently. Defaults to 1.
+            document_cache (DocumentCache, optional): Cache of the documents referenced by the file. Defaults to the cache of the process.
+            worker_pool (CheckerWorkerPool, optional): Run the checkers isolated in the worker processes of the pool. Defaults to None.
+            resolve_xpaths (bool, optional): Compute the XPaths of the issue locations, see run. Defaults to True.
+
+        Returns:
+            (ResultReport, bool): The result report and if the validation was successful.
+        """
+        return self.run(self.prepare(file, check_plan, profile, cache, document_cache, worker_pool), checker_threads, worker_pool, resolve_xpaths)
+
+
+class ValidationJob:
+    """Validation of a file prepared by ValidatorSession.prepare and executed by ValidatorSession.run.
+
+    Preparing and running can happen in different threads, e.g. to read and parse the next files ahead, see pipeline.py.
+    """
+
+    file: Union[Path, InputSource]
+    result_report: ResultReport
+    success: bool
+    format_settings: dict
+    config: dict
+    check_plan: CheckPlan
+    profiler: CheckProfiler
+    cache: ResultCache
+    cache_key: str
+    document: XmlDocument
+    document_cache: DocumentCache
+
+    def __init__(self, file: Union[Path, InputSource], result_report: ResultReport) -> None:
+        """Constructs a ValidationJob object.
+
+        Args:
+            file (Union[Path, InputSource]): The file to validate.
+            result_report (ResultReport): The report of the validation.
+        """
+        self.file = file
+        self.result_report = result_report
+        self.success = None
+        self.format_settings = None
+        self.config = None
+        self.check_plan = None
+        self.profiler = None
+        self.cache = None
+        self.cache_key = None
+        self.document = None
+        self.document_cache = None
+
+    def is_done(self) -> bool:
+        """Returns if no checks have to run, because the settings could not be loaded or the result was restored from the cache."""
+        return self.success is not None
+
+    def needs_tree(self) -> bool:
+        """Returns if a checker of the plan needs the parsed tree, i.e. not all checkers are streaming."""
+        return any(not checker.streaming for bundle in self.check_plan.bundles for checker in bundle.checkers)
+
+
+_sessions: Dict[tuple, ValidatorSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(additional_check_dirs: List[str], config_path: Path, format_extension: str) -> ValidatorSession:
+    """Returns the shared session for the given settings, so all files of a batch use the same loaded settings.
+
+    Args:
+        additional_check_dirs (List[str]): Additional directories for validation checks.
+        config_path (Path): Path to config file or None for the config of the format folder.
+        format_extension (str): Format to be checked or None for the file extension.
+
+    Returns:
+        ValidatorSession: The session.
+    """
+    key = (tuple(additional_check_dirs or ()), str(config_path) if config_path is not None else None, format_extension)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = ValidatorSession(additional_check_dirs, config_path, format_extension)
+            _sessions[key] = session
+        return session
+
+
+def validate(file: Union[Path, InputSource], additional_check_dirs: List[str], config_path: Path, format_extension: str, check_plan: CheckPlan = None, profile: str = None, cache: ResultCache = None, checker_threads: int = 1, document_cache: DocumentCache = None, worker_pool: CheckerWorkerPool = None, resolve_xpaths: bool = True) -> (ResultReport, bool):
+    return get_session(additional_check_dirs, config_path, format_extension).validate(file, check_plan, profile, cache, checker_threads, document_cache, worker_pool, resolve_xpaths)
+
+@dataclass
+class ValidationOptions:
+    """Options of a validation run in main, shared by all files and passed to worker processes."""
+    additional_check_dirs: List[str] = None
+    config_path: Path = None
+    format_extension: str = None
+    output_type: str = 'xqar'
+    compact_json: bool = False
+    profile: str = None
+    cache_dir: Path = None  # result cache directory, None disables the cache
+    cache_size: int = 0
+    checker_threads: int = 1
+    document_cache_size: int = DEFAULT_DOCUMENT_CACHE_SIZE  # maximal memory of the parsed referenced documents
+    isolate: bool = False  # run the checkers in worker processes, see CheckerWorkerPool
+    check_time_limit: float = None  # default wall time limit of an isolated check in seconds
+    check_memory_limit: int = None  # default memory limit of an isolated check in bytes
+
+    @property
+    def needs_xpaths(self) -> bool:
+        """If the output type contains the XPaths of the issue locations (all but txt)."""
+        return self.output_type != 'txt'
+
+
+def get_options_worker_pool(options: ValidationOptions) -> CheckerWorkerPool:
+    """Returns the worker pool of this process for the isolation options or None if the checkers are not isolated."""
+    if not options.isolate:
+        return None
+    return get_worker_pool(options.checker_threads, options.check_time_limit, options.check_memory_limit, options.document_cache_size)
+
+
+def write_result(result: ResultReport, file: Union[Path, InputSource], output_directory: Path, options: ValidationOptions) -> Path:
+    """Writes the result report of a file and its profile into the output directory.
+
+    Reports of archive members are written into subfolders named after the archive and the member path.
+    With the output type sqlite, the reports of all files are stored in one database in the output directory.
+
+    Args:
+        result (ResultReport): The result report.
+        file (Union[Path, InputSource]): The validated file.
+        output_directory (Path): The folder the report is written to.
+        options (ValidationOptions): Output type and json options.
+
+    Returns:
+        Path: The written report file.
+    """
+    output_type = options.output_type
+    report_name = file.report_name if isinstance(file, InputSource) else Path(file.name)
+    report_directory = output_directory / report_name.parent
+    if not os.path.realpath(report_directory).startswith(os.path.join(os.path.realpath(output_directory), '')) and report_name.parent != Path('.'):
+        # e.g. a symlink in the output directory, the report is never written outside of it
+        logging.warning(f'Report path {report_name} of {file} is outside of the output directory, writing it as {report_name.name}')
+        report_name = Path(report_name.name)
+        report_directory = output_directory
+    if output_type == 'sqlite':
+        # imported on first use, sqlite3 slows down the start of the other output types
+        from result_store import DEFAULT_STORE_FILE
+        output_file = output_directory / DEFAULT_STORE_FILE
+    else:
+        report_directory.mkdir(parents=True, exist_ok=True)
+        output_file = report_directory / (report_name.name + '.' + output_type)
+    logging.info(f'write to {output_file}')
+    if output_type == 'sqlite':
+        result.write_as_sqlite(output_file, str(file))
+    elif output_type == 'json':
+        result.write_as_json(output_file, compact=options.compact_json)
+    elif output_type == 'ndjson':
+        result.write_as_ndjson(output_file)
+    elif output_type == 'xqar':
+        result.write_as_xqar(output_file)
+    elif output_type == 'txt':
+        result.write_as_txt(output_file)
+
+    if result.profile is not None:
+        report_directory.mkdir(parents=True, exist_ok=True)
+        result.profile.write_as_json(report_directory / (report_name.name + '.profile.json'))
+        result.profile.write_as_collapsed_stacks(report_directory / (report_name.name + '.profile.folded'), report_name.name)
+    return output_file
+
+
+def validate_file_report(file: Union[Path, InputSource], options: ValidationOptions) -> (ResultReport, bool):
+    """Validates a file with the options of a validation run without writing its result report.
+
+    Used by the parallel validation in main, if the reports are written by the main process.
+
+    Args:
+        file (Union[Path, InputSource]): The file to validate or an archive member.
+        options (ValidationOptions): Options of the validation run.
+
+    Returns:
+        (ResultReport, bool): The result report and if the validation was successful.
+    """
+    cache = None
+    if options.cache_dir is not None:
+        cache = get_result_cache(options.cache_dir, options.cache_size)
+
+    return validate(file, options.additional_check_dirs, options.config_path, options.format_extension, profile=options.profile, cache=cache,
+                    checker_threads=options.checker_threads, document_cache=get_document_cache(options.document_cache_size),
+                    worker_pool=get_options_worker_pool(options), resolve_xpaths=options.needs_xpaths)
+
+
+def validate_file(file: Union[Path, InputSource], output_directory: Path, options: ValidationOptions) -> (int, bool, bool):
+    """Validates a file and writes its result report into the output directory.
+
+    Used for the serial and the parallel validation in main, so both produce the same reports.
+
+    Args:
+        file (Union[Path, InputSource]): The file to validate or an archive member.
+        output_directory (Path): The folder the report is written to.
+        options (ValidationOptions): Options of the validation run.
+
+    Returns:
+        (int, bool, bool): Number of issues, if the validation was successful and if the result was restored from the cache.
+    """
+    # validate
+    result, valid = validate_file_report(file, options)
+    if not valid:
+        return 0, False, False
+
+    # write result
+    write_result(result, file, output_directory, options)
+    return result.get_issues_count(), True, result.from_cache
+
@@ -0,0 +1,213 @@
+from typing import Dict, List, Tuple, Union
+from pathlib import Path
+from lxml import etree
+from reference_index import ReferenceIndex
+from input_source import InputSource, as_source
+
+import logging
+import threading
+
+
+class XmlIndex:
+    """Lookup of the elements of a document by tag and by id attribute.
+
+    The index is built with a single pass over the document on first use.
+    """
+
+    _by_tag: Dict[str, List[etree._Element]]
+    _by_id: Dict[str, List[etree._Element]]
+
+    def __init__(self, root: etree._Element) -> None:
+        """Constructs a XmlIndex object.
+
+        Args:
+            root (etree._Element): Root element of the indexed document.
+        """
+        self._root = root
+        self._by_tag = None
+        self._by_id = None
+
+    def _build(self):
+        by_tag = {}
+        by_id = {}
+        for el in self._root.iter():
+            if not isinstance(el.tag, str):  # comments and processing instructions
+                continue
+            by_tag.setdefault(el.tag, []).append(el)
+            identifier = el.get('id')
+            if identifier is not None:
+                by_id.setdefault(identifier, []).append(el)
+        self._by_tag = by_tag
+        self._by_id = by_id
+
+    def by_tag(self, tag: str) -> List[etree._Element]:
+        """Returns all elements with the given tag in document order.
+
+        Args:
+            tag (str): Tag of the elements, e.g. road.
+
+        Returns:
+            List[etree._Element]: The found elements.
+        """
+        if self._by_tag is None:
+            self._build()
+        return self._by_tag.get(tag, [])
+
+    def by_id(self, identifier: str, tag: str = None) -> List[etree._Element]:
+        """Returns all elements with the given id attribute in document order.
+
+        Ids are only unique per element type (e.g. road and junction), so a list is returned.
+
+        Args:
+            identifier (str): Value of the id attribute.
+            tag (str, optional): Only return elements with this tag. Defaults to None.
+
+        Returns:
+            List[etree._Element]: The found elements.
+        """
+        if self._by_id is None:
+            self._build()
+        elements = self._by_id.get(identifier, [])
+        if tag is not None:
+            elements = [el for el in elements if el.tag == tag]
+        return elements
+
+
+class XmlDocument:
+    """Parsed XML input file shared by all checkers of one validation.
+
+    The file is parsed on first access only once. Parse errors are kept and raised again on every access,
+    so a broken file is not parsed again by every checker.
+    """
+
+    file: Union[Path, InputSource]
+    source: InputSource
+
+    def __init__(self, file: Union[Path, InputSource]) -> None:
+        """Constructs a XmlDocument object.
+
+        Args:
+            file (Union[Path, InputSource]): Path of the XML file or its source, e.g. an archive member.
+        """
+        self.file = file
+        self.source = as_source(file)
+        self._tree = None
+        self._error = None
+        self._index = None
+        self._version = None
+        self._version_detected = False
+        self._road_network = None
+        self._reference_indices = {}
+        # checkers may run concurrently, see check_scheduler
+        self._lock = threading.Lock()
+
+    @property
+    def tree(self) -> etree._ElementTree:
+        """The parsed lxml tree of the file.
+
+        Raises:
+            etree.XMLSyntaxError, OSError: If the file cannot be read or parsed.
+        """
+        tree = self._tree
+        if tree is None:
+            with self._lock:
+                if self._tree is None:
+                    if self._error is not None:
+                        raise self._error
+                    try:
+                        logging.debug(f'Parsing {self.file}')
+                        self._tree = self.source.parse()
+                    except (etree.XMLSyntaxError, OSError) as e:
+                        self._error = e
+                        raise
+                tree = self._tree
+        return tree
+
+    @property
+    def root(self) -> etree._Element:
+        """The root element of the parsed file."""
+        return self.tree.getroot()
+
+    @property
+    def index(self) -> XmlIndex:
+        """The lazily built element index of the parsed file."""
+        if self._index is None:
+            root = self.root
+            with self._lock:
+                if self._index is None:
+                    index = XmlIndex(root)
+                    index.by_tag('')  # build while locked
+                    self._index = index
+        return self._index
+
+    @property
+    def road_network(self) -> 'RoadNetwork':
+        """The lazily built NumPy view of the roads of an OpenDRIVE file, see road_network.RoadNetwork."""
+        if self._road_network is None:
+            root = self.root
+            with self._lock:
+                if self._road_network is None:
+                    # NumPy is only imported if a checker uses the road network
+                    from road_network import RoadNetwork
+                    self._road_network = RoadNetwork(root)
+        return self._road_network
+
+    def get_reference_index(self, format_extension: str) -> ReferenceIndex:
+        """Returns the lazily built index of the ids and references of the parsed file, see reference_index.ReferenceIndex.
+
+        Args:
+            format_extension (str): Extension of the format selecting the reference rules, e.g. xodr or xosc.
+
+        Returns:
+            ReferenceIndex: The index, built once per format.
+        """
+        index = self._reference_indices.get(format_extension)
+        if index is None:
+            root = self.root
+            with self._lock:
+                index = self._reference_indices.get(format_extension)
+                if index is None:
+                    index = ReferenceIndex(root, format_extension)
+                    self._reference_indices[format_extension] = index
+        return index
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        """The (revMajor, revMinor) version of the header element or None if no header is found."""
+        if not self._version_detected:
+            self._version = detect_version(self.root)
+            self._version_detected = True
+        return self._version
+
+    def is_loaded(self) -> bool:
+        """Returns if the file is already parsed."""
+        return self._tree is not None
+
+    def release(self):
+        """Releases the parsed tree and everything derived from it."""
+        self._tree = None
+        self._index = None
+        self._road_network = None
+        self._reference_indices = {}
+
+
+def detect_version(root: etree._Element) -> Tuple[int, int]:
+    """Detects the version of an OpenX file from the revMajor and revMinor attributes
+    of its header (OpenDRIVE: header, OpenSCENARIO: FileHeader).
+
+    Args:
+        root (etree._Element): Root element of the file.
+
+    Returns:
+        Tuple[int, int]: The version or None if no header with a valid version is found.
+    """
+    for child in root:
+        major = child.get('revMajor')
+        minor = child.get('revMinor')
+        if major is not None and minor is not None:
+            try:
+                return int(major), int(minor)
+            except ValueError:
+                logging.error(f'Invalid version {major}.{minor} in {child.tag}')
+                return None
+    return None
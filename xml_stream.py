@@ -0,0 +1,245 @@
+from result_report import IssueLevel, FileLocation, XmlLocation
+from checker_data import CheckerData
+from lxml import etree
+from typing import Callable, Dict, List, Tuple
+
+import copy
+import logging
+
+# handler(checker_data, element) of a streaming checker
+StreamHandler = Callable[[CheckerData, etree._Element], None]
+
+
+def get_stream_handlers(module: any) -> Dict[str, StreamHandler]:
+    """Returns the STREAM_HANDLERS of a checker module.
+
+    Keys are element tags (road) or absolute paths without indices (/OpenDRIVE/road/planView/geometry).
+
+    Args:
+        module (any): The checker module.
+
+    Returns:
+        Dict[str, StreamHandler]: The handlers by tag or path, empty if the checker does not stream.
+    """
+    handlers = getattr(module, 'STREAM_HANDLERS', None)
+    if not handlers:
+        return {}
+    for key, handler in handlers.items():
+        if not callable(handler):
+            raise TypeError(f'Stream handler for {key} of {module.__name__} is not callable')
+    return dict(handlers)
+
+
+def _resolve_segments(segments: tuple) -> str:
+    parts = []
+    for segment in segments:
+        if isinstance(segment, str):
+            parts.append(segment)
+            continue
+        sibling_counts, tag, index = segment
+        # same format as getpath: the index is only written if the parent has several children with the tag
+        if sibling_counts is None or sibling_counts[tag] == 1:
+            parts.append(tag)
+        else:
+            parts.append(f'{tag}[{index}]')
+    return '/' + '/'.join(parts)
+
+
+class _StreamedChecker:
+    """State of a streaming checker during the pass."""
+
+    def __init__(self, task, checker_data: CheckerData) -> None:
+        self.task = task
+        self.checker_data = checker_data
+        self.failed = False
+
+
+class StreamPass:
+    """Single iterparse pass over an input file dispatching the elements to the handlers of all streaming checkers.
+
+    Handlers get the element at its end event, so the element is complete with all children.
+    Afterwards the element is cleared and removed unless an open ancestor has a handler, so the memory
+    only depends on the largest handled subtree and not on the size of the file.
+    Elements in the XmlLocations of generated issues are replaced by their XPath, computed from the
+    element positions seen during the pass and identical to the XPath of the full tree.
+    """
+
+    def __init__(self, checker_data: CheckerData, tasks: List, profiler=None) -> None:
+        """Constructs a StreamPass object.
+
+        Args:
+            checker_data (CheckerData): Checker data of the file.
+            tasks (List[CheckTask]): The streaming checkers in plan order.
+            profiler (CheckProfiler, optional): Profiler measuring the check functions after the pass. Defaults to None.
+        """
+        self.checker_data = checker_data
+        self.profiler = profiler
+        self.checkers = []
+        self._by_tag = {}
+        self._by_path = {}
+        for task in tasks:
+            # own checker data per checker, data holds the state of the checker between the handlers and check
+            data = copy.copy(checker_data)
+            data.checker = task.report_checker
+            data.config = task.config if task.config is not None else checker_data.config
+            data.data = {}
+            streamed = _StreamedChecker(task, data)
+            self.checkers.append(streamed)
+            for key, handler in task.checker.stream_handlers.items():
+                handlers = self._by_path if key.startswith('/') else self._by_tag
+                handlers.setdefault(key, []).append((streamed, handler))
+        # XmlLocations with the position of their element, resolved after the pass
+        self._pending: List[Tuple[XmlLocation, tuple]] = []
+
+    def _dispatch(self, el: etree._Element, handlers: list, stack: list):
+        for streamed, handler in handlers:
+            if streamed.failed:
+                continue
+            checker = streamed.checker_data.checker
+            issue_count = len(checker._issues)
+            sample_count = len(checker._sampled_locations)
+            try:
+                handler(streamed.checker_data, el)
+            except Exception:
+                logging.exception(f'Could not {streamed.task.checker.checker_id}')
+                checker.gen_issue(IssueLevel.ERROR, f'Could not {streamed.task.checker.description}', [FileLocation(el.sourceline, 0)])
+                streamed.failed = True
+            for issue in checker._issues[issue_count:]:
+                if not issue.locations:
+                    continue  # locations are optional
+                for location in issue.locations:
+                    if isinstance(location, XmlLocation) and location.element is not None:
+                        self._defer(location, el, stack)
+            # sample locations added to aggregated issues of earlier elements
+            for location in checker._sampled_locations[sample_count:]:
+                if isinstance(location, XmlLocation) and location.element is not None:
+                    self._defer(location, el, stack)
+
+    def _defer(self, location: XmlLocation, el: etree._Element, stack: list):
+        target = location.element
+        # open elements (the handled element and its ancestors)
+        for frame in reversed(stack):
+            if frame[0] is target:
+                segments = frame[2]
+                break
+        else:
+            if target is el or el in target.iterancestors():
+                # descendant of the handled element, its subtree is complete
+                frame = stack[-1]
+                segments = frame[2]
+                if target is not el:
+                    relative = etree.ElementTree(el).getpath(target)
+                    segments = segments + (relative.split('/', 2)[2],)
+            else:
+                # element of an already processed part, keep the element
+                return
+        location.xpath = None
+        self._pending.append((location, segments))
+
+    def run(self) -> bool:
+        """Runs the pass and the check functions of the streaming checkers.
+
+        Returns:
+            bool: False if a checker requested to cancel all further checks of the file.
+        """
+        document = self.checker_data.document
+        # the file is only read again if no other checker loaded the tree before
+        streaming = not document.is_loaded()
+        try:
+            if streaming:
+                logging.debug(f'Streaming {self.checker_data.file}')
+                events = document.source.iterparse(events=('start', 'end'), huge_tree=True)
+            else:
+                events = etree.iterwalk(document.root, events=('start', 'end'))
+            self._run_events(events, streaming)
+        except (etree.XMLSyntaxError, OSError) as e:
+            logging.error(f'Could not stream {self.checker_data.file}: {e}')
+            line, column = getattr(e, 'position', (0, 0))
+            for streamed in self.checkers:
+                if not streamed.failed:
+                    streamed.checker_data.checker.gen_issue(IssueLevel.ERROR, f'Could not {streamed.task.checker.description}: {e}', [FileLocation(line, column)])
+                    streamed.failed = True
+        finally:
+            for location, segments in self._pending:
+                location.xpath = _resolve_segments(segments)
+            self._pending = []
+
+        for streamed in self.checkers:
+            if streamed.failed:
+                streamed.checker_data.checker.log_summary()
+                continue
+            if not streamed.task.checker.execute(streamed.checker_data, self.profiler, streamed.task.bundle.name):
+                return False
+        return True
+
+    def _set_version(self, major: str, minor: str):
+        try:
+            version = int(major), int(minor)
+        except ValueError:
+            logging.error(f'Invalid version {major}.{minor} in header')
+            return
+        # a version set by a checker before is kept
+        if self.checker_data._version is None:
+            for streamed in self.checkers:
+                streamed.checker_data.version = version
+
+    def _run_events(self, events, clear: bool):
+        # frames of the open elements: (element, child tag counts, segments, path, handlers)
+        stack = []
+        held = 0  # open elements with handlers, their subtrees are kept
+        version_detected = False
+        by_tag = self._by_tag
+        by_path = self._by_path
+        # only elements are reported without the comment and pi events
+        for event, el in events:
+            if event == 'start':
+                tag = el.tag
+                if stack:
+                    parent = stack[-1]
+                    index = parent[1][tag] = parent[1].get(tag, 0) + 1
+                    segments = parent[2] + ((parent[1], tag, index),)
+                    path = parent[3] + '/' + tag if by_path else None
+                else:
+                    segments = ((None, tag, 1),)
+                    path = '/' + tag
+                handlers = by_tag.get(tag)
+                if by_path and path in by_path:
+                    handlers = (handlers or []) + by_path[path]
+                stack.append((el, {}, segments, path, handlers))
+                if handlers:
+                    held += 1
+                continue
+
+            handlers = stack[-1][4]
+            if handlers:
+                held -= 1
+                self._dispatch(el, handlers, stack)
+            stack.pop()
+
+            if not version_detected and len(stack) == 1:
+                # header of the file, see detect_version
+                major, minor = el.get('revMajor'), el.get('revMinor')
+                if major is not None and minor is not None:
+                    version_detected = True
+                    self._set_version(major, minor)
+
+            if clear and held == 0:
+                el.clear(keep_tail=True)
+                parent = el.getparent()
+                if parent is not None:
+                    while el.getprevious() is not None:
+                        del parent[0]
+
+
+def run_stream(checker_data: CheckerData, tasks: List, profiler=None) -> bool:
+    """Executes the streaming checkers of a file with a single pass over the file, see StreamPass.
+
+    Args:
+        checker_data (CheckerData): Checker data of the file.
+        tasks (List[CheckTask]): The streaming checkers in plan order.
+        profiler (CheckProfiler, optional): Profiler measuring the check functions after the pass. Defaults to None.
+
+    Returns:
+        bool: False if a checker requested to cancel all further checks of the file.
+    """
+    return StreamPass(checker_data, tasks, profiler).run()